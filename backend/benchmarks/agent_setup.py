@@ -0,0 +1,83 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Microbenchmark of the per-step setup of researcher and coder agents.
+
+Measures what a step costs before the agent is invoked: building the search
+tool and creating the ReAct agent. "cold" clears the tool and agent caches
+before every step, which is what every step paid before the caches existed;
+"warm" is a step after the first one.
+
+Usage:
+    python -m benchmarks.agent_setup [--iterations 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+from src.agents import agents
+from src.tools import search
+from src.tools.crawl import crawl_tool
+from src.tools.python_repl import python_repl_tool
+
+
+class _FakeToolChatModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _researcher_step_setup():
+    tools = [search.get_web_search_tool(3), crawl_tool]
+    return agents.create_agent("researcher", "researcher", tools, "researcher")
+
+
+def _coder_step_setup():
+    return agents.create_agent("coder", "coder", [python_repl_tool], "coder")
+
+
+def _measure(setup, iterations: int, cold: bool) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            agents._agent_cache.clear()
+            search._web_search_tools.clear()
+        start = time.perf_counter()
+        setup()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    model = _FakeToolChatModel(messages=iter([]))
+    with patch.object(agents, "get_llm_by_type", return_value=model):
+        for name, setup in (
+            ("researcher", _researcher_step_setup),
+            ("coder", _coder_step_setup),
+        ):
+            for mode in ("cold", "warm"):
+                timings = _measure(setup, args.iterations, cold=mode == "cold")
+                print(
+                    f"{name:<10} {mode:<4} "
+                    f"p50={statistics.median(timings):8.3f}ms "
+                    f"p95={statistics.quantiles(timings, n=20)[-1]:8.3f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Helpers shared by the benchmarks: percentiles, peak memory, and saving and
+comparing JSON results.
+"""
+
+import json
+import math
+import resource
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+# Metrics where a larger value is an improvement; for all others smaller is
+# better
+HIGHER_IS_BETTER = ("per_second", "throughput", "capacity")
+# Metrics that describe the workload rather than its performance
+INFORMATIONAL = ("events_per_run",)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile, 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def save_results(path: str, results: dict[str, Any]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.1
+) -> list[dict[str, Any]]:
+    """Compare the metrics of two result files.
+
+    Args:
+        baseline: Results of the reference run
+        current: Results of the run under test
+        threshold: Relative change beyond which a worse value is a regression
+
+    Returns:
+        One row per metric present in both, with the relative change and
+        whether it is a regression
+    """
+    rows = []
+    for name, old in baseline.get("metrics", {}).items():
+        new = current.get("metrics", {}).get(name)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+            continue
+        change: Optional[float] = (new - old) / old if old else None
+        higher_is_better = any(marker in name for marker in HIGHER_IS_BETTER)
+        worse = (
+            name not in INFORMATIONAL
+            and change is not None
+            and (-change if higher_is_better else change) > threshold
+        )
+        rows.append(
+            {
+                "metric": name,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": worse,
+            }
+        )
+    return rows
+
+
+def format_comparison(rows: list[dict[str, Any]]) -> str:
+    lines = [f"{'metric':<28} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for row in rows:
+        change = "n/a" if row["change"] is None else f"{row['change']:+.1%}"
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['metric']:<28} {row['baseline']:>12.2f} "
+            f"{row['current']:>12.2f} {change:>9}{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,390 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Offline stand-ins for the LLMs and external services used by the workflows.
+
+ScriptedChatModel plays every agent of the research graph (coordinator,
+planner, researcher, coder and reporter) and the prose writer with canned
+responses, streamed at a configurable token rate after a configurable
+first-token latency. The tool stand-ins return canned search, crawl,
+retrieval and TTS results after a fixed latency. `offline_environment()`
+installs all of them, so the workflows run without network access.
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional, Type, get_args
+from unittest.mock import patch
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel
+
+_PLANNER_PROMPT_PREFIX = "You are a professional Deep Researcher"
+
+_tool_call_ids = itertools.count(1)
+
+_FILLER = (
+    "The evidence gathered so far points to steady growth across the sector, "
+    "driven by falling costs, wider adoption and supportive policy. "
+)
+
+
+def _tokens(text: str) -> list[str]:
+    """Split text into word-sized pieces that join back into the text."""
+    pieces = []
+    for index, word in enumerate(text.split(" ")):
+        pieces.append(word if index == 0 else f" {word}")
+    return pieces
+
+
+def _filler_text(tokens: int) -> str:
+    words = _FILLER.split()
+    return " ".join(words[i % len(words)] for i in range(tokens))
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model that plays the agents of the workflows."""
+
+    tokens_per_second: float = 200.0
+    first_token_latency: float = 0.2
+    research_steps: int = 1
+    processing_steps: int = 1
+    report_tokens: int = 400
+    answer_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    # Scripting
+
+    def _role(self, messages: list[BaseMessage], kwargs: dict[str, Any]) -> str:
+        tool_names = {tool["function"]["name"] for tool in kwargs.get("tools", [])}
+        if "handoff_to_planner" in tool_names:
+            return "coordinator"
+        if "python_repl_tool" in tool_names:
+            return "coder"
+        if tool_names:
+            return "researcher"
+        system = messages[0].content if messages else ""
+        if "response_format" in kwargs or (
+            isinstance(system, str) and system.startswith(_PLANNER_PROMPT_PREFIX)
+        ):
+            return "planner"
+        return "writer"
+
+    def _script(self, messages: list[BaseMessage], kwargs: dict[str, Any]) -> AIMessage:
+        role = self._role(messages, kwargs)
+        # Tool results since the agent was handed its task
+        tool_results = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, ToolMessage):
+                tool_results += 1
+
+        if role == "coordinator":
+            topic = messages[-1].content if messages else ""
+            return self._tool_call(
+                "handoff_to_planner", {"research_topic": topic, "locale": "en-US"}
+            )
+        if role == "planner":
+            return AIMessage(content=self._plan())
+        if role == "researcher":
+            # One call to each available tool, in this order, then the answer
+            tool_names = [tool["function"]["name"] for tool in kwargs["tools"]]
+            calls = [
+                (name, args)
+                for name, args in (
+                    ("local_search_tool", {"keywords": "market growth"}),
+                    ("web_search", {"query": "market growth"}),
+                    ("crawl_tool", {"url": "https://example.com/1"}),
+                )
+                if name in tool_names
+            ]
+            if tool_results < len(calls):
+                return self._tool_call(*calls[tool_results])
+            return AIMessage(content=_filler_text(self.answer_tokens))
+        if role == "coder" and tool_results == 0:
+            code = "import pandas as pd\nprint(pd.Series([1, 2, 3]).sum())"
+            return self._tool_call("python_repl_tool", {"code": code})
+        if role == "coder":
+            return AIMessage(content=_filler_text(self.answer_tokens))
+        return AIMessage(content=_filler_text(self.report_tokens))
+
+    def _plan(self) -> str:
+        steps = [
+            {
+                "need_search": True,
+                "title": f"Research aspect {i + 1}",
+                "description": "Collect data on the topic.",
+                "step_type": "research",
+            }
+            for i in range(self.research_steps)
+        ] + [
+            {
+                "need_search": False,
+                "title": f"Analyze data {i + 1}",
+                "description": "Compute summary statistics.",
+                "step_type": "processing",
+            }
+            for i in range(self.processing_steps)
+        ]
+        return json.dumps(
+            {
+                "locale": "en-US",
+                "has_enough_context": False,
+                "thought": "Plan the research.",
+                "title": "Research plan",
+                "steps": steps,
+            }
+        )
+
+    @staticmethod
+    def _tool_call(name: str, args: dict[str, Any]) -> AIMessage:
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {"name": name, "args": args, "id": f"call_{next(_tool_call_ids)}"}
+            ],
+        )
+
+    # Streaming
+
+    @staticmethod
+    def _usage(messages: list[BaseMessage], message: AIMessage) -> UsageMetadata:
+        input_tokens = sum(len(str(m.content).split()) for m in messages)
+        output_tokens = len(str(message.content).split()) or 1
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _chunks(
+        self, messages: list[BaseMessage], kwargs: dict[str, Any]
+    ) -> Iterator[tuple[float, AIMessageChunk]]:
+        """Yield (delay, chunk) pairs for the scripted response."""
+        message = self._script(messages, kwargs)
+        usage = self._usage(messages, message)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        if message.tool_calls:
+            yield self.first_token_latency, AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": call["name"],
+                        "args": json.dumps(call["args"]),
+                        "id": call["id"],
+                        "index": 0,
+                    }
+                    for call in message.tool_calls
+                ],
+                usage_metadata=usage,
+            )
+            return
+        tokens = _tokens(message.content)
+        for index, token in enumerate(tokens):
+            last = index == len(tokens) - 1
+            yield (
+                self.first_token_latency if index == 0 else delay,
+                AIMessageChunk(
+                    content=token,
+                    usage_metadata=usage if last else None,
+                    response_metadata={"finish_reason": "stop"} if last else {},
+                ),
+            )
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages, kwargs):
+            time.sleep(delay)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages, kwargs):
+            await asyncio.sleep(delay)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = None
+        for chunk in self._stream(messages, stop, run_manager, **kwargs):
+            message = chunk if message is None else message + chunk
+        return ChatResult(generations=[ChatGeneration(message=message.message)])
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        message = None
+        async for chunk in self._astream(messages, stop, run_manager, **kwargs):
+            message = chunk if message is None else message + chunk
+        return ChatResult(generations=[ChatGeneration(message=message.message)])
+
+
+class _QueryInput(BaseModel):
+    query: str
+
+
+class _UrlInput(BaseModel):
+    url: str
+
+
+class _KeywordsInput(BaseModel):
+    keywords: str
+
+
+class _DelayedTool(BaseTool):
+    latency: float = 0.05
+
+    def _result(self, value: str) -> Any:
+        raise NotImplementedError
+
+    # Called with the single argument positionally for a plain string input,
+    # and by name for a tool call
+    def _run(self, *args, run_manager=None, **kwargs) -> Any:
+        time.sleep(self.latency)
+        return self._result(*args, *kwargs.values())
+
+    async def _arun(self, *args, run_manager=None, **kwargs) -> Any:
+        await asyncio.sleep(self.latency)
+        return self._result(*args, *kwargs.values())
+
+
+class FakeSearchTool(_DelayedTool):
+    name: str = "web_search"
+    description: str = "Search the web."
+    args_schema: Type[BaseModel] = _QueryInput
+    max_results: int = 3
+
+    def _result(self, query: str) -> list[dict[str, str]]:
+        return [
+            {
+                "type": "page",
+                "title": f"Result {i + 1} for {query}",
+                "url": f"https://example.com/{i + 1}",
+                "content": _filler_text(60),
+            }
+            for i in range(self.max_results)
+        ]
+
+
+class FakeCrawlTool(_DelayedTool):
+    name: str = "crawl_tool"
+    description: str = "Crawl a url and get readable content in markdown format."
+    args_schema: Type[BaseModel] = _UrlInput
+
+    def _result(self, url: str) -> str:
+        return json.dumps({"url": url, "crawled_content": _filler_text(400)})
+
+
+class FakeRetrieverTool(_DelayedTool):
+    name: str = "local_search_tool"
+    description: str = "Retrieve information from the user's resource files."
+    args_schema: Type[BaseModel] = _KeywordsInput
+
+    def _result(self, keywords: str) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": "doc-1",
+                "title": f"Local notes on {keywords}",
+                "chunks": [{"content": _filler_text(80), "similarity": 0.9}],
+            }
+        ]
+
+
+class FakeTTS:
+    """Stand-in for VolcengineTTS that returns a short silent clip."""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.voice_type = "BV001_streaming"
+
+    def text_to_speech(self, text: str, **kwargs) -> dict[str, Any]:
+        time.sleep(self.latency)
+        return {
+            "success": True,
+            "response": {},
+            "audio_data": base64.b64encode(b"\x00" * 320).decode(),
+        }
+
+
+@contextmanager
+def offline_environment(
+    model: Optional[BaseChatModel] = None, tool_latency: float = 0.05
+) -> Iterator[BaseChatModel]:
+    """Run the workflows against the scripted model and tool stand-ins.
+
+    The model is installed for every LLM type, and the search, crawl,
+    retriever and TTS entry points used by the graphs are replaced.
+    """
+    from src.config.agents import LLMType
+    from src.config.reloader import current_config
+    from src.graph import nodes
+    from src.llms import llm
+    from src.podcast.graph import tts_node
+
+    model = model or ScriptedChatModel()
+    search_tool = FakeSearchTool(latency=tool_latency)
+    retriever_tool = FakeRetrieverTool(latency=tool_latency)
+    with ExitStack() as stack:
+        stack.enter_context(
+            patch.dict(
+                llm._llm_cache,
+                {
+                    (
+                        llm_type,
+                        llm._config_version(llm_type, current_config()),
+                        None,
+                    ): model
+                    for llm_type in get_args(LLMType)
+                },
+            )
+        )
+        stack.enter_context(
+            patch.object(nodes, "get_web_search_tool", lambda *_, **__: search_tool)
+        )
+        stack.enter_context(
+            patch.object(nodes, "LoggedTavilySearch", lambda **_: search_tool)
+        )
+        stack.enter_context(
+            patch.object(nodes, "crawl_tool", FakeCrawlTool(latency=tool_latency))
+        )
+        stack.enter_context(
+            patch.object(
+                nodes,
+                "get_retriever_tool",
+                lambda resources, *_: retriever_tool if resources else None,
+            )
+        )
+        stack.enter_context(
+            patch.object(
+                tts_node, "_create_tts_client", lambda: FakeTTS(latency=tool_latency)
+            )
+        )
+        yield model
@@ -0,0 +1,132 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Cold-start benchmark: how long importing the server takes.
+
+Imports a module (server.app by default) in fresh interpreters and reports
+the import time percentiles, the time to build the research graph on first
+use, and the packages that take the longest to import (from
+`python -X importtime`). Results can be saved and compared against a previous
+run, like the other benchmarks.
+
+Usage:
+    python -m benchmarks.import_time [--module server.app] [--runs 5]
+        [--top 15] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.common import (
+    compare_results,
+    format_comparison,
+    load_results,
+    percentile,
+    save_results,
+)
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# Print the seconds a statement takes, measured inside the child interpreter
+_TIMED = "import time; _t = time.perf_counter(); {}; print(time.perf_counter() - _t)"
+
+
+def _run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "GRAPH_WARMUP": "false"}
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def time_import(module: str) -> float:
+    """Seconds to import `module` in a fresh interpreter."""
+    result = _run_python(_TIMED.format(f"import {module}"))
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def time_graph_build() -> float:
+    """Seconds to build the research graph on first use, after import."""
+    result = _run_python(
+        "from server.routes import chat; " + _TIMED.format("chat.graph.get()")
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_packages(module: str, top: int) -> list[tuple[str, float]]:
+    """Top-level packages by their own import time, in milliseconds."""
+    result = _run_python(f"import {module}", "-X", "importtime")
+    totals: Counter = Counter()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            totals[match.group(4).split(".")[0]] += int(match.group(1))
+    return [(name, micros / 1000) for name, micros in totals.most_common(top)]
+
+
+def run_benchmark(module: str, runs: int) -> dict[str, float]:
+    imports = [time_import(module) * 1000 for _ in range(runs)]
+    builds = [time_graph_build() * 1000 for _ in range(runs)]
+    return {
+        "import_p50_ms": percentile(imports, 50),
+        "import_p95_ms": percentile(imports, 95),
+        "graph_build_p50_ms": percentile(builds, 50),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="server.app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare against this results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    metrics = run_benchmark(args.module, args.runs)
+    packages = slowest_packages(args.module, args.top)
+    results = {
+        "benchmark": "import_time",
+        "config": {"module": args.module, "runs": args.runs},
+        "metrics": metrics,
+        "slowest_packages_ms": dict(packages),
+    }
+    for name, value in metrics.items():
+        print(f"{name:<28} {value:12.2f}")
+    print()
+    print("Slowest packages to import (own time, ms):")
+    for name, value in packages:
+        print(f"  {name:<26} {value:12.1f}")
+    if args.output:
+        save_results(args.output, results)
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), results, args.threshold)
+        print()
+        print(format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
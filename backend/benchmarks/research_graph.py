@@ -0,0 +1,182 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+End-to-end benchmark of the research workflow, fully offline.
+
+Runs coordinator -> planner -> researcher/coder -> reporter through the same
+streaming path as /api/chat/stream (graph from build_graph_with_memory, SSE
+framing and chunk coalescing), with the scripted model and tool stand-ins
+from benchmarks.fakes. Reports latency and time-to-first-token percentiles,
+SSE events per second and peak RSS, and can compare the results against a
+previous run.
+
+Usage:
+    python -m benchmarks.research_graph [--runs 20] [--concurrency 4]
+        [--tokens-per-second 200] [--first-token-latency 0.2]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from benchmarks.common import (
+    compare_results,
+    format_comparison,
+    load_results,
+    peak_rss_mb,
+    percentile,
+    save_results,
+)
+from benchmarks.fakes import ScriptedChatModel, offline_environment
+from server.routes.chat import _astream_workflow_generator
+from src.config.report_style import ReportStyle
+from src.rag import Resource
+from src.sandbox import python_sandbox_pool
+
+QUERY = "How fast is the global market for home batteries growing?"
+RESOURCE = Resource(
+    uri="rag://dataset/home-batteries",
+    title="Home batteries",
+    description="Market notes",
+)
+
+
+async def run_once(thread_id: str, with_resources: bool = False) -> dict[str, Any]:
+    """Run one research workflow and time its SSE events."""
+    started = time.perf_counter()
+    first_token = None
+    events = 0
+    async for frame in _astream_workflow_generator(
+        messages=[{"role": "user", "content": QUERY}],
+        thread_id=thread_id,
+        resources=[RESOURCE] if with_resources else [],
+        max_plan_iterations=1,
+        max_step_num=3,
+        max_search_results=3,
+        auto_accepted_plan=True,
+        interrupt_feedback="",
+        mcp_settings={},
+        enable_background_investigation=True,
+        report_style=ReportStyle.ACADEMIC,
+        enable_deep_thinking=False,
+    ):
+        events += 1
+        if first_token is None and frame.startswith("event: message_chunk"):
+            if '"content"' in frame:
+                first_token = time.perf_counter() - started
+    return {
+        "latency": time.perf_counter() - started,
+        "ttft": first_token if first_token is not None else 0.0,
+        "events": events,
+    }
+
+
+async def run_benchmark(
+    runs: int, concurrency: int, warmup: int = 1, with_resources: bool = False
+) -> dict:
+    """Run the workflow `runs` times, `concurrency` at a time.
+
+    Returns:
+        The metrics of the measured runs. Peak RSS is that of this process;
+        the coder's sandbox workers are separate processes.
+    """
+    for _ in range(warmup):
+        await run_once(f"warmup-{uuid4()}", with_resources)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await run_once(str(uuid4()), with_resources)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(limited() for _ in range(runs)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [result["latency"] * 1000 for result in results]
+    ttfts = [result["ttft"] * 1000 for result in results]
+    events = sum(result["events"] for result in results)
+    return {
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "ttft_p50_ms": percentile(ttfts, 50),
+        "ttft_p95_ms": percentile(ttfts, 95),
+        "events_per_run": events / runs,
+        "events_per_second": events / elapsed,
+        "throughput_runs_per_second": runs / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--tool-latency", type=float, default=0.05)
+    parser.add_argument(
+        "--resources",
+        action="store_true",
+        help="Attach a RAG resource, so researchers also query the retriever",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare against this results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    model = ScriptedChatModel(
+        tokens_per_second=args.tokens_per_second,
+        first_token_latency=args.first_token_latency,
+    )
+    try:
+        with offline_environment(model, tool_latency=args.tool_latency):
+            metrics = asyncio.run(
+                run_benchmark(args.runs, args.concurrency, args.warmup, args.resources)
+            )
+    finally:
+        python_sandbox_pool.close()
+
+    results = {
+        "benchmark": "research_graph",
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare", "threshold")
+        },
+        "metrics": metrics,
+    }
+    for name, value in metrics.items():
+        print(f"{name:<28} {value:12.2f}")
+    if args.output:
+        save_results(args.output, results)
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), results, args.threshold)
+        print()
+        print(format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
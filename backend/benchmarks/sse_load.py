@@ -0,0 +1,486 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Load test of the SSE endpoints, with a capacity report per server worker.
+
+Starts the API under uvicorn with the scripted model and tool stand-ins from
+benchmarks.fakes (or targets a server that is already running with
+`--url`), then opens N concurrent streams against /api/chat/stream or
+/api/prose/generate for each concurrency level. For every level it reports
+the gap between consecutive events, time to first event, rejected (429) and
+dropped streams, slow streams (p95 event gap over the SLO), server CPU per
+event and server memory per open stream. The capacity of a worker is the highest level at which no
+stream was dropped or rejected and the p95 event gap stayed within the SLO.
+
+Usage:
+    python -m benchmarks.sse_load [--endpoint chat|prose]
+        [--concurrency 1,8,32] [--workers 1] [--slo-ms 500] [--warmup 1]
+        [--slow-clients 0.1] [--output report.json] [--compare old.json]
+
+To serve the offline app for another load generator:
+    uvicorn benchmarks.sse_load:create_offline_app --factory --port 8001
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.common import (
+    compare_results,
+    format_comparison,
+    load_results,
+    percentile,
+    save_results,
+)
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = {
+    "chat": (
+        "/api/chat/stream",
+        {
+            "messages": [{"role": "user", "content": "How big is the market?"}],
+            "thread_id": "__default__",
+            "auto_accepted_plan": True,
+            "max_plan_iterations": 1,
+            "max_step_num": 3,
+            "enable_background_investigation": True,
+        },
+    ),
+    "prose": (
+        "/api/prose/generate",
+        {"prompt": "Home batteries are", "option": "continue", "command": ""},
+    ),
+}
+
+# Keeps the offline environment installed for the lifetime of the server
+_offline = ExitStack()
+
+
+def create_offline_app():
+    """uvicorn app factory: the API backed by the scripted model.
+
+    The model is configured with SSE_LOAD_TOKENS_PER_SECOND,
+    SSE_LOAD_FIRST_TOKEN_LATENCY and SSE_LOAD_TOOL_LATENCY.
+    """
+    from benchmarks.fakes import ScriptedChatModel, offline_environment
+
+    model = ScriptedChatModel(
+        tokens_per_second=float(os.getenv("SSE_LOAD_TOKENS_PER_SECOND", "200")),
+        first_token_latency=float(os.getenv("SSE_LOAD_FIRST_TOKEN_LATENCY", "0.2")),
+    )
+    _offline.enter_context(
+        offline_environment(
+            model, tool_latency=float(os.getenv("SSE_LOAD_TOOL_LATENCY", "0.05"))
+        )
+    )
+    from server.app import app
+
+    return app
+
+
+# Server process statistics, read from /proc (Linux only)
+
+
+def _process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    index = 0
+    while index < len(pids):
+        current = pids[index]
+        index += 1
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def _tree_stats(pid: int) -> Optional[tuple[float, float]]:
+    """CPU seconds and RSS in MB of a process and its descendants."""
+    cpu = rss = 0.0
+    ticks = os.sysconf("SC_CLK_TCK")
+    page_mb = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    found = False
+    for child in _process_tree(pid):
+        try:
+            with open(f"/proc/{child}/stat") as f:
+                # The command name may contain spaces; fields follow the ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{child}/statm") as f:
+                rss += int(f.read().split()[1]) * page_mb
+        except (OSError, IndexError, ValueError):
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / ticks
+        found = True
+    return (cpu, rss) if found else None
+
+
+class _ServerMonitor:
+    """Samples the server's peak RSS while a level runs."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sample(self):
+        while True:
+            stats = _tree_stats(self.pid)
+            if stats:
+                self.peak_rss = max(self.peak_rss, stats[1])
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> Optional[tuple[float, float]]:
+        if self.pid is None:
+            return None
+        baseline = _tree_stats(self.pid)
+        self._task = asyncio.create_task(self._sample())
+        return baseline
+
+    async def stop(self) -> Optional[tuple[float, float]]:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return _tree_stats(self.pid)
+
+
+# Clients
+
+
+@dataclass
+class StreamResult:
+    status: Optional[int] = None
+    events: int = 0
+    first_event: Optional[float] = None
+    gaps: list[float] = field(default_factory=list)
+    error: Optional[str] = None
+    slow_client: bool = False
+
+
+async def consume_stream(
+    client: httpx.AsyncClient, endpoint: str, slow_delay: float = 0
+) -> StreamResult:
+    """Open one stream and time its events.
+
+    Args:
+        client: Client bound to the server's base URL
+        endpoint: "chat" or "prose"
+        slow_delay: Seconds to pause after every event, to act as a slow
+            consumer
+    """
+    path, body = ENDPOINTS[endpoint]
+    result = StreamResult(slow_client=slow_delay > 0)
+    started = last = time.perf_counter()
+    try:
+        async with client.stream("POST", path, json=body) as response:
+            result.status = response.status_code
+            if response.status_code != 200:
+                await response.aread()
+                return result
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                now = time.perf_counter()
+                if result.first_event is None:
+                    result.first_event = now - started
+                else:
+                    result.gaps.append(now - last)
+                last = now
+                result.events += 1
+                if slow_delay:
+                    await asyncio.sleep(slow_delay)
+    except httpx.HTTPError as e:
+        result.error = repr(e)
+    return result
+
+
+async def run_level(
+    base_url: str,
+    endpoint: str,
+    concurrency: int,
+    streams_per_client: int = 1,
+    slow_clients: float = 0,
+    slow_delay: float = 0.05,
+    slo_ms: float = 500,
+    server_pid: Optional[int] = None,
+    timeout: float = 300,
+) -> dict[str, Any]:
+    """Run `concurrency` clients that each open `streams_per_client` streams."""
+    slow_count = int(concurrency * slow_clients)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+    monitor = _ServerMonitor(server_pid)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=timeout, limits=limits
+    ) as client:
+
+        async def run_client(index: int) -> list[StreamResult]:
+            delay = slow_delay if index < slow_count else 0
+            return [
+                await consume_stream(client, endpoint, delay)
+                for _ in range(streams_per_client)
+            ]
+
+        before = monitor.start()
+        started = time.perf_counter()
+        results = [
+            result
+            for client_results in await asyncio.gather(
+                *(run_client(index) for index in range(concurrency))
+            )
+            for result in client_results
+        ]
+        elapsed = time.perf_counter() - started
+        after = await monitor.stop()
+
+    # Slow clients throttle their own streams; judge the server on the others
+    normal = [r for r in results if not r.slow_client]
+    gaps = [gap * 1000 for r in normal for gap in r.gaps]
+    first_events = [r.first_event * 1000 for r in normal if r.first_event is not None]
+    events = sum(r.events for r in results)
+    rejected = sum(1 for r in results if r.status == 429)
+    dropped = sum(1 for r in results if r.error or (r.status not in (None, 200, 429)))
+    slow_streams = sum(
+        1 for r in normal if r.gaps and percentile(r.gaps, 95) * 1000 > slo_ms
+    )
+
+    level = {
+        "concurrency": concurrency,
+        "streams": len(results),
+        "events": events,
+        "events_per_second": events / elapsed,
+        "event_gap_p50_ms": percentile(gaps, 50),
+        "event_gap_p95_ms": percentile(gaps, 95),
+        "event_gap_p99_ms": percentile(gaps, 99),
+        "first_event_p50_ms": percentile(first_events, 50),
+        "first_event_p95_ms": percentile(first_events, 95),
+        "rejected": rejected,
+        "dropped": dropped,
+        "slow_streams": slow_streams,
+    }
+    if before and after:
+        level["cpu_ms_per_event"] = (after[0] - before[0]) * 1000 / max(events, 1)
+        level["rss_mb_per_stream"] = max(0.0, monitor.peak_rss - before[1]) / (
+            concurrency
+        )
+        level["peak_rss_mb"] = monitor.peak_rss
+    level["within_slo"] = (
+        rejected == 0 and dropped == 0 and level["event_gap_p95_ms"] <= slo_ms
+    )
+    return level
+
+
+def capacity_report(levels: list[dict[str, Any]], workers: int) -> dict[str, Any]:
+    """Summarize the levels into the capacity of one worker."""
+    passing = [level for level in levels if level["within_slo"]]
+    capacity = max((level["concurrency"] for level in passing), default=0)
+    top = max(passing or levels, key=lambda level: level["concurrency"])
+    metrics = {
+        "capacity_streams_per_worker": capacity / workers,
+        "events_per_second": top["events_per_second"],
+        "event_gap_p95_ms": top["event_gap_p95_ms"],
+        "first_event_p95_ms": top["first_event_p95_ms"],
+    }
+    for name in ("cpu_ms_per_event", "rss_mb_per_stream"):
+        if name in top:
+            metrics[name] = top[name]
+    return metrics
+
+
+# Server
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_offline_server(
+    port: int, workers: int, tokens_per_second: float, first_token_latency: float
+) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "SSE_LOAD_TOKENS_PER_SECOND": str(tokens_per_second),
+        "SSE_LOAD_FIRST_TOKEN_LATENCY": str(first_token_latency),
+        "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY", "benchmark"),
+        # Measure the server, not the admission limits
+        "ADMISSION_MAX_CONCURRENT": os.getenv("ADMISSION_MAX_CONCURRENT", "0"),
+        "ADMISSION_MAX_CONCURRENT_PER_USER": os.getenv(
+            "ADMISSION_MAX_CONCURRENT_PER_USER", "0"
+        ),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "benchmarks.sse_load:create_offline_app",
+            "--factory",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def wait_until_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get("/api/admission/stats")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Server at {base_url} did not start in {timeout}s")
+
+
+async def run_load_test(args) -> dict[str, Any]:
+    server = None
+    base_url = args.url
+    server_pid = args.server_pid
+    if base_url is None:
+        port = _free_port()
+        server = start_offline_server(
+            port, args.workers, args.tokens_per_second, args.first_token_latency
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        server_pid = server.pid
+    try:
+        await wait_until_ready(base_url)
+        # The first stream pays for one-off setup (e.g. sandbox workers)
+        async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+            for _ in range(args.warmup):
+                await consume_stream(client, args.endpoint)
+        levels = []
+        for concurrency in args.concurrency:
+            level = await run_level(
+                base_url,
+                args.endpoint,
+                concurrency,
+                streams_per_client=args.streams_per_client,
+                slow_clients=args.slow_clients,
+                slow_delay=args.slow_delay,
+                slo_ms=args.slo_ms,
+                server_pid=server_pid,
+            )
+            levels.append(level)
+            _print_level(level)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    return {
+        "benchmark": f"sse_load_{args.endpoint}",
+        "config": {
+            "endpoint": args.endpoint,
+            "workers": args.workers,
+            "slo_ms": args.slo_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "first_token_latency": args.first_token_latency,
+        },
+        "levels": levels,
+        "metrics": capacity_report(levels, args.workers),
+    }
+
+
+def _print_level(level: dict[str, Any]) -> None:
+    line = (
+        f"c={level['concurrency']:<4} events/s={level['events_per_second']:8.1f} "
+        f"gap p95={level['event_gap_p95_ms']:7.1f}ms "
+        f"first p95={level['first_event_p95_ms']:7.1f}ms "
+        f"rejected={level['rejected']} dropped={level['dropped']} "
+        f"slow={level['slow_streams']}"
+    )
+    if "cpu_ms_per_event" in level:
+        line += (
+            f" cpu/event={level['cpu_ms_per_event']:.2f}ms"
+            f" rss/stream={level['rss_mb_per_stream']:.2f}MB"
+        )
+    print(line + ("" if level["within_slo"] else "  OVER SLO"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 8, 32],
+        help="Comma-separated numbers of concurrent clients",
+    )
+    parser.add_argument("--streams-per-client", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--slo-ms", type=float, default=500)
+    parser.add_argument(
+        "--slow-clients",
+        type=float,
+        default=0,
+        help="Fraction of clients that read slowly",
+    )
+    parser.add_argument("--slow-delay", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--url", help="Target a running server instead")
+    parser.add_argument(
+        "--server-pid", type=int, help="PID of the --url server, for CPU and memory"
+    )
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Compare against this report")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_load_test(args))
+    print()
+    for name, value in report["metrics"].items():
+        print(f"{name:<28} {value:12.2f}")
+    if args.output:
+        save_results(args.output, report)
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), report, args.threshold)
+        print()
+        print(format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
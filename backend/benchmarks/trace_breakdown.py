@@ -0,0 +1,121 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Latency breakdown of research runs from exported traces.
+
+Reads the OTLP JSON lines written with TRACING_EXPORTER=file and prints, for
+each run (a `chat.stream` root span), its duration and the time spent in
+nodes, tools, LLM calls and outbound HTTP requests per host. Spans of the
+same category can overlap (e.g. parallel tool calls), so their sums may
+exceed the run's duration.
+
+Usage:
+    python -m benchmarks.trace_breakdown [data/traces/spans.jsonl]
+        [--thread-id THREAD_ID]
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.tracing import TRACING_FILE
+
+
+def _attribute(span: dict[str, Any], key: str) -> Any:
+    for attribute in span.get("attributes", []):
+        if attribute["key"] == key:
+            return next(iter(attribute["value"].values()))
+    return None
+
+
+def _duration_ms(span: dict[str, Any]) -> float:
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def load_spans(lines: Iterable[str]) -> list[dict[str, Any]]:
+    """Flatten OTLP export requests into a list of spans."""
+    spans = []
+    for line in lines:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        for resource_spans in request.get("resourceSpans", []):
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                spans.extend(scope_spans.get("spans", []))
+    return spans
+
+
+def category(span: dict[str, Any]) -> str:
+    """The breakdown row a span is counted in, e.g. "tool web_search"."""
+    name = span["name"]
+    if name.startswith("HTTP "):
+        return f"http {_attribute(span, 'server.address')}"
+    if name.startswith("llm "):
+        return f"llm {_attribute(span, 'deerflow.agent')}"
+    return name
+
+
+def breakdown(spans: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Group spans by run and sum their durations per category.
+
+    Returns:
+        One entry per run, ordered by start time, with its thread ID, duration
+        and per-category time in milliseconds
+    """
+    by_trace: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for span in spans:
+        by_trace[span["traceId"]].append(span)
+
+    runs = []
+    for trace_spans in by_trace.values():
+        root = next(
+            (
+                span
+                for span in trace_spans
+                if "parentSpanId" not in span and span["name"] == "chat.stream"
+            ),
+            None,
+        )
+        if root is None:
+            continue
+        categories: dict[str, float] = defaultdict(float)
+        for span in trace_spans:
+            if span is not root:
+                categories[category(span)] += _duration_ms(span)
+        runs.append(
+            {
+                "thread_id": _attribute(root, "thread_id"),
+                "start": int(root["startTimeUnixNano"]),
+                "duration_ms": _duration_ms(root),
+                "categories": dict(
+                    sorted(categories.items(), key=lambda item: -item[1])
+                ),
+            }
+        )
+    return sorted(runs, key=lambda run: run["start"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", nargs="?", default=TRACING_FILE)
+    parser.add_argument("--thread-id", help="Only show runs of this thread")
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as f:
+        runs = breakdown(load_spans(f))
+    for run in runs:
+        if args.thread_id and run["thread_id"] != args.thread_id:
+            continue
+        print(f"thread {run['thread_id']}  {run['duration_ms']:.0f} ms")
+        for name, duration in run["categories"].items():
+            print(f"  {name:<40} {duration:10.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,40 +6,44 @@ Server script for running the DeerFlow API.
 """
 
 import argparse
+import importlib.util
 import logging
-import signal
 import sys
 import uvicorn
 import os
-import sys
 from pathlib import Path
 
+from src.utils.log_utils import install_queue_logging
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
+# Write log records on a background thread, off the request path
+if os.getenv("LOG_QUEUE", "true").lower() == "true":
+    install_queue_logging()
 
 logger = logging.getLogger(__name__)
 
 
-def handle_shutdown(signum, frame):
-    """Handle graceful shutdown on SIGTERM/SIGINT"""
-    logger.info("Received shutdown signal. Starting graceful shutdown...")
-    sys.exit(0)
+# SIGTERM and SIGINT are handled by uvicorn, which stops accepting connections
+# and waits for the open ones while the app drains its runs (see server.app)
+
 
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
 
-# Register signal handlers
-signal.signal(signal.SIGTERM, handle_shutdown)
-signal.signal(signal.SIGINT, handle_shutdown)
 
 if __name__ == "__main__":
     current_dir = str(Path(__file__).parent.resolve())
     if current_dir not in sys.path:
         sys.path.insert(0, current_dir)
-    
+
     # Also set PYTHONPATH environment variable for subprocesses
-    os.environ["PYTHONPATH"] = current_dir + os.pathsep + os.environ.get("PYTHONPATH", "")
+    os.environ["PYTHONPATH"] = (
+        current_dir + os.pathsep + os.environ.get("PYTHONPATH", "")
+    )
 
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Run the DeerFlow API server")
@@ -60,6 +64,39 @@ if __name__ == "__main__":
         default=8000,
         help="Port to bind the server to (default: 8000)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SERVER_WORKERS", "1")),
+        help=(
+            "Number of worker processes (default: 1). Event replay buffers are "
+            "per worker: resuming a stream with Last-Event-ID or following a "
+            "job with /api/jobs/{id}/stream only works on the worker running "
+            "it, which uvicorn's shared socket does not guarantee. For "
+            "resumable streams run one worker per port behind a load balancer "
+            "that routes each thread to the same one."
+        ),
+    )
+    parser.add_argument(
+        "--loop",
+        type=str,
+        default="auto",
+        choices=["auto", "asyncio", "uvloop"],
+        help="Event loop; auto uses uvloop when installed (default: auto)",
+    )
+    parser.add_argument(
+        "--http",
+        type=str,
+        default="auto",
+        choices=["auto", "h11", "httptools"],
+        help="HTTP parser; auto uses httptools when installed (default: auto)",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")),
+        help="Seconds to wait for open streams on shutdown (default: 30)",
+    )
     parser.add_argument(
         "--log-level",
         type=str,
@@ -74,14 +111,60 @@ if __name__ == "__main__":
     reload = False
     if args.reload:
         reload = True
+    if reload and args.workers > 1:
+        parser.error("--reload and --workers are mutually exclusive")
+    for option, module in (("loop", "uvloop"), ("http", "httptools")):
+        if getattr(args, option) == module and not _available(module):
+            parser.error(f"--{option} {module} requires the {module} package")
+
+    # Read here rather than from src.graph.checkpoint, which would load the
+    # whole graph package into the supervisor process
+    checkpointer = os.getenv("CHECKPOINTER", "memory").lower()
+    if args.workers > 1:
+        logger.warning(
+            f"Running {args.workers} workers: event replay buffers are per "
+            "worker, so reconnects with Last-Event-ID and job streams fail "
+            "when they reach another worker than the one running the stream. "
+            "Use one worker per port with sticky routing if clients need to "
+            "resume streams."
+        )
+    metrics_dir = os.getenv("METRICS_MULTIPROC_DIR", "")
+    if metrics_dir:
+        # Values of the workers of a previous server would be added to ours
+        for path in Path(metrics_dir).glob("*.json"):
+            path.unlink(missing_ok=True)
+    elif args.workers > 1:
+        logger.warning(
+            f"Running {args.workers} workers without METRICS_MULTIPROC_DIR: "
+            "/metrics reports the values of whichever worker serves the scrape."
+        )
+    if args.workers > 1 and checkpointer == "memory":
+        logger.warning(
+            f"Running {args.workers} workers with CHECKPOINTER=memory: "
+            "thread state is private to each worker, so interrupted plans can "
+            "only be resumed on the worker that started them. Set CHECKPOINTER "
+            "to sqlite or postgres to share it."
+        )
+
+    # Read by the workers, which cannot tell how many of them there are
+    os.environ["SERVER_WORKERS"] = str(args.workers)
 
     try:
-        logger.info(f"Starting DeerFlow API server on {args.host}:{args.port}")
+        logger.info(
+            f"Starting DeerFlow API server on {args.host}:{args.port} with "
+            f"{args.workers} worker(s), uvloop "
+            f"{'available' if _available('uvloop') else 'not installed'}, "
+            f"httptools {'available' if _available('httptools') else 'not installed'}"
+        )
         uvicorn.run(
             "server:app",
             host=args.host,
             port=args.port,
             reload=reload,
+            workers=args.workers,
+            loop=args.loop,
+            http=args.http,
+            timeout_graceful_shutdown=args.graceful_timeout,
             log_level=args.log_level,
         )
     except Exception as e:
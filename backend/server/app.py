@@ -1,22 +1,99 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import logging
+import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import routers
-from server.routes import audio, chat, config, generation, mcp, research, tools, users
+from server.middleware.admission import AdmissionControlMiddleware
+from server.lifecycle import lifecycle
+from src.config.reloader import config_reloader
+from src.graph.checkpoint import close_checkpointer, is_durable, setup_checkpointer
+from src.services.appwrite_service import appwrite_service
+from src.sandbox import python_sandbox_pool
+from src.tools.mcp_pool import mcp_session_pool
+from src.utils.metrics import (
+    METRICS_MULTIPROC_DIR,
+    METRICS_SNAPSHOT_FILE,
+    registry,
+)
+from src.utils.tracing import instrument_http, tracer
+from server.routes import (
+    admission,
+    audio,
+    chat,
+    config,
+    generation,
+    jobs,
+    mcp,
+    metrics,
+    research,
+    tools,
+    users,
+)
 
 logger = logging.getLogger(__name__)
 
+# Build the research graph in the background right after startup, instead of
+# on the first chat request
+GRAPH_WARMUP = os.getenv("GRAPH_WARMUP", "true").lower() == "true"
+
+# Runs cancelled by the shutdown can be resumed if their checkpoints outlive
+# the process; their jobs are requeued then
+lifecycle.on_drain(lambda: jobs.job_queue.stop(requeue_interrupted=is_durable()))
+lifecycle.on_shutdown("config watcher", config_reloader.stop_watching)
+# Thread state first, so it is kept even if a later step runs out of time
+lifecycle.on_shutdown("checkpointer", close_checkpointer)
+lifecycle.on_shutdown("job records", jobs.job_queue.close)
+lifecycle.on_shutdown("user config writes", appwrite_service.flush)
+lifecycle.on_shutdown("MCP sessions", mcp_session_pool.close_all)
+lifecycle.on_shutdown("Python sandbox", python_sandbox_pool.close)
+if METRICS_SNAPSHOT_FILE:
+    lifecycle.on_shutdown("metrics", lambda: registry.write(METRICS_SNAPSHOT_FILE))
+if METRICS_MULTIPROC_DIR:
+    lifecycle.on_shutdown("shared metrics", registry.stop_sharing)
+lifecycle.on_shutdown("traces", tracer.flush)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect the shared checkpointer (if configured) before any run starts
+    await setup_checkpointer()
+    # Pick up background jobs persisted by a previous server process
+    jobs.job_queue.restore()
+    # Start the coder's sandbox workers so they are warm by the first step
+    python_sandbox_pool.start()
+    if tracer.enabled:
+        instrument_http()
+    if GRAPH_WARMUP:
+        asyncio.get_running_loop().run_in_executor(None, chat.warm_up)
+    # Pick up changes of conf.yaml and .env without a restart
+    config_reloader.start_watching()
+    # Let a scrape of any worker report the values of all of them
+    if METRICS_MULTIPROC_DIR:
+        registry.share(METRICS_MULTIPROC_DIR)
+    # Begin draining runs as soon as uvicorn is signalled to stop
+    lifecycle.drain_on_signal()
+    yield
+    await lifecycle.shutdown()
+
+
 app = FastAPI(
     title="DeerFlow API",
     description="API for Deer",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Limit concurrency and rate of expensive endpoints. Added before CORS so that
+# rejections still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +105,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(chat.router)
+app.include_router(jobs.router)
 app.include_router(audio.router)
 app.include_router(generation.router)
 app.include_router(mcp.router)
@@ -35,3 +113,5 @@ app.include_router(config.router)
 app.include_router(research.router)
 app.include_router(tools.router)
 app.include_router(users.router)
+app.include_router(admission.router)
+app.include_router(metrics.router)
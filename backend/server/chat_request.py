@@ -1,7 +1,7 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -45,7 +45,7 @@ class ChatRequest(BaseModel):
         3, description="The maximum number of steps in a plan"
     )
     max_search_results: Optional[int] = Field(
-        3, description="The maximum number of search results"
+        3, ge=1, le=50, description="The maximum number of search results"
     )
     auto_accepted_plan: Optional[bool] = Field(
         False, description="Whether to automatically accept the plan"
@@ -65,6 +65,24 @@ class ChatRequest(BaseModel):
     enable_deep_thinking: Optional[bool] = Field(
         False, description="Whether to enable deep thinking"
     )
+    resume: Optional[bool] = Field(
+        False, description="Whether to resume a cancelled run from its checkpoint"
+    )
+    search_engine: Optional[str] = Field(
+        None,
+        description="The search engine of the run; defaults to the user's "
+        "preference, then to the server's",
+    )
+    rag_provider: Optional[str] = Field(
+        None,
+        description="The RAG provider of the run; defaults to the user's "
+        "preference, then to the server's",
+    )
+    models: Optional[Dict[str, str]] = Field(
+        None,
+        description="The model per LLM type, e.g. {'basic': 'gpt-4o'}; one of "
+        "the configured models of the type",
+    )
 
 
 class TTSRequest(BaseModel):
@@ -0,0 +1,151 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Per-thread replay buffers for server-sent events.
+
+Every event emitted by a workflow run is stored in a bounded ring buffer
+with a monotonically increasing ID, so a client that lost its connection can
+reconnect with `Last-Event-ID` and receive only what it missed plus the live
+tail, without the workflow being run again.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer:
+    """Bounded ring buffer of SSE frames for a single thread."""
+
+    def __init__(
+        self,
+        thread_id: str,
+        max_events: int,
+        max_bytes: int,
+        start_id: int = 0,
+        owner: Optional[str] = None,
+    ):
+        self.thread_id = thread_id
+        # The user whose run writes the events; only they may replay them
+        self.owner = owner
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        # ID of the last event emitted before this buffer was created
+        self.start_id = start_id
+        self.last_id = start_id
+        self.closed = False
+        self.closed_at: Optional[float] = None
+        self._events: deque[tuple[int, str]] = deque()
+        self._bytes = 0
+        self._changed = asyncio.Event()
+
+    def append(self, frame: str) -> int:
+        """Store an SSE frame, prefixing it with its event ID.
+
+        Returns:
+            The ID assigned to the event
+        """
+        self.last_id += 1
+        framed = f"id: {self.last_id}\n{frame}"
+        self._events.append((self.last_id, framed))
+        self._bytes += len(framed)
+        # Always keep the newest event, even if it exceeds the byte budget
+        while len(self._events) > 1 and (
+            len(self._events) > self.max_events or self._bytes > self.max_bytes
+        ):
+            _, dropped = self._events.popleft()
+            self._bytes -= len(dropped)
+        self._notify()
+        return self.last_id
+
+    def close(self) -> None:
+        """Mark the stream as finished. Waiting readers are woken up."""
+        if not self.closed:
+            self.closed = True
+            self.closed_at = time.monotonic()
+            self._notify()
+
+    def events_after(self, last_event_id: int) -> list[tuple[int, str]]:
+        """Return the buffered (id, frame) pairs newer than last_event_id."""
+        if self._events and last_event_id < self._events[0][0] - 1:
+            logger.warning(
+                f"Events {last_event_id + 1}-{self._events[0][0] - 1} of thread "
+                f"{self.thread_id} were evicted and cannot be replayed"
+            )
+        return [(i, frame) for i, frame in self._events if i > last_event_id]
+
+    async def wait_for_events(self, last_event_id: int, timeout: float) -> None:
+        """Wait until there are events after last_event_id, the stream closes,
+        or the timeout elapses."""
+        if self.last_id > last_event_id or self.closed:
+            return
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class EventBufferRegistry:
+    """Keeps one EventBuffer per thread and evicts finished ones over time."""
+
+    def __init__(
+        self,
+        max_events: int = 5000,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl_seconds: float = 600,
+        max_threads: int = 1000,
+    ):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self._buffers: OrderedDict[str, EventBuffer] = OrderedDict()
+
+    def create(self, thread_id: str, owner: Optional[str] = None) -> EventBuffer:
+        """Create a fresh buffer for a new run of the thread by `owner`.
+
+        Event IDs continue from the previous run of the same thread so they
+        stay monotonic for the lifetime of the thread.
+        """
+        previous = self._buffers.pop(thread_id, None)
+        buffer = EventBuffer(
+            thread_id,
+            self.max_events,
+            self.max_bytes,
+            start_id=previous.last_id if previous else 0,
+            owner=owner,
+        )
+        self._buffers[thread_id] = buffer
+        self.evict_expired()
+        return buffer
+
+    def get(self, thread_id: str) -> Optional[EventBuffer]:
+        self.evict_expired()
+        return self._buffers.get(thread_id)
+
+    def evict_expired(self) -> None:
+        """Drop finished buffers older than the TTL, then the oldest finished
+        buffers while the registry is over capacity."""
+        now = time.monotonic()
+        for thread_id, buffer in list(self._buffers.items()):
+            if buffer.closed and now - buffer.closed_at > self.ttl_seconds:
+                del self._buffers[thread_id]
+        if len(self._buffers) > self.max_threads:
+            for thread_id, buffer in list(self._buffers.items()):
+                if len(self._buffers) <= self.max_threads:
+                    break
+                if buffer.closed:
+                    del self._buffers[thread_id]
+
+    def __len__(self) -> int:
+        return len(self._buffers)
@@ -0,0 +1,469 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Local job queue for long-running research runs.
+
+Jobs are dispatched to a bounded number of concurrent runs. Among users with
+queued jobs, the one with the fewest running jobs goes first, and within a
+user higher priority and then earlier submission wins. Job records are
+persisted as JSON files so status and results survive restarts.
+
+With several server workers each worker runs the jobs submitted to it, and
+the records are shared through the job store directory. Each job records the
+worker that owns it, and workers keep a heartbeat file in the store fresh.
+Queued and running jobs are only taken over (restored) once their owner's
+heartbeat is older than JOB_HEARTBEAT_TIMEOUT, i.e. the worker is gone, so a
+worker that is respawned next to live ones leaves their jobs alone.
+
+Finished jobs are kept for JOB_RETENTION_SECONDS, and at most JOB_MAX_FINISHED
+of them (in memory and on disk); older ones are forgotten.
+"""
+
+import asyncio
+import enum
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# How long finished jobs (and their reports) are kept, and how many at most
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+JOB_MAX_FINISHED = int(os.getenv("JOB_MAX_FINISHED", "1000"))
+
+# How often (in seconds) workers refresh their heartbeat and look for jobs of
+# workers that are gone, and after how long without a heartbeat they are
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "60"))
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted to a queue that is at capacity."""
+
+
+@dataclass
+class Job:
+    job_id: str
+    user_id: str
+    thread_id: str
+    request: dict[str, Any]
+    priority: int = 0
+    status: JobStatus = JobStatus.QUEUED
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    final_report: Optional[str] = None
+    error: Optional[str] = None
+    # Continue from the thread's last checkpoint, e.g. after a shutdown
+    resume: bool = False
+    # The worker running the job, see JobQueue.worker_id
+    owner: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Job":
+        return cls(**{**data, "status": JobStatus(data["status"])})
+
+
+class JobStore:
+    """Persists job records as one JSON file per job."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def heartbeat(self, worker_id: str) -> None:
+        """Mark a worker as alive."""
+        path = self.directory / "workers" / worker_id
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def remove_heartbeat(self, worker_id: str) -> None:
+        (self.directory / "workers" / worker_id).unlink(missing_ok=True)
+
+    def is_alive(self, worker_id: Optional[str], timeout: float) -> bool:
+        """Whether the worker's heartbeat is younger than `timeout` seconds."""
+        if not worker_id:
+            return False
+        try:
+            mtime = (self.directory / "workers" / worker_id).stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return time.time() - mtime < timeout
+
+    def claim_orphans(self, worker_id: str, timeout: float) -> list[Job]:
+        """Take over the queued and running jobs of workers that are gone.
+
+        Running jobs are marked as failed, since their runs died with their
+        worker. Claims are made under a lock, so a job is claimed only once.
+
+        Returns:
+            The claimed jobs
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            claimed = []
+            for job in self.load_all():
+                if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+                    continue
+                if job.owner == worker_id or self.is_alive(job.owner, timeout):
+                    continue
+                if job.status == JobStatus.RUNNING:
+                    job.status = JobStatus.FAILED
+                    job.error = "Interrupted by server restart"
+                    job.finished_at = datetime.now().isoformat()
+                job.owner = worker_id
+                self.save(job)
+                claimed.append(job)
+            return claimed
+
+    def save(self, job: Job) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{job.job_id}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> Optional[Job]:
+        path = self.directory / f"{job_id}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return Job.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Skipping unreadable job record {path}: {e}")
+            return None
+
+    def delete(self, job_id: str) -> None:
+        (self.directory / f"{job_id}.json").unlink(missing_ok=True)
+
+    def prune(self, retention_seconds: float, max_finished: int) -> int:
+        """Delete the records of finished jobs that are expired or beyond the
+        newest `max_finished`.
+
+        Returns:
+            The number of records deleted
+        """
+        finished = [job for job in self.load_all() if job.status in FINISHED_STATUSES]
+        expired = _expired_jobs(finished, retention_seconds, max_finished)
+        for job in expired:
+            self.delete(job.job_id)
+        return len(expired)
+
+    def load_all(self) -> list[Job]:
+        if not self.directory.exists():
+            return []
+        jobs = []
+        for path in self.directory.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    jobs.append(Job.from_dict(json.load(f)))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable job record {path}: {e}")
+        return jobs
+
+
+def _expired_jobs(
+    finished: list[Job], retention_seconds: float, max_finished: int
+) -> list[Job]:
+    """The finished jobs older than the retention period or beyond the newest
+    `max_finished`."""
+    finished = sorted(finished, key=lambda job: job.finished_at or "", reverse=True)
+    cutoff = (datetime.now() - timedelta(seconds=retention_seconds)).isoformat()
+    return [
+        job
+        for i, job in enumerate(finished)
+        if i >= max_finished or (job.finished_at or "") < cutoff
+    ]
+
+
+class JobQueue:
+    """Bounded-concurrency job queue with priorities and per-user fair share.
+
+    Job records are written to the store by a background thread, in order,
+    so the event loop never waits for the disk.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[Job], Awaitable[Optional[str]]],
+        store: JobStore,
+        max_concurrency: int = 4,
+        max_queued: int = 1000,
+        retention_seconds: float = JOB_RETENTION_SECONDS,
+        max_finished: int = JOB_MAX_FINISHED,
+    ):
+        """
+        Args:
+            run_job: Coroutine function that runs a job and returns its final report
+            store: Where job records are persisted
+            max_concurrency: Maximum number of jobs running at once
+            max_queued: Maximum number of jobs waiting to run
+            retention_seconds: How long finished jobs are kept
+            max_finished: Maximum number of finished jobs kept
+        """
+        self.run_job = run_job
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        # Identifies this process as the owner of its jobs; unlike a PID it is
+        # never reused
+        self.worker_id = uuid.uuid4().hex
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._jobs: dict[str, Job] = {}
+        self._queued: dict[str, list[tuple[int, int, str]]] = {}
+        self._running: dict[str, asyncio.Task] = {}
+        self._running_by_user: dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._stopped = False
+        self._requeue_interrupted = False
+        # One thread, so records are written in order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self._last_write: Optional[asyncio.Future] = None
+
+    def restore(self) -> None:
+        """Take over the persisted jobs of workers that are gone, e.g. of this
+        server before a restart, and keep doing so periodically. Queued jobs
+        are requeued; jobs that were running are marked as failed."""
+        self.store.heartbeat(self.worker_id)
+        self._adopt(self.store.claim_orphans(self.worker_id, JOB_HEARTBEAT_TIMEOUT))
+        # Also the records of finished jobs of other workers
+        self._write(self.store.prune, self.retention_seconds, self.max_finished)
+        self._dispatch()
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.get_running_loop().create_task(
+                self._keep_alive()
+            )
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, self.worker_id)
+                if self._stopped:
+                    continue
+                claimed = await asyncio.to_thread(
+                    self.store.claim_orphans, self.worker_id, JOB_HEARTBEAT_TIMEOUT
+                )
+            except Exception as e:
+                logger.warning(f"Failed to update the job store: {e}")
+                continue
+            if claimed:
+                logger.info(f"Took over {len(claimed)} job(s) of stopped workers")
+                self._adopt(claimed)
+                self._dispatch()
+
+    def _adopt(self, jobs: list[Job]) -> None:
+        for job in jobs:
+            if job.job_id in self._jobs:
+                continue
+            self._jobs[job.job_id] = job
+            if job.status == JobStatus.QUEUED:
+                self._enqueue(job)
+        self._forget_expired()
+
+    def submit(self, job: Job) -> Job:
+        if self.queued_count() >= self.max_queued:
+            raise QueueFullError("Job queue is full")
+        job.owner = self.worker_id
+        self._jobs[job.job_id] = job
+        self._save(job)
+        self._enqueue(job)
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            # A job of another worker; its last persisted state
+            job = self.store.load(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Only the worker running a job can cancel it
+            return self.get(job_id)
+        if job.status in FINISHED_STATUSES:
+            return job
+        if job.job_id in self._running:
+            # The run's done callback records the final status
+            self._running[job.job_id].cancel()
+        else:
+            self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    def stop(self, requeue_interrupted: bool = False) -> None:
+        """Stop starting jobs, e.g. when the server shuts down. Queued jobs stay
+        queued in the store and are picked up by the next restore.
+
+        Args:
+            requeue_interrupted: Queue running jobs that get cancelled from now
+                on again, to be resumed from their last checkpoint, instead of
+                failing them. Only useful if thread state outlives the process.
+        """
+        self._stopped = True
+        self._requeue_interrupted = requeue_interrupted
+
+    async def flush(self) -> None:
+        """Wait until the job records written so far are on disk."""
+        if self._last_write is not None:
+            await asyncio.gather(self._last_write, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Write the pending job records, then give up this worker's jobs so
+        that the next worker to start takes them over right away."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        await self.flush()
+        await asyncio.to_thread(self.store.remove_heartbeat, self.worker_id)
+
+    def queued_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JobStatus.QUEUED)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self.queued_count(),
+            "running": len(self._running),
+            "max_concurrency": self.max_concurrency,
+            "max_queued": self.max_queued,
+        }
+
+    def _enqueue(self, job: Job) -> None:
+        heapq.heappush(
+            self._queued.setdefault(job.user_id, []),
+            (-job.priority, next(self._sequence), job.job_id),
+        )
+
+    def _next_job(self) -> Optional[Job]:
+        """Pop the next job: fewest running jobs per user first, then priority,
+        then submission order."""
+        while True:
+            candidates = [user for user, heap in self._queued.items() if heap]
+            if not candidates:
+                return None
+            user_id = min(
+                candidates,
+                key=lambda user: (
+                    self._running_by_user.get(user, 0),
+                    self._queued[user][0][:2],
+                ),
+            )
+            _, _, job_id = heapq.heappop(self._queued[user_id])
+            if not self._queued[user_id]:
+                del self._queued[user_id]
+            job = self._jobs.get(job_id)
+            # Skip jobs that were cancelled while waiting
+            if job is not None and job.status == JobStatus.QUEUED:
+                return job
+
+    def _dispatch(self) -> None:
+        while not self._stopped and len(self._running) < self.max_concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now().isoformat()
+            self._save(job)
+            self._running_by_user[job.user_id] = (
+                self._running_by_user.get(job.user_id, 0) + 1
+            )
+            task = asyncio.create_task(self.run_job(job))
+            self._running[job.job_id] = task
+            task.add_done_callback(lambda t, job=job: self._on_job_done(job, t))
+
+    def _on_job_done(self, job: Job, task: asyncio.Task) -> None:
+        del self._running[job.job_id]
+        self._running_by_user[job.user_id] -= 1
+        if not self._running_by_user[job.user_id]:
+            del self._running_by_user[job.user_id]
+
+        if task.cancelled() and self._stopped and self._requeue_interrupted:
+            job.status = JobStatus.QUEUED
+            job.started_at = None
+            job.resume = True
+            self._save(job)
+            logger.info(f"Job {job.job_id} interrupted, requeued to resume")
+        elif task.cancelled() and self._stopped:
+            self._finish(job, JobStatus.FAILED, error="Interrupted by server shutdown")
+        elif task.cancelled():
+            self._finish(job, JobStatus.CANCELLED)
+        elif task.exception() is not None:
+            logger.error(f"Job {job.job_id} failed: {task.exception()}")
+            self._finish(job, JobStatus.FAILED, error=str(task.exception()))
+        else:
+            self._finish(job, JobStatus.COMPLETED, final_report=task.result())
+        self._dispatch()
+
+    def _finish(
+        self,
+        job: Job,
+        status: JobStatus,
+        final_report: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        job.status = status
+        job.finished_at = datetime.now().isoformat()
+        job.final_report = final_report
+        job.error = error
+        self._save(job)
+        logger.info(f"Job {job.job_id} finished with status {status.value}")
+        self._forget_expired()
+
+    def _forget_expired(self) -> None:
+        finished = [
+            job for job in self._jobs.values() if job.status in FINISHED_STATUSES
+        ]
+        for job in _expired_jobs(finished, self.retention_seconds, self.max_finished):
+            del self._jobs[job.job_id]
+            self._write(self.store.delete, job.job_id)
+
+    def _save(self, job: Job) -> None:
+        # Write a copy, the job keeps changing while the write is pending
+        self._write(self.store.save, replace(job))
+
+    def _write(self, func: Callable, *args) -> None:
+        """Run a store operation in the writer thread, after the pending ones."""
+        future = asyncio.get_running_loop().run_in_executor(self._writer, func, *args)
+        future.add_done_callback(self._on_written)
+        self._last_write = future
+
+    @staticmethod
+    def _on_written(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Failed to update the job store: {future.exception()}")
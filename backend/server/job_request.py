@@ -0,0 +1,38 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from server.chat_request import ChatRequest
+
+
+class SubmitJobRequest(ChatRequest):
+    """Request model for submitting a background research job.
+
+    Background jobs cannot wait for plan feedback, so plans are always
+    accepted automatically.
+    """
+
+    priority: Optional[int] = Field(
+        0, description="Job priority; higher values are scheduled first"
+    )
+
+
+class JobResponse(BaseModel):
+    """Response model for a background research job."""
+
+    job_id: str = Field(..., description="The job identifier")
+    thread_id: str = Field(..., description="The thread the job runs on")
+    status: str = Field(
+        ..., description="queued, running, completed, failed or cancelled"
+    )
+    priority: int = Field(0, description="Job priority")
+    created_at: str = Field(..., description="Submission timestamp")
+    started_at: Optional[str] = Field(None, description="Start timestamp")
+    finished_at: Optional[str] = Field(None, description="Completion timestamp")
+    final_report: Optional[str] = Field(
+        None, description="The final report once the job has completed"
+    )
+    error: Optional[str] = Field(None, description="Error message if the job failed")
@@ -0,0 +1,114 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Orderly shutdown of the server.
+
+Shutdown begins as soon as uvicorn is signalled to stop: new chat streams and
+jobs are refused, and active runs get SHUTDOWN_DRAIN_TIMEOUT seconds to
+finish before they are cancelled with a resumable final event. uvicorn waits
+for the open connections meanwhile, which end with their runs. Once they are
+closed, the lifespan runs the remaining shutdown steps in order, e.g.
+checkpointing thread state, flushing metrics and traces and closing pools,
+within SHUTDOWN_TIMEOUT seconds altogether.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Any, Awaitable, Callable, Union
+
+from server.workflow_run import is_draining, start_draining
+
+logger = logging.getLogger(__name__)
+
+# How long (in seconds) the shutdown steps may take altogether
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "30"))
+
+ShutdownStep = Callable[[], Union[Awaitable[Any], Any]]
+
+
+class Lifecycle:
+    """Runs the shutdown steps of the server in order. Coroutine steps are
+    bounded by what is left of the overall deadline; a failing or timed out
+    step is logged and does not prevent the following ones."""
+
+    def __init__(self, shutdown_timeout: float = SHUTDOWN_TIMEOUT):
+        self.shutdown_timeout = shutdown_timeout
+        self._steps: list[tuple[str, ShutdownStep]] = []
+        self._before_drain: list[Callable[[], None]] = []
+
+    def on_shutdown(self, name: str, step: ShutdownStep) -> None:
+        """Add a step, a function or coroutine function, to the shutdown."""
+        self._steps.append((name, step))
+
+    def on_drain(self, callback: Callable[[], None]) -> None:
+        """Add a function that is called as soon as shutdown begins, before
+        the active runs are drained (e.g. to stop starting jobs)."""
+        self._before_drain.append(callback)
+
+    def begin_shutdown(self) -> asyncio.Task:
+        """Stop starting work and drain the active runs. Idempotent, returns
+        the task draining the runs."""
+        if is_draining():
+            return start_draining()
+        logger.info("Shutting down, no longer starting runs")
+        for callback in self._before_drain:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Failed to stop starting work: {e}")
+        return start_draining()
+
+    def drain_on_signal(self) -> None:
+        """Begin the shutdown as soon as uvicorn is signalled to stop.
+
+        Chains to uvicorn's own handlers, which are installed before the
+        lifespan starts.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                loop.call_soon_threadsafe(self.begin_shutdown)
+                previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+    async def shutdown(self) -> None:
+        """Drain the active runs, then run the shutdown steps."""
+        started = time.monotonic()
+        deadline = started + self.shutdown_timeout
+        await self.begin_shutdown()
+        for name, step in self._steps:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Shutdown timed out, skipping: {name}")
+                continue
+            step_started = time.monotonic()
+            try:
+                result = step()
+                if inspect.isawaitable(result):
+                    await asyncio.wait_for(result, remaining)
+            except asyncio.TimeoutError:
+                logger.warning(f"Shutdown step timed out: {name}")
+                continue
+            except Exception as e:
+                logger.warning(f"Shutdown step failed: {name}: {e}")
+                continue
+            logger.debug(
+                f"Shutdown step {name} took {time.monotonic() - step_started:.2f}s"
+            )
+        logger.info(f"Shutdown completed in {time.monotonic() - started:.2f}s")
+
+
+lifecycle = Lifecycle()
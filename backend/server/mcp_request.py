@@ -25,6 +25,9 @@ class MCPServerMetadataRequest(BaseModel):
     timeout_seconds: Optional[int] = Field(
         None, description="Optional custom timeout in seconds for the operation"
     )
+    refresh: Optional[bool] = Field(
+        False, description="Query the server even if its tools are cached"
+    )
 
 
 class MCPServerMetadataResponse(BaseModel):
@@ -1,17 +1,30 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import hashlib
+import json
 import logging
+import os
 from datetime import timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from mcp.client.sse import sse_client
+
+from src.utils.async_cache import AsyncTTLCache
+from src.utils.metrics import registry
 
 logger = logging.getLogger(__name__)
 
+# Tool lists of MCP servers, so the settings page does not start a new
+# session for every lookup. Entries are served for the TTL, then for up to
+# the stale period while they are refreshed in the background.
+mcp_metadata_cache = AsyncTTLCache(
+    ttl_seconds=float(os.getenv("MCP_METADATA_CACHE_TTL", "300")),
+    stale_seconds=float(os.getenv("MCP_METADATA_CACHE_STALE", "3600")),
+    max_entries=int(os.getenv("MCP_METADATA_CACHE_MAX_ENTRIES", "256")),
+)
+registry.register_cache("mcp_metadata", mcp_metadata_cache)
+
 
 async def _get_tools_from_client_session(
     client_context_manager: Any, timeout_seconds: int = 10
@@ -29,6 +42,8 @@ async def _get_tools_from_client_session(
     Raises:
         Exception: If there's an error during the process
     """
+    from mcp import ClientSession
+
     async with client_context_manager as (read, write):
         async with ClientSession(
             read, write, read_timeout_seconds=timedelta(seconds=timeout_seconds)
@@ -65,6 +80,12 @@ async def load_mcp_tools(
     Raises:
         HTTPException: If there's an error loading the tools
     """
+    # The MCP SDK is only needed on the settings page, so it is loaded on
+    # first use rather than at startup
+    from mcp import StdioServerParameters
+    from mcp.client.sse import sse_client
+    from mcp.client.stdio import stdio_client
+
     try:
         if server_type == "stdio":
             if not command:
@@ -102,3 +123,51 @@ async def load_mcp_tools(
             logger.exception(f"Error loading MCP tools: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
         raise
+
+
+def mcp_metadata_key(
+    server_type: str,
+    command: Optional[str] = None,
+    args: Optional[List[str]] = None,
+    url: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple:
+    """Cache key of an MCP server. The environment is hashed so that secrets
+    are not kept in the key."""
+    env_hash = hashlib.sha256(
+        json.dumps(env or {}, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return (server_type, command, tuple(args or ()), url, env_hash)
+
+
+async def load_mcp_tools_cached(
+    server_type: str,
+    command: Optional[str] = None,
+    args: Optional[List[str]] = None,
+    url: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    timeout_seconds: int = 60,
+    refresh: bool = False,
+) -> List:
+    """
+    Load tools from an MCP server through the metadata cache.
+
+    Concurrent lookups of the same server share one session.
+
+    Args:
+        server_type: The type of MCP server connection (stdio or sse)
+        command: The command to execute (for stdio type)
+        args: Command arguments (for stdio type)
+        url: The URL of the SSE server (for sse type)
+        env: Environment variables
+        timeout_seconds: Timeout in seconds for a lookup that is not cached
+        refresh: Ignore the cached tools and query the server
+
+    Returns:
+        List of available tools from the MCP server
+    """
+    return await mcp_metadata_cache.get_or_load(
+        mcp_metadata_key(server_type, command, args, url, env),
+        lambda: load_mcp_tools(server_type, command, args, url, env, timeout_seconds),
+        refresh=refresh,
+    )
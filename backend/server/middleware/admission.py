@@ -0,0 +1,364 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Admission control for expensive endpoints.
+
+Requests to the endpoints in ADMISSION_CONTROLLED_PATHS need a concurrency
+slot before they run. Slots are limited globally and per user (per client
+address for anonymous callers); requests that cannot get one right away wait
+in a bounded FIFO queue. On top of that, token buckets limit the request rate
+globally and per user. Requests that are rate
+limited, find the queue full or wait too long are rejected with
+`429 Too Many Requests` and a `Retry-After` header.
+
+A slot is held until the response has been sent, or, for a workflow run that
+outlives its connection, until the run finishes (see AdmissionSlot). Chat
+streams resumed with `Last-Event-ID` reattach to a run that already holds a
+slot, so they are admitted by a separate controller with cheaper limits
+instead (ADMISSION_REATTACH_*). The route only reattaches them to a buffer the
+caller owns and never starts a run for them.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from server.middleware.auth import get_current_user_id
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROLLED_PATHS = (
+    "/api/chat/stream",
+    "/api/podcast/generate",
+    "/api/ppt/generate",
+)
+# Paths on which a request with a Last-Event-ID header only resumes a stream
+REATTACH_PATHS = ("/api/chat/stream",)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket that refills continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """Seconds until `cost` tokens are available, 0 if they are now."""
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost: float = 1.0) -> None:
+        self._refill(time.monotonic())
+        self.tokens -= cost
+
+    def is_full(self) -> bool:
+        """Whether the bucket is as good as a new one."""
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    """Per-user and global concurrency and rate limits with a wait queue.
+
+    A limit of 0 disables it.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_concurrent_per_user: int = 2,
+        max_queued: int = 100,
+        queue_timeout: float = 30.0,
+        requests_per_minute: float = 0,
+        requests_per_minute_per_user: float = 0,
+    ):
+        """
+        Args:
+            max_concurrent: Maximum number of admitted requests overall
+            max_concurrent_per_user: Maximum number of admitted requests per user
+            max_queued: Maximum number of requests waiting for a slot
+            queue_timeout: How long (in seconds) a request waits for a slot
+            requests_per_minute: Sustained request rate overall
+            requests_per_minute_per_user: Sustained request rate per user
+        """
+        self.max_concurrent = max_concurrent
+        self.max_concurrent_per_user = max_concurrent_per_user
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_minute_per_user = requests_per_minute_per_user
+        self._running: dict[str, int] = {}
+        self._waiters: deque[tuple[str, asyncio.Future]] = deque()
+        self._global_bucket = self._make_bucket(requests_per_minute)
+        # Least recently used first
+        self._user_buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    @staticmethod
+    def _make_bucket(requests_per_minute: float) -> Optional[TokenBucket]:
+        if requests_per_minute <= 0:
+            return None
+        # Allow bursts of up to ten seconds' worth of requests
+        return TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 6))
+
+    @property
+    def running_count(self) -> int:
+        return sum(self._running.values())
+
+    def _has_slot(self, user_id: str) -> bool:
+        if self.max_concurrent and self.running_count >= self.max_concurrent:
+            return False
+        if (
+            self.max_concurrent_per_user
+            and self._running.get(user_id, 0) >= self.max_concurrent_per_user
+        ):
+            return False
+        return True
+
+    def _check_rate(self, user_id: str) -> None:
+        buckets = [self._global_bucket]
+        if self.requests_per_minute_per_user > 0:
+            self._forget_full_buckets()
+            if user_id not in self._user_buckets:
+                self._user_buckets[user_id] = self._make_bucket(
+                    self.requests_per_minute_per_user
+                )
+            self._user_buckets.move_to_end(user_id)
+            buckets.append(self._user_buckets[user_id])
+        buckets = [bucket for bucket in buckets if bucket is not None]
+        wait = max((bucket.wait_time() for bucket in buckets), default=0.0)
+        if wait > 0:
+            raise AdmissionRejectedError("Rate limit exceeded", wait)
+        for bucket in buckets:
+            bucket.consume()
+
+    def _forget_full_buckets(self) -> None:
+        """Drop the buckets of users idle long enough to have refilled, which
+        a new bucket would replace exactly. Once the least recently used
+        bucket is not full, the others have not been idle that long either."""
+        while self._user_buckets:
+            user_id, bucket = next(iter(self._user_buckets.items()))
+            if not bucket.is_full():
+                return
+            del self._user_buckets[user_id]
+
+    async def acquire(self, user_id: str) -> None:
+        """Wait for a concurrency slot.
+
+        Raises:
+            AdmissionRejectedError: If the request is rate limited, the queue is
+                full, or no slot frees up within the queue timeout
+        """
+        self._check_rate(user_id)
+        future = asyncio.get_running_loop().create_future()
+        waiter = (user_id, future)
+        # Join the queue and let the queue decide, so earlier waiters go first
+        self._waiters.append(waiter)
+        self._wake_waiters()
+        if future.done():
+            return
+        if len(self._waiters) > self.max_queued:
+            self._waiters.remove(waiter)
+            raise AdmissionRejectedError("Too many queued requests", self.queue_timeout)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we gave up on it
+                self.release(user_id)
+            else:
+                future.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise AdmissionRejectedError(
+                "Timed out waiting for a free slot", self.queue_timeout
+            )
+
+    def release(self, user_id: str) -> None:
+        self._running[user_id] -= 1
+        if not self._running[user_id]:
+            del self._running[user_id]
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """Grant free slots to waiters in FIFO order, skipping users that are
+        at their own limit."""
+        for waiter in list(self._waiters):
+            if self.max_concurrent and self.running_count >= self.max_concurrent:
+                return
+            user_id, future = waiter
+            if future.done() or not self._has_slot(user_id):
+                continue
+            self._waiters.remove(waiter)
+            self._running[user_id] = self._running.get(user_id, 0) + 1
+            future.set_result(None)
+
+    def stats(self) -> dict[str, Any]:
+        queued_by_user: dict[str, int] = {}
+        for user_id, _ in self._waiters:
+            queued_by_user[user_id] = queued_by_user.get(user_id, 0) + 1
+        return {
+            "running": self.running_count,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_concurrent_per_user": self.max_concurrent_per_user,
+            "max_queued": self.max_queued,
+            "running_by_user": dict(self._running),
+            "queued_by_user": queued_by_user,
+        }
+
+
+admission_controller = AdmissionController(
+    max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "16")),
+    max_concurrent_per_user=int(os.getenv("ADMISSION_MAX_CONCURRENT_PER_USER", "2")),
+    max_queued=int(os.getenv("ADMISSION_MAX_QUEUED", "100")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30")),
+    requests_per_minute=float(os.getenv("ADMISSION_REQUESTS_PER_MINUTE", "0")),
+    requests_per_minute_per_user=float(
+        os.getenv("ADMISSION_REQUESTS_PER_MINUTE_PER_USER", "0")
+    ),
+)
+
+# Reattaching streams only replay buffered events, so they get more slots but
+# are still limited, so that the header is no way around admission
+reattach_controller = AdmissionController(
+    max_concurrent=int(os.getenv("ADMISSION_REATTACH_MAX_CONCURRENT", "64")),
+    max_concurrent_per_user=int(
+        os.getenv("ADMISSION_REATTACH_MAX_CONCURRENT_PER_USER", "4")
+    ),
+    max_queued=0,
+    queue_timeout=0,
+    requests_per_minute_per_user=float(
+        os.getenv("ADMISSION_REATTACH_REQUESTS_PER_MINUTE_PER_USER", "30")
+    ),
+)
+
+
+class AdmissionSlot:
+    """A concurrency slot granted to a request, released once."""
+
+    def __init__(self, controller: AdmissionController, user_id: str):
+        self.controller = controller
+        self.user_id = user_id
+        self.handed_over = False
+        self._released = False
+
+    def hold_until_done(self, task: asyncio.Future) -> None:
+        """Keep the slot until `task` is done instead of until the response
+        has been sent, e.g. for a run that continues after the client left."""
+        self.handed_over = True
+        task.add_done_callback(lambda _: self.release())
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.controller.release(self.user_id)
+
+
+def admission_slot(request: Request) -> Optional[AdmissionSlot]:
+    """The slot the request was admitted with, None if it needed none."""
+    return getattr(request.state, "admission_slot", None)
+
+
+def _is_reattach(scope) -> bool:
+    """Whether the request resumes a chat stream with a valid Last-Event-ID."""
+    value = Request(scope).headers.get("Last-Event-ID")
+    try:
+        int(value or "")
+    except ValueError:
+        return False
+    return True
+
+
+def _admission_key(scope) -> str:
+    """The user the per-user limits apply to.
+
+    Callers that send no user ID (such as the console) are told apart by
+    their address, so that they do not all share one user's slots.
+    """
+    user_id = get_current_user_id(Request(scope), None)
+    if user_id:
+        return user_id
+    client = scope.get("client")
+    return f"anonymous:{client[0]}" if client else "anonymous"
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware that admits requests to the controlled paths.
+
+    This is a plain ASGI middleware rather than BaseHTTPMiddleware so that the
+    slot is held until a streaming response has been fully sent. Endpoints can
+    hand the slot over to a longer-lived task with `admission_slot(request)`.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController = admission_controller,
+        paths: tuple[str, ...] = ADMISSION_CONTROLLED_PATHS,
+        reattach: AdmissionController = reattach_controller,
+        reattach_paths: tuple[str, ...] = REATTACH_PATHS,
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+        self.reattach = reattach
+        self.reattach_paths = reattach_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        if scope["path"] in self.reattach_paths and _is_reattach(scope):
+            controller = self.reattach
+        user_id = _admission_key(scope)
+        try:
+            await controller.acquire(user_id)
+        except AdmissionRejectedError as e:
+            logger.warning(f"Rejected {scope['path']} for user {user_id}: {e.reason}")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": e.reason},
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        slot = AdmissionSlot(controller, user_id)
+        scope.setdefault("state", {})["admission_slot"] = slot
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if not slot.handed_over:
+                slot.release()
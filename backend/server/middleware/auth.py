@@ -2,6 +2,8 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+import os
+import secrets
 from typing import Optional
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -10,6 +12,12 @@ logger = logging.getLogger(__name__)
 
 security = HTTPBearer(auto_error=False)
 
+# Token for administrative endpoints, sent in the X-Admin-Token header. Without
+# one, those endpoints only answer requests from the local machine.
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
 
 def get_current_user_id(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Optional[str]:
     """Extract user ID from request.
@@ -64,4 +72,17 @@ def require_user_id(user_id: Optional[str] = Depends(get_current_user_id)) -> st
 
 def get_user_id_or_default(user_id: Optional[str] = Depends(get_current_user_id)) -> str:
     """Get user ID or return default for anonymous users."""
-    return user_id or "anonymous"
\ No newline at end of file
+    return user_id or "anonymous"
+
+
+def require_admin(request: Request) -> None:
+    """Allow only administrators: callers with the admin token, or local
+    callers when no token is configured. User IDs are not proof of anything,
+    so they do not count."""
+    if ADMIN_API_TOKEN:
+        token = request.headers.get("X-Admin-Token", "")
+        if secrets.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+            return
+    elif request.client and request.client.host in _LOOPBACK_HOSTS:
+        return
+    raise HTTPException(status_code=403, detail="Administrator access required")
@@ -0,0 +1,14 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from fastapi import APIRouter
+
+from server.middleware.admission import admission_controller
+
+router = APIRouter(prefix="/api/admission", tags=["admission"])
+
+
+@router.get("/stats")
+async def admission_stats():
+    """Get running and queued request counts of the admission controller."""
+    return admission_controller.stats()
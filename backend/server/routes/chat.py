@@ -1,49 +1,194 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-import json
+import importlib
 import logging
-from typing import List, cast
+import os
+import time
+from typing import List, Optional, cast
 from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import AIMessageChunk, AIMessage, ToolMessage, BaseMessage
 from langgraph.types import Command
 
+from src.config.reloader import bind_config_snapshot, config_reloader
 from src.config.report_style import ReportStyle
+from src.config.tools import (
+    is_rag_provider_configured,
+    is_search_engine_configured,
+    resolve_rag_provider,
+    resolve_search_engine,
+)
 from src.graph.builder import build_graph_with_memory
+from src.graph.instrumentation import run_callbacks
+from src.llms.llm import get_configured_llm_models
 from src.rag.retriever import Resource
+from src.services.appwrite_service import appwrite_service
+from src.tools.search import prebuild_web_search_tools
+from src.utils.lazy import Lazy
+from src.utils.tracing import SPAN_KIND_SERVER, tracer
 from server.chat_request import ChatRequest
+from server.middleware.admission import admission_slot
+from server.middleware.auth import get_user_id_or_default
+from server.stream_utils import coalesce_message_chunks, make_event
+from server.workflow_run import (
+    WorkflowRun,
+    active_runs,
+    event_buffers,
+    parse_last_event_id,
+    reject_if_draining,
+    stream_events,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
-# Build graph once at module level
-graph = build_graph_with_memory()
+# Built once, on first use (or by the warm-up after startup, see server.app)
+graph = Lazy(build_graph_with_memory)
+
+
+def warm_up() -> None:
+    """Build the research graph and load the model SDK ahead of the first
+    request."""
+    started = time.perf_counter()
+    try:
+        graph.get()
+        importlib.import_module("langchain_openai")
+        prebuild_web_search_tools()
+    except Exception as e:
+        # The first request builds it again and reports the error
+        logger.warning(f"Failed to warm up the research graph: {e}")
+        return
+    logger.info(f"Research graph ready in {time.perf_counter() - started:.2f}s")
+
+
+# Consecutive message chunks are merged for up to this many seconds or characters
+STREAM_COALESCE_WINDOW = float(os.getenv("CHAT_STREAM_COALESCE_WINDOW_MS", "50")) / 1000
+STREAM_COALESCE_MAX_CHARS = int(os.getenv("CHAT_STREAM_COALESCE_MAX_CHARS", "1024"))
+
+
+async def _user_preferences(user_id: str) -> dict:
+    if not appwrite_service.is_available():
+        return {}
+    try:
+        return await appwrite_service.get_user_config(user_id) or {}
+    except Exception as e:
+        logger.warning(f"Failed to get the preferences of user {user_id}: {e}")
+        return {}
+
+
+async def _resolve_run_selection(request: ChatRequest, user_id: str) -> dict:
+    """Resolve the search engine, RAG provider and models of a run.
+
+    The selection of the request takes precedence over the preferences the
+    user saved, which take precedence over the server's defaults. A saved
+    engine or provider the server has no credentials for is skipped.
+
+    Raises:
+        HTTPException: 400 if the request selects an unknown or unconfigured
+            engine, provider or model
+    """
+    search_engine = request.search_engine
+    rag_provider = request.rag_provider
+    if not (search_engine and rag_provider):
+        preferences = await _user_preferences(user_id)
+        preferred_engine = preferences.get("search_engine")
+        if not search_engine and preferred_engine:
+            try:
+                if is_search_engine_configured(resolve_search_engine(preferred_engine)):
+                    search_engine = preferred_engine
+            except ValueError:
+                pass
+        preferred_provider = preferences.get("rag_provider")
+        if not rag_provider and preferred_provider:
+            try:
+                if is_rag_provider_configured(resolve_rag_provider(preferred_provider)):
+                    rag_provider = preferred_provider
+            except ValueError:
+                pass
+
+    try:
+        search_engine = resolve_search_engine(search_engine)
+        rag_provider = resolve_rag_provider(rag_provider)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.search_engine and not is_search_engine_configured(search_engine):
+        raise HTTPException(
+            status_code=400, detail=f"Search engine {search_engine} is not configured"
+        )
+    if request.rag_provider and not is_rag_provider_configured(rag_provider):
+        raise HTTPException(
+            status_code=400, detail=f"RAG provider {rag_provider} is not configured"
+        )
+    if request.models:
+        configured = get_configured_llm_models()
+        for llm_type, model in request.models.items():
+            if model not in configured.get(llm_type, []):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Model {model} is not available for {llm_type}",
+                )
+    return {
+        "search_engine": search_engine,
+        "rag_provider": rag_provider,
+        "models": request.models or None,
+    }
 
 
 @router.post("/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    user_id: str = Depends(get_user_id_or_default),
+):
     thread_id = request.thread_id
     if thread_id == "__default__":
         thread_id = str(uuid4())
+
+    last_event_id = parse_last_event_id(http_request)
+    if last_event_id is not None:
+        buffer = event_buffers.get(thread_id)
+        # Not found rather than forbidden, so thread IDs cannot be probed
+        if buffer is None or buffer.owner != user_id:
+            raise HTTPException(
+                status_code=404, detail=f"No buffered events for thread {thread_id}"
+            )
+        # Reattach to the existing run instead of running the workflow again
+        return StreamingResponse(
+            stream_events(
+                http_request, buffer, last_event_id, active_runs.get(thread_id)
+            ),
+            media_type="text/event-stream",
+        )
+
+    reject_if_draining()
+    selection = await _resolve_run_selection(request, user_id)
+    events = _astream_workflow_generator(
+        request.model_dump()["messages"],
+        thread_id,
+        request.resources,
+        request.max_plan_iterations,
+        request.max_step_num,
+        request.max_search_results,
+        request.auto_accepted_plan,
+        request.interrupt_feedback,
+        request.mcp_settings,
+        request.enable_background_investigation,
+        request.report_style,
+        request.enable_deep_thinking,
+        request.resume,
+        **selection,
+    )
+    run = WorkflowRun(thread_id, events, owner=user_id)
+    slot = admission_slot(http_request)
+    if slot is not None:
+        # The run holds the slot while it executes, connected or not
+        slot.hold_until_done(run.task)
     return StreamingResponse(
-        _astream_workflow_generator(
-            request.model_dump()["messages"],
-            thread_id,
-            request.resources,
-            request.max_plan_iterations,
-            request.max_step_num,
-            request.max_search_results,
-            request.auto_accepted_plan,
-            request.interrupt_feedback,
-            request.mcp_settings,
-            request.enable_background_investigation,
-            request.report_style,
-            request.enable_deep_thinking,
-        ),
+        stream_events(http_request, run.buffer, run.buffer.start_id, run),
         media_type="text/event-stream",
     )
 
@@ -61,6 +206,10 @@ async def _astream_workflow_generator(
     enable_background_investigation: bool,
     report_style: ReportStyle,
     enable_deep_thinking: bool,
+    resume: bool = False,
+    search_engine: Optional[str] = None,
+    rag_provider: Optional[str] = None,
+    models: Optional[dict] = None,
 ):
     input_ = {
         "messages": messages,
@@ -78,24 +227,73 @@ async def _astream_workflow_generator(
         if messages:
             resume_msg += f" {messages[-1]['content']}"
         input_ = Command(resume=resume_msg)
-    async for agent, _, event_data in graph.astream(
-        input_,
-        config={
+    if resume:
+        # Continue a cancelled run from its last checkpoint
+        input_ = None
+    config = {
+        "thread_id": thread_id,
+        "resources": resources,
+        "max_plan_iterations": max_plan_iterations,
+        "max_step_num": max_step_num,
+        "max_search_results": max_search_results,
+        "mcp_settings": mcp_settings,
+        "report_style": report_style.value,
+        "enable_deep_thinking": enable_deep_thinking,
+        "search_engine": search_engine,
+        "rag_provider": rag_provider,
+        "models": models,
+        "callbacks": run_callbacks(),
+    }
+    # The run keeps the configuration it starts with, even if it is reloaded
+    snapshot = config_reloader.snapshot
+    bind_config_snapshot(snapshot)
+    # Root span of the run; nodes, tools, LLM calls and outbound HTTP
+    # requests of the run are recorded as its descendants
+    with tracer.start_as_current_span(
+        "chat.stream",
+        kind=SPAN_KIND_SERVER,
+        attributes={
             "thread_id": thread_id,
-            "resources": resources,
-            "max_plan_iterations": max_plan_iterations,
-            "max_step_num": max_step_num,
-            "max_search_results": max_search_results,
-            "mcp_settings": mcp_settings,
-            "report_style": report_style.value,
-            "enable_deep_thinking": enable_deep_thinking,
+            "deerflow.config_version": snapshot.version,
+            "deerflow.search_engine": search_engine or "",
+            "deerflow.resume": resume,
+            "deerflow.interrupt_feedback": interrupt_feedback or "",
         },
-        stream_mode=["messages", "updates"],
+        root=True,
+    ):
+        events = coalesce_message_chunks(
+            _graph_events(input_, config, thread_id),
+            STREAM_COALESCE_WINDOW,
+            STREAM_COALESCE_MAX_CHARS,
+        )
+        async for event_type, data in events:
+            yield make_event(event_type, data)
+
+
+async def _graph_events(input_, config: dict, thread_id: str):
+    """Translate the graph stream into (event_type, data) pairs."""
+    async for agent, mode, event_data in graph.astream(
+        input_,
+        config=config,
+        stream_mode=["messages", "updates", "custom"],
         subgraphs=True,
     ):
+        if mode == "custom":
+            if "plan_step" in event_data:
+                # A plan step that is complete while the planner is still streaming
+                yield (
+                    "plan_step",
+                    {
+                        "thread_id": thread_id,
+                        "agent": agent[0].split(":")[0] if agent else "planner",
+                        "role": "assistant",
+                        **event_data["plan_step"],
+                    },
+                )
+            continue
         if isinstance(event_data, dict):
             if "__interrupt__" in event_data:
-                yield _make_event(
+                yield (
                     "interrupt",
                     {
                         "thread_id": thread_id,
@@ -113,9 +311,10 @@ async def _astream_workflow_generator(
         message_chunk, message_metadata = cast(
             tuple[BaseMessage, dict[str, any]], event_data
         )
-        # Print agent name in red (requires colorama or similar library for actual colored output)
-        print("\033[91m" + message_metadata['langgraph_node'] + "\033[0m\n")
-        
+        logger.debug(
+            f"Streaming message from node {message_metadata.get('langgraph_node')}"
+        )
+
         event_stream_message: dict[str, any] = {
             "thread_id": thread_id,
             "agent": agent[0].split(":")[0],
@@ -134,7 +333,7 @@ async def _astream_workflow_generator(
         if isinstance(message_chunk, ToolMessage):
             # Tool Message - Return the result of the tool call
             event_stream_message["tool_call_id"] = message_chunk.tool_call_id
-            yield _make_event("tool_call_result", event_stream_message)
+            yield "tool_call_result", event_stream_message
         elif isinstance(message_chunk, AIMessageChunk):
             # AI Message - Raw message tokens
             if message_chunk.tool_calls:
@@ -143,19 +342,13 @@ async def _astream_workflow_generator(
                 event_stream_message["tool_call_chunks"] = (
                     message_chunk.tool_call_chunks
                 )
-                yield _make_event("tool_calls", event_stream_message)
+                yield "tool_calls", event_stream_message
             elif message_chunk.tool_call_chunks:
                 # AI Message - Tool Call Chunks
                 event_stream_message["tool_call_chunks"] = (
                     message_chunk.tool_call_chunks
                 )
-                yield _make_event("tool_call_chunks", event_stream_message)
+                yield "tool_call_chunks", event_stream_message
             else:
                 # AI Message - Raw message tokens
-                yield _make_event("message_chunk", event_stream_message)
-
-
-def _make_event(event_type: str, data: dict[str, any]):
-    if data.get("content") == "":
-        data.pop("content")
-    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
\ No newline at end of file
+                yield "message_chunk", event_stream_message
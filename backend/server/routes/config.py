@@ -1,13 +1,15 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException
-from src.config.tools import SELECTED_RAG_PROVIDER
+from src.config.reloader import ConfigError, config_reloader
+from src.config.tools import default_rag_provider
 from src.llms.llm import get_configured_llm_models
 from src.services.appwrite_service import appwrite_service
-from server.middleware.auth import get_user_id_or_default
+from server.middleware.auth import get_user_id_or_default, require_admin
 from server.config_request import ConfigResponse
 from server.rag_request import RAGConfigResponse
 
@@ -19,7 +21,7 @@ router = APIRouter(prefix="/api", tags=["config"])
 @router.get("/rag/config", response_model=RAGConfigResponse)
 async def rag_config():
     """Get the config of the RAG."""
-    return RAGConfigResponse(provider=SELECTED_RAG_PROVIDER)
+    return RAGConfigResponse(provider=default_rag_provider())
 
 
 # @router.get("/rag/resources", response_model=RAGResourcesResponse)
@@ -31,6 +33,20 @@ async def rag_config():
 #     return RAGResourcesResponse(resources=[])
 
 
+@router.post("/config/reload", dependencies=[Depends(require_admin)])
+async def reload_config():
+    """Reload conf.yaml and .env now, instead of at the next check.
+
+    Changes the configuration of the whole process, so only administrators
+    may call it (see require_admin).
+    """
+    try:
+        snapshot = await asyncio.to_thread(config_reloader.reload)
+    except ConfigError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"config_version": snapshot.version}
+
+
 @router.get("/config", response_model=ConfigResponse)
 async def config(user_id: str = Depends(get_user_id_or_default)):
     """Get the config of the server."""
@@ -40,8 +56,9 @@ async def config(user_id: str = Depends(get_user_id_or_default)):
         
         config_data = {
             "llm_models": llm_models,
-            "rag_provider": SELECTED_RAG_PROVIDER,
+            "rag_provider": default_rag_provider(),
             "version": "1.0.0",
+            "config_version": config_reloader.snapshot.version,
             "environment": "development",
             "user_id": user_id,
             "appwrite_enabled": appwrite_service.is_available()
@@ -0,0 +1,179 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from server.chat_request import ChatRequest
+from server.job_queue import Job, JobQueue, JobStatus, JobStore, QueueFullError
+from server.job_request import JobResponse, SubmitJobRequest
+from server.middleware.auth import get_user_id_or_default
+from server.routes.chat import (
+    _astream_workflow_generator,
+    _resolve_run_selection,
+    graph,
+)
+from server.workflow_run import (
+    WorkflowRun,
+    active_runs,
+    event_buffers,
+    parse_last_event_id,
+    reject_if_draining,
+    reject_if_thread_taken,
+    stream_events,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_STORE_DIR = os.getenv(
+    "JOB_STORE_DIR", str(Path(__file__).parent.parent.parent / "data" / "jobs")
+)
+
+
+async def _run_research_job(job: Job) -> Optional[str]:
+    """Run a research job to completion and return its final report."""
+    request = ChatRequest.model_validate(job.request)
+    events = _astream_workflow_generator(
+        request.model_dump()["messages"],
+        job.thread_id,
+        request.resources,
+        request.max_plan_iterations,
+        request.max_step_num,
+        request.max_search_results,
+        True,  # There is nobody to review the plan
+        None,
+        request.mcp_settings,
+        request.enable_background_investigation,
+        request.report_style,
+        request.enable_deep_thinking,
+        request.resume or job.resume,
+        search_engine=request.search_engine,
+        rag_provider=request.rag_provider,
+        models=request.models,
+    )
+    run = WorkflowRun(
+        job.thread_id,
+        events,
+        buffer=event_buffers.get(job.thread_id),
+        cancel_when_abandoned=False,
+        owner=job.user_id,
+    )
+    try:
+        await run.task
+    except asyncio.CancelledError:
+        run.cancel("job cancelled")
+        raise
+    if run.error is not None:
+        raise run.error
+    state = await graph.aget_state({"configurable": {"thread_id": job.thread_id}})
+    return state.values.get("final_report")
+
+
+job_queue = JobQueue(
+    _run_research_job,
+    JobStore(JOB_STORE_DIR),
+    max_concurrency=int(os.getenv("JOB_MAX_CONCURRENCY", "4")),
+    max_queued=int(os.getenv("JOB_MAX_QUEUED", "1000")),
+)
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+def _get_user_job(job_id: str, user_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.post("/", response_model=JobResponse, status_code=202)
+async def submit_job(
+    request: SubmitJobRequest, user_id: str = Depends(get_user_id_or_default)
+):
+    """Queue a research run in the background."""
+    reject_if_draining()
+    # Resolved on submission, so the job runs with the selection of the time
+    selection = await _resolve_run_selection(request, user_id)
+    job_id = str(uuid4())
+    thread_id = request.thread_id
+    if not thread_id or thread_id == "__default__":
+        thread_id = job_id
+    job = Job(
+        job_id=job_id,
+        user_id=user_id,
+        thread_id=thread_id,
+        priority=request.priority or 0,
+        request={
+            **request.model_dump(mode="json", exclude={"priority"}),
+            **selection,
+        },
+    )
+    # Create the replay buffer up front so clients can attach while queued
+    reject_if_thread_taken(thread_id, user_id)
+    event_buffers.create(thread_id, owner=user_id)
+    try:
+        job_queue.submit(job)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return JobResponse(**job.to_dict())
+
+
+@router.get("/stats")
+async def job_stats():
+    """Get queue depth and concurrency of the job queue."""
+    return job_queue.stats()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, user_id: str = Depends(get_user_id_or_default)):
+    """Get the status of a job, including its final report once completed."""
+    return JobResponse(**_get_user_job(job_id, user_id).to_dict())
+
+
+@router.get("/{job_id}/stream")
+async def stream_job(
+    job_id: str,
+    http_request: Request,
+    user_id: str = Depends(get_user_id_or_default),
+):
+    """Attach to the event stream of a queued or running job."""
+    job = _get_user_job(job_id, user_id)
+    buffer = event_buffers.get(job.thread_id)
+    if buffer is None and job.owner not in (None, job_queue.worker_id):
+        # Buffers are per worker; see the --workers option of server.py
+        raise HTTPException(
+            status_code=421,
+            detail=f"Job {job_id} belongs to another server worker",
+        )
+    if buffer is None:
+        raise HTTPException(
+            status_code=410, detail=f"Events of job {job_id} are no longer available"
+        )
+    last_event_id = parse_last_event_id(http_request)
+    return StreamingResponse(
+        stream_events(
+            http_request,
+            buffer,
+            last_event_id if last_event_id is not None else buffer.start_id,
+            active_runs.get(job.thread_id),
+        ),
+        media_type="text/event-stream",
+    )
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str, user_id: str = Depends(get_user_id_or_default)):
+    """Cancel a queued or running job."""
+    job = job_queue.cancel(_get_user_job(job_id, user_id).job_id)
+    if job.status == JobStatus.CANCELLED and job.thread_id not in active_runs:
+        buffer = event_buffers.get(job.thread_id)
+        if buffer is not None:
+            buffer.close()
+    return JobResponse(**job.to_dict())
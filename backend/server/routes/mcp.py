@@ -6,7 +6,7 @@ import logging
 from fastapi import APIRouter, HTTPException
 
 from server.mcp_request import MCPServerMetadataRequest, MCPServerMetadataResponse
-from server.mcp_utils import load_mcp_tools
+from server.mcp_utils import load_mcp_tools_cached
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +24,15 @@ async def mcp_server_metadata(request: MCPServerMetadataRequest):
         if request.timeout_seconds is not None:
             timeout = request.timeout_seconds
 
-        # Load tools from the MCP server using the utility function
-        tools = await load_mcp_tools(
+        # Load tools from the MCP server, or from the cache
+        tools = await load_mcp_tools_cached(
             server_type=request.transport,
             command=request.command,
             args=request.args,
             url=request.url,
             env=request.env,
             timeout_seconds=timeout,
+            refresh=request.refresh,
         )
 
         # Create the response with tools
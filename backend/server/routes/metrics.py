@@ -0,0 +1,63 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from server.middleware.admission import admission_controller
+from src.sandbox import python_sandbox_pool
+from src.utils.metrics import (
+    METRICS_MULTIPROC_DIR,
+    METRICS_WRITE_INTERVAL,
+    Gauge,
+    registry,
+)
+
+router = APIRouter(tags=["metrics"])
+
+
+def _collect_gauges() -> list[Gauge]:
+    """Read the current load of the admission controller and sandbox pool."""
+    admission = Gauge(
+        "deerflow_admission_requests",
+        "Requests running and queued in the admission controller",
+        ["state"],
+    )
+    stats = admission_controller.stats()
+    admission.set(stats["running"], state="running")
+    admission.set(stats["queued"], state="queued")
+
+    sandbox = Gauge(
+        "deerflow_python_sandbox_workers",
+        "Python sandbox workers by state",
+        ["state"],
+    )
+    stats = python_sandbox_pool.stats()
+    sandbox.set(stats["busy"], state="busy")
+    sandbox.set(stats["workers"] - stats["busy"], state="idle")
+    return [admission, sandbox]
+
+
+registry.register_collector(_collect_gauges)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose node, LLM, tool and cache metrics in the Prometheus format.
+
+    With METRICS_MULTIPROC_DIR set, the values are summed over all workers.
+    """
+    if METRICS_MULTIPROC_DIR:
+        body = await asyncio.to_thread(
+            registry.render_workers,
+            METRICS_MULTIPROC_DIR,
+            registry.worker_id,
+            3 * METRICS_WRITE_INTERVAL,
+        )
+    else:
+        body = registry.render()
+    return PlainTextResponse(
+        body, media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
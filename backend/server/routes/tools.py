@@ -9,7 +9,8 @@ from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 
-from src.config import SearchEngine, SELECTED_SEARCH_ENGINE
+from src.config import SearchEngine
+from src.config.tools import default_search_engine
 from src.tools.search import get_web_search_tool
 from src.services.appwrite_service import appwrite_service
 from server.middleware.auth import get_user_id_or_default
@@ -60,6 +61,7 @@ class ToolsResponse(BaseModel):
 def get_search_engine_info() -> List[ToolInfo]:
     """获取所有搜索引擎工具信息"""
     tools = []
+    selected_engine = default_search_engine()
     
     # Tavily Search
     tavily_enabled = bool(os.getenv("TAVILY_API_KEY"))
@@ -67,7 +69,7 @@ def get_search_engine_info() -> List[ToolInfo]:
         name="tavily_search",
         type="search",
         description="Tavily AI-powered search engine with real-time web results",
-        enabled=tavily_enabled and SELECTED_SEARCH_ENGINE == SearchEngine.TAVILY.value,
+        enabled=tavily_enabled and selected_engine == SearchEngine.TAVILY.value,
         config={
             "api_key_set": bool(os.getenv("TAVILY_API_KEY")),
             "max_results": 10,
@@ -82,7 +84,7 @@ def get_search_engine_info() -> List[ToolInfo]:
         name="duckduckgo_search",
         type="search",
         description="DuckDuckGo privacy-focused search engine",
-        enabled=SELECTED_SEARCH_ENGINE == SearchEngine.DUCKDUCKGO.value,
+        enabled=selected_engine == SearchEngine.DUCKDUCKGO.value,
         config={
             "max_results": 10,
             "region": "us-en",
@@ -97,7 +99,7 @@ def get_search_engine_info() -> List[ToolInfo]:
         name="brave_search",
         type="search",
         description="Brave independent search engine",
-        enabled=brave_enabled and SELECTED_SEARCH_ENGINE == SearchEngine.BRAVE_SEARCH.value,
+        enabled=brave_enabled and selected_engine == SearchEngine.BRAVE_SEARCH.value,
         config={
             "api_key_set": bool(os.getenv("BRAVE_SEARCH_API_KEY")),
             "max_results": 10,
@@ -112,7 +114,7 @@ def get_search_engine_info() -> List[ToolInfo]:
         name="arxiv_search",
         type="academic",
         description="ArXiv academic paper search",
-        enabled=SELECTED_SEARCH_ENGINE == SearchEngine.ARXIV.value,
+        enabled=selected_engine == SearchEngine.ARXIV.value,
         config={
             "max_results": 10,
             "sort_by": "relevance",
@@ -154,7 +156,7 @@ async def get_tools(user_id: str = Depends(get_user_id_or_default)):
                 "tools": [tool.dict() for tool in tools],
                 "enabled_count": enabled_count,
                 "total": total_count,
-                "current_search_engine": SELECTED_SEARCH_ENGINE,
+                "current_search_engine": default_search_engine(),
                 "user_id": user_id,
                 "personalized": appwrite_service.is_available()
             },
@@ -188,13 +190,11 @@ async def test_tool(request: ToolTestRequest):
             "arxiv_search": SearchEngine.ARXIV.value
         }
         
-        # 临时设置搜索引擎（仅用于测试）
-        original_engine = SELECTED_SEARCH_ENGINE
         test_engine = engine_map[request.tool_name]
         
         try:
             # 获取搜索工具并执行测试
-            search_tool = get_web_search_tool(max_search_results=3)
+            search_tool = get_web_search_tool(max_search_results=3, engine=test_engine)
             result = search_tool.run(request.test_query)
             
             end_time = datetime.now()
@@ -292,12 +292,13 @@ async def get_search_engines():
     """获取可用的搜索引擎列表"""
     try:
         engines = []
+        selected_engine = default_search_engine()
         
         for engine in SearchEngine:
             engine_info = {
                 "name": engine.value,
                 "display_name": engine.value.replace("_", " ").title(),
-                "enabled": engine.value == SELECTED_SEARCH_ENGINE,
+                "enabled": engine.value == selected_engine,
                 "requires_api_key": engine.value in ["tavily", "brave_search"]
             }
             
@@ -315,7 +316,7 @@ async def get_search_engines():
             success=True,
             data={
                 "engines": engines,
-                "current": SELECTED_SEARCH_ENGINE
+                "current": selected_engine
             },
             message="Search engines retrieved successfully"
         )
@@ -1,9 +1,11 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import json
 import logging
-from typing import Optional
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from src.services.appwrite_service import appwrite_service
 from server.middleware.auth import get_current_user_id, require_user_id, get_user_id_or_default
@@ -256,10 +258,17 @@ async def update_tool_config(
         )
 
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
 @router.get("/list", response_model=ApiResponse)
 async def list_users(
     limit: int = Query(25, ge=1, le=100, description="Number of users to return"),
-    offset: int = Query(0, ge=0, description="Number of users to skip")
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated attributes to return")
 ):
     """List users with their configurations (admin endpoint)."""
     try:
@@ -270,15 +279,17 @@ async def list_users(
                 message="Please configure Appwrite to enable user management"
             )
         
-        users = await appwrite_service.list_users_with_configs(limit=limit, offset=offset)
+        page = await appwrite_service.list_users_with_configs(
+            limit=limit, cursor=cursor, fields=_parse_fields(fields)
+        )
         
         return ApiResponse(
             success=True,
             data={
-                "users": users,
-                "total": len(users),
+                "users": page["documents"],
+                "total": page["total"],
                 "limit": limit,
-                "offset": offset
+                "next_cursor": page["next_cursor"]
             },
             message="Users retrieved successfully"
         )
@@ -292,6 +303,21 @@ async def list_users(
         )
 
 
+@router.get("/export")
+async def export_users(
+    fields: Optional[str] = Query(None, description="Comma-separated attributes to return")
+):
+    """Stream all users with their configurations as NDJSON (admin endpoint)."""
+    if not appwrite_service.is_available():
+        raise HTTPException(status_code=503, detail="User management service is not available")
+    
+    async def generate():
+        async for document in appwrite_service.iter_users_with_configs(fields=_parse_fields(fields)):
+            yield json.dumps(document, ensure_ascii=False, default=str) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/health", response_model=ApiResponse)
 async def user_service_health():
     """Check user service health."""
@@ -0,0 +1,136 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+StreamEvent = tuple[str, dict[str, Any]]
+
+
+def dumps_event_data(data: dict[str, Any]) -> str:
+    """Serialize SSE event data, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, default=_default)
+
+
+def make_event(event_type: str, data: dict[str, Any]) -> str:
+    """Format an SSE frame. Empty content is dropped to keep frames small."""
+    if data.get("content") == "":
+        data.pop("content")
+    return f"event: {event_type}\ndata: {dumps_event_data(data)}\n\n"
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    return str(obj)
+
+
+class MessageChunkCoalescer:
+    """Merges consecutive `message_chunk` events of the same message.
+
+    Token streams produce one event per chunk, each carrying the same
+    envelope. Consecutive chunks of one message are merged until the merged
+    content reaches `max_chars`, the chunk carries a finish reason, or an
+    event of another kind arrives. The caller flushes on the time window.
+    """
+
+    def __init__(self, window_seconds: float, max_chars: int):
+        self.window_seconds = window_seconds
+        self.max_chars = max_chars
+        self._pending: Optional[dict[str, Any]] = None
+        self._pending_since = 0.0
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """Monotonic time at which the pending chunk must be flushed."""
+        if self._pending is None:
+            return None
+        return self._pending_since + self.window_seconds
+
+    def add(self, event_type: str, data: dict[str, Any]) -> list[StreamEvent]:
+        """Add an event and return the events that are ready to be sent."""
+        if event_type != "message_chunk" or not isinstance(
+            data.get("content", ""), str
+        ):
+            return self.flush() + [(event_type, data)]
+
+        ready = []
+        if self._pending is not None and self._pending.get("id") != data.get("id"):
+            ready = self.flush()
+        if self._pending is None:
+            self._pending = dict(data)
+            self._pending_since = time.monotonic()
+        else:
+            for key in ("content", "reasoning_content"):
+                if key in data:
+                    self._pending[key] = self._pending.get(key, "") + data[key]
+            if "finish_reason" in data:
+                self._pending["finish_reason"] = data["finish_reason"]
+
+        if (
+            "finish_reason" in self._pending
+            or len(self._pending.get("content", "")) >= self.max_chars
+            or time.monotonic() >= self.deadline
+        ):
+            ready += self.flush()
+        return ready
+
+    def flush(self) -> list[StreamEvent]:
+        """Return the pending merged chunk, if any."""
+        if self._pending is None:
+            return []
+        pending, self._pending = self._pending, None
+        return [("message_chunk", pending)]
+
+
+async def coalesce_message_chunks(
+    events: AsyncIterator[StreamEvent], window_seconds: float, max_chars: int
+) -> AsyncIterator[StreamEvent]:
+    """Coalesce message chunks from an event stream.
+
+    A pending chunk is flushed once the window elapses even if the upstream
+    stream is idle, so coalescing never delays tokens by more than the window.
+    A window of zero disables coalescing.
+    """
+    if window_seconds <= 0:
+        async for event in events:
+            yield event
+        return
+
+    coalescer = MessageChunkCoalescer(window_seconds, max_chars)
+    iterator = events.__aiter__()
+    next_event: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(iterator.__anext__())
+            deadline = coalescer.deadline
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            done, _ = await asyncio.wait({next_event}, timeout=timeout)
+            if not done:
+                for event in coalescer.flush():
+                    yield event
+                continue
+            finished, next_event = next_event, None
+            try:
+                event_type, data = finished.result()
+            except StopAsyncIteration:
+                break
+            for event in coalescer.add(event_type, data):
+                yield event
+        for event in coalescer.flush():
+            yield event
+    finally:
+        if next_event is not None and not next_event.done():
+            next_event.cancel()
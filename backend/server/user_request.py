@@ -77,7 +77,7 @@ class UserListResponse(BaseModel):
     users: List[UserConfigResponse] = Field(..., description="List of users with configurations")
     total: int = Field(..., description="Total number of users")
     limit: int = Field(..., description="Limit used for pagination")
-    offset: int = Field(..., description="Offset used for pagination")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, None on the last page")
 
 
 class ApiResponse(BaseModel):
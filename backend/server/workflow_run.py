@@ -0,0 +1,275 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Workflow runs that outlive the HTTP connection that started them.
+
+A run writes every event into its thread's replay buffer. Clients attach to
+the buffer as subscribers, so streams can be resumed with `Last-Event-ID`
+and background jobs can be followed by any number of clients. When the
+server shuts down, active runs are drained before the process exits.
+
+Buffers and runs live in the memory of the worker process running them. With
+several workers, a client resuming a stream has to reach the same worker
+again (sticky routing by thread), otherwise it gets 404.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+
+from src.utils.cancellation import CancellationToken, bind_cancellation_token
+from server.event_buffer import EventBuffer, EventBufferRegistry
+from server.stream_utils import make_event
+
+logger = logging.getLogger(__name__)
+
+# How often (in seconds) to check whether the client is still connected
+DISCONNECT_POLL_INTERVAL = float(os.getenv("CHAT_DISCONNECT_POLL_INTERVAL", "1.0"))
+
+# How long (in seconds) a run keeps going without any connected client
+RECONNECT_GRACE_PERIOD = float(os.getenv("CHAT_RECONNECT_GRACE_PERIOD", "30"))
+
+# How long (in seconds) runs get to finish once the server is shutting down
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+
+INTERNAL_SERVER_ERROR_DETAIL = "Internal Server Error"
+
+SHUTDOWN_REASON = "server shutting down"
+
+# Replay buffers for reconnecting clients, one per thread
+event_buffers = EventBufferRegistry(
+    max_events=int(os.getenv("CHAT_EVENT_BUFFER_MAX_EVENTS", "5000")),
+    max_bytes=int(os.getenv("CHAT_EVENT_BUFFER_MAX_BYTES", str(8 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("CHAT_EVENT_BUFFER_TTL", "600")),
+    max_threads=int(os.getenv("CHAT_EVENT_BUFFER_MAX_THREADS", "1000")),
+)
+
+# Runs that are still in progress, keyed by thread ID
+active_runs: dict[str, "WorkflowRun"] = {}
+
+
+class WorkflowRun:
+    """A workflow run that writes its events into the thread's replay buffer.
+
+    The run is decoupled from the connection that started it. Clients attach
+    and detach as subscribers, and unless `cancel_when_abandoned` is False the
+    run is cancelled once it has had no subscriber for RECONNECT_GRACE_PERIOD
+    seconds. Cancellation binds a CancellationToken to the run's context, so
+    nodes and tools running in executor threads stop cooperatively while
+    in-flight coroutines (agents, MCP sessions) are cancelled outright.
+    Progress up to the last completed step stays in the checkpointer and can
+    be resumed with `resume=True`.
+    """
+
+    def __init__(
+        self,
+        thread_id: str,
+        events: AsyncIterator[str],
+        buffer: Optional[EventBuffer] = None,
+        cancel_when_abandoned: bool = True,
+        owner: Optional[str] = None,
+    ):
+        """
+        Raises:
+            HTTPException: 409 if the thread's buffer or active run belongs to
+                another owner than the run's
+        """
+        if buffer is not None:
+            owner = buffer.owner
+        # Only a run of the same owner is superseded
+        reject_if_thread_taken(thread_id, owner)
+        self.thread_id = thread_id
+        self.token = CancellationToken(thread_id)
+        self.buffer = (
+            buffer
+            if buffer is not None
+            else event_buffers.create(thread_id, owner=owner)
+        )
+        self.cancel_when_abandoned = cancel_when_abandoned
+        self.subscribers = 0
+        self.error: Optional[BaseException] = None
+        self.cancel_reason: Optional[str] = None
+        self._abandon_handle: Optional[asyncio.TimerHandle] = None
+
+        previous_run = active_runs.get(thread_id)
+        if previous_run is not None:
+            previous_run.cancel("superseded by a new request")
+        active_runs[thread_id] = self
+        self.task = asyncio.create_task(self._produce(events))
+        self.task.add_done_callback(self._on_done)
+        # Counts as abandoned until the first client attaches, in case the
+        # client is gone before its response starts streaming
+        self._schedule_abandon(max(RECONNECT_GRACE_PERIOD, DISCONNECT_POLL_INTERVAL))
+
+    async def _produce(self, events: AsyncIterator[str]):
+        bind_cancellation_token(self.token)
+        try:
+            async for event in events:
+                self.buffer.append(event)
+        except asyncio.CancelledError:
+            if self.cancel_reason == SHUTDOWN_REASON:
+                # Tell subscribers to continue the run elsewhere
+                self.buffer.append(
+                    make_event(
+                        "error",
+                        {
+                            "thread_id": self.thread_id,
+                            "error": "Server is shutting down",
+                            "resumable": True,
+                        },
+                    )
+                )
+            raise
+        except Exception as e:
+            logger.exception(f"Workflow for thread {self.thread_id} failed: {e}")
+            self.error = e
+            self.buffer.append(
+                make_event(
+                    "error",
+                    {
+                        "thread_id": self.thread_id,
+                        "error": INTERNAL_SERVER_ERROR_DETAIL,
+                    },
+                )
+            )
+        finally:
+            self.buffer.close()
+
+    def _on_done(self, _task: asyncio.Task):
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+        if active_runs.get(self.thread_id) is self:
+            del active_runs[self.thread_id]
+
+    def attach(self):
+        self.subscribers += 1
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+
+    def detach(self):
+        self.subscribers -= 1
+        self._schedule_abandon()
+
+    def _schedule_abandon(self, delay: Optional[float] = None):
+        if self.subscribers > 0 or self.task.done() or not self.cancel_when_abandoned:
+            return
+        if delay is None:
+            delay = RECONNECT_GRACE_PERIOD
+        if delay > 0:
+            self._abandon_handle = asyncio.get_running_loop().call_later(
+                delay, self.cancel, "client disconnected"
+            )
+        else:
+            self.cancel("client disconnected")
+
+    def cancel(self, reason: str):
+        if not self.task.done():
+            self.cancel_reason = reason
+            self.token.cancel(reason)
+            self.task.cancel()
+
+
+_drain_task: Optional[asyncio.Task] = None
+
+
+def is_draining() -> bool:
+    """Whether the server is shutting down and no longer starts runs."""
+    return _drain_task is not None
+
+
+def start_draining(timeout: float = SHUTDOWN_DRAIN_TIMEOUT) -> asyncio.Task:
+    """Stop starting runs and give the active ones `timeout` seconds to finish.
+
+    Runs still going after that are cancelled with a final resumable "error"
+    event; their progress up to the last completed step stays in the
+    checkpointer and any worker sharing it can continue the run with
+    `resume=True`. Idempotent, returns the task draining the runs.
+    """
+    global _drain_task
+    if _drain_task is None:
+        _drain_task = asyncio.get_running_loop().create_task(_drain_runs(timeout))
+    return _drain_task
+
+
+def reject_if_draining() -> None:
+    """Refuse to start runs on a worker that is shutting down, so that clients
+    (or the load balancer) retry on another one."""
+    if is_draining():
+        raise HTTPException(
+            status_code=503,
+            detail="Server is shutting down",
+            headers={"Retry-After": "1"},
+        )
+
+
+def reject_if_thread_taken(thread_id: str, owner: Optional[str]) -> None:
+    """Refuse to start a run on a thread whose buffer or active run belongs to
+    another user, which would cancel their run and take over their buffer."""
+    buffer = event_buffers.get(thread_id)
+    run = active_runs.get(thread_id)
+    if (buffer is not None and buffer.owner != owner) or (
+        run is not None and run.buffer.owner != owner
+    ):
+        raise HTTPException(
+            status_code=409, detail=f"Thread {thread_id} is in use by another user"
+        )
+
+
+async def _drain_runs(timeout: float) -> None:
+    runs = list(active_runs.values())
+    if not runs:
+        return
+    logger.info(f"Waiting up to {timeout}s for {len(runs)} active run(s) to finish")
+    await asyncio.wait([run.task for run in runs], timeout=timeout)
+    pending = [run for run in runs if not run.task.done()]
+    if pending:
+        logger.warning(f"Cancelling {len(pending)} run(s) still active at shutdown")
+        for run in pending:
+            run.cancel(SHUTDOWN_REASON)
+        await asyncio.gather(*(run.task for run in pending), return_exceptions=True)
+
+
+async def stream_events(
+    http_request: Request,
+    buffer: EventBuffer,
+    last_event_id: int,
+    run: Optional[WorkflowRun] = None,
+):
+    """Stream the buffered events after last_event_id, then follow the live tail
+    until the run finishes or the client disconnects."""
+    if run is not None:
+        run.attach()
+    cursor = last_event_id
+    last_check = time.monotonic()
+    try:
+        while True:
+            for cursor, frame in buffer.events_after(cursor):
+                yield frame
+            if buffer.closed and cursor >= buffer.last_id:
+                return
+            await buffer.wait_for_events(cursor, DISCONNECT_POLL_INTERVAL)
+            if time.monotonic() - last_check >= DISCONNECT_POLL_INTERVAL:
+                last_check = time.monotonic()
+                if await http_request.is_disconnected():
+                    logger.info(f"Client disconnected from thread {buffer.thread_id}")
+                    return
+    finally:
+        if run is not None:
+            run.detach()
+
+
+def parse_last_event_id(http_request: Request) -> Optional[int]:
+    """Return the Last-Event-ID header as an integer, or None if absent."""
+    value = http_request.headers.get("Last-Event-ID")
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID header")
@@ -1,19 +1,80 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.tools import BaseTool
 from langgraph.prebuilt import create_react_agent
 
 from src.prompts import apply_prompt_template
 from src.llms.llm import get_llm_by_type
 from src.config.agents import AGENT_LLM_MAP
+from src.utils.metrics import CacheStats, registry
+
+# Compiled agents, keyed by agent, tool set and model
+_agent_cache: OrderedDict[tuple, object] = OrderedDict()
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "32"))
+_agent_cache_stats = CacheStats()
+registry.register_cache("agents", _agent_cache_stats)
+
+
+def _tool_fingerprint(tools: list) -> tuple:
+    """Identify a tool set by the tools' names, descriptions and identities.
+
+    Copies of a StructuredTool (e.g. MCP tools with a prefixed description)
+    share the same coroutine, so they fingerprint the same as long as the
+    description does. Cached agents keep their tools alive, so object IDs in
+    the cache are never reused.
+    """
+    fingerprint = []
+    for tool in tools:
+        identity = tool
+        if isinstance(tool, BaseTool):
+            identity = (
+                getattr(tool, "coroutine", None) or getattr(tool, "func", None) or tool
+            )
+        fingerprint.append(
+            (
+                getattr(tool, "name", None),
+                getattr(tool, "description", None),
+                id(identity),
+            )
+        )
+    return tuple(fingerprint)
 
 
 # Create agents using configured LLM types
-def create_agent(agent_name: str, agent_type: str, tools: list, prompt_template: str):
-    """Factory function to create agents with consistent configuration."""
-    return create_react_agent(
+def create_agent(
+    agent_name: str,
+    agent_type: str,
+    tools: list,
+    prompt_template: str,
+    model_name: Optional[str] = None,
+):
+    """Factory function to create agents with consistent configuration.
+
+    Agents are compiled once per (agent, tool set, model) and reused; the
+    prompt is rendered from the state of each invocation. `model_name`
+    selects another available model of the agent's LLM type.
+    """
+    model = get_llm_by_type(AGENT_LLM_MAP[agent_type], model_name)
+    key = (agent_name, agent_type, prompt_template, _tool_fingerprint(tools), id(model))
+    agent = _agent_cache.get(key)
+    if agent is not None:
+        _agent_cache_stats.hits += 1
+        _agent_cache.move_to_end(key)
+        return agent
+    _agent_cache_stats.misses += 1
+
+    agent = create_react_agent(
         name=agent_name,
-        model=get_llm_by_type(AGENT_LLM_MAP[agent_type]),
+        model=model,
         tools=tools,
         prompt=lambda state: apply_prompt_template(prompt_template, state),
     )
+    _agent_cache[key] = agent
+    while len(_agent_cache) > AGENT_CACHE_SIZE:
+        _agent_cache.popitem(last=False)
+    return agent
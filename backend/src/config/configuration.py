@@ -24,6 +24,21 @@ class Configuration:
     mcp_settings: dict = None  # MCP settings, including dynamic loaded tools
     report_style: str = ReportStyle.ACADEMIC.value  # Report style
     enable_deep_thinking: bool = False  # Whether to enable deep thinking
+    # Selected per request; the server defaults (SEARCH_API, RAG_PROVIDER and
+    # conf.yaml) apply when unset, so these are not read from the environment
+    search_engine: Optional[str] = field(
+        default=None, metadata={"env": False}
+    )  # Search engine of the run
+    rag_provider: Optional[str] = field(
+        default=None, metadata={"env": False}
+    )  # RAG provider of the run
+    models: dict = field(
+        default=None, metadata={"env": False}
+    )  # Model name per LLM type, e.g. {"basic": "gpt-4o"}
+
+    def model_for(self, llm_type: str) -> Optional[str]:
+        """The model selected for an LLM type, None for the configured one."""
+        return (self.models or {}).get(llm_type)
 
     @classmethod
     def from_runnable_config(
@@ -34,7 +49,11 @@ class Configuration:
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
+            f.name: (
+                os.environ.get(f.name.upper(), configurable.get(f.name))
+                if f.metadata.get("env", True)
+                else configurable.get(f.name)
+            )
             for f in fields(cls)
             if f.init
         }
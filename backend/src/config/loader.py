@@ -3,29 +3,34 @@
 
 import os
 import yaml
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional
 
 
-def replace_env_vars(value: str) -> str:
+def replace_env_vars(value: str, env: Optional[Mapping[str, str]] = None) -> str:
     """Replace environment variables in string values."""
     if not isinstance(value, str):
         return value
     if value.startswith("$"):
         env_var = value[1:]
-        return os.getenv(env_var, env_var)
+        return (os.environ if env is None else env).get(env_var, env_var)
     return value
 
 
-def process_dict(config: Dict[str, Any]) -> Dict[str, Any]:
-    """Recursively process dictionary to replace environment variables."""
+def process_dict(
+    config: Dict[str, Any], env: Optional[Mapping[str, str]] = None
+) -> Dict[str, Any]:
+    """Recursively process dictionary to replace environment variables.
+
+    Variables are looked up in `env`, by default the process environment.
+    """
     if not config:
         return {}
     result = {}
     for key, value in config.items():
         if isinstance(value, dict):
-            result[key] = process_dict(value)
+            result[key] = process_dict(value, env)
         elif isinstance(value, str):
-            result[key] = replace_env_vars(value)
+            result[key] = replace_env_vars(value, env)
         else:
             result[key] = value
     return result
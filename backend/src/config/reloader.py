@@ -0,0 +1,283 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Configuration that is reloaded while the server runs.
+
+`conf.yaml` and `.env` are polled for changes (by modification time and
+size). A change is loaded into a new, versioned ConfigSnapshot, validated,
+and only then published, together with the new environment variables: an
+invalid file is logged and the previous configuration stays in effect.
+
+Each section of the configuration (a model section of conf.yaml such as
+BASIC_MODEL with its `BASIC_MODEL__*` environment overrides, or a group of
+environment variables such as the search engine credentials) carries the
+version it last changed in. Caches of clients and tools key on the version
+of the section they are built from, so a reload only rebuilds what it
+affects. A research run binds the snapshot it started with, so its nodes
+keep using the same models even if the configuration changes midway.
+
+Configuration:
+    CONFIG_RELOAD_INTERVAL: Seconds between checks for changes; 0 disables
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Mapping, Optional
+
+import yaml
+from dotenv import dotenv_values, find_dotenv
+
+from .loader import _config_cache, process_dict
+
+logger = logging.getLogger(__name__)
+
+CONFIG_RELOAD_INTERVAL = float(os.getenv("CONFIG_RELOAD_INTERVAL", "5"))
+
+CONF_FILE = str((Path(__file__).parent.parent.parent / "conf.yaml").resolve())
+ENV_FILE = (
+    os.getenv("ENV_FILE")
+    or find_dotenv()
+    or str((Path(__file__).parent.parent.parent / ".env").resolve())
+)
+
+# Sections made of environment variables only
+ENV_SECTIONS: dict[str, tuple[str, ...]] = {
+    "search": ("SEARCH_API", "TAVILY_API_KEY", "BRAVE_SEARCH_API_KEY"),
+    "rag": ("RAG_PROVIDER", "RAGFLOW_API_URL", "RAGFLOW_API_KEY", "RAGFLOW_PAGE_SIZE"),
+}
+
+
+class ConfigError(Exception):
+    """Raised when a changed configuration is invalid."""
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """An immutable version of conf.yaml and the environment."""
+
+    version: int
+    conf: dict[str, Any]
+    env: Mapping[str, str]
+    section_versions: Mapping[str, int] = field(default_factory=dict)
+
+    def section_version(self, section: str) -> int:
+        """The version the section last changed in."""
+        return self.section_versions.get(section, 0)
+
+
+def _section_value(section: str, conf: dict[str, Any], env: Mapping[str, str]):
+    if section in ENV_SECTIONS:
+        return tuple(env.get(key) for key in ENV_SECTIONS[section])
+    prefix = f"{section}__"
+    overrides = sorted((k, v) for k, v in env.items() if k.startswith(prefix))
+    return (conf.get(section), overrides)
+
+
+def validate_conf(conf: Any) -> None:
+    """Check the structure of conf.yaml.
+
+    Raises:
+        ConfigError: If the file is not a mapping or a model section is not a
+            mapping of settings
+    """
+    if not isinstance(conf, dict):
+        raise ConfigError("conf.yaml must contain a mapping")
+    for key, value in conf.items():
+        if key.endswith("_MODEL") and not isinstance(value, dict):
+            raise ConfigError(f"{key} must be a mapping of model settings")
+
+
+class ConfigReloader:
+    """Publishes validated snapshots of conf.yaml and .env as they change."""
+
+    def __init__(self, conf_file: str = CONF_FILE, env_file: str = ENV_FILE):
+        self.conf_file = conf_file
+        self.env_file = env_file
+        self._lock = threading.Lock()
+        self._validators: list[Callable[[ConfigSnapshot], None]] = []
+        self._listeners: list[Callable[[ConfigSnapshot, ConfigSnapshot], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stamps = self._file_stamps()
+        # Variables set by the process environment take precedence over .env,
+        # as with load_dotenv; only the others follow changes of the file
+        self._env_file_values = self._read_env_file()
+        self._pinned_env = {
+            key
+            for key, value in os.environ.items()
+            if self._env_file_values.get(key) != value
+        }
+        env = dict(os.environ)
+        try:
+            conf = self._read_conf(env)
+        except Exception as e:
+            # Models fail to be created until the file is fixed
+            logger.error(f"Failed to load {self.conf_file}: {e}")
+            conf = {}
+        self._snapshot = ConfigSnapshot(
+            version=1,
+            conf=conf,
+            env=env,
+            section_versions={s: 1 for s in self._sections(conf)},
+        )
+
+    def add_validator(self, validator: Callable[[ConfigSnapshot], None]) -> None:
+        """Add a check that a new snapshot has to pass (by not raising) before
+        it is published, e.g. that its models can be created."""
+        self._validators.append(validator)
+
+    def on_reload(self, listener: Callable[[ConfigSnapshot, ConfigSnapshot], None]):
+        """Add a function called with the old and new snapshot after a reload,
+        e.g. to drop cached clients of changed sections."""
+        self._listeners.append(listener)
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        return self._snapshot
+
+    def check_for_changes(self) -> bool:
+        """Reload if conf.yaml or .env changed since the last check.
+
+        Returns:
+            Whether a new snapshot was published
+        """
+        stamps = self._file_stamps()
+        if stamps == self._stamps:
+            return False
+        self._stamps = stamps
+        try:
+            self.reload()
+        except Exception as e:
+            logger.error(f"Keeping configuration v{self._snapshot.version}: {e}")
+            return False
+        return True
+
+    def reload(self) -> ConfigSnapshot:
+        """Load, validate and publish the current files.
+
+        Raises:
+            ConfigError: If the new configuration is invalid; nothing changes
+        """
+        with self._lock:
+            old = self._snapshot
+            env_file_values = self._read_env_file()
+            env = dict(os.environ)
+            for key in self._env_file_values:
+                if key not in self._pinned_env and key not in env_file_values:
+                    env.pop(key, None)
+            for key, value in env_file_values.items():
+                if key not in self._pinned_env and value is not None:
+                    env[key] = value
+
+            try:
+                conf = self._read_conf(env)
+            except yaml.YAMLError as e:
+                raise ConfigError(f"conf.yaml is not valid YAML: {e}") from e
+            version = old.version + 1
+            section_versions = {
+                section: (
+                    old.section_version(section)
+                    if section in old.section_versions
+                    and _section_value(section, conf, env)
+                    == _section_value(section, old.conf, old.env)
+                    else version
+                )
+                for section in self._sections(conf)
+            }
+            new = ConfigSnapshot(version, conf, env, section_versions)
+            for validator in self._validators:
+                try:
+                    validator(new)
+                except Exception as e:
+                    raise ConfigError(str(e)) from e
+
+            # Publish: environment first, so that clients created from the new
+            # snapshot read the new credentials
+            for key in set(os.environ) - set(env):
+                del os.environ[key]
+            for key, value in env.items():
+                if os.environ.get(key) != value:
+                    os.environ[key] = value
+            self._env_file_values = env_file_values
+            _config_cache.pop(self.conf_file, None)
+            self._snapshot = new
+
+        changed = sorted(s for s, v in section_versions.items() if v == version)
+        logger.info(
+            f"Loaded configuration v{version}, changed: {', '.join(changed) or 'none'}"
+        )
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.warning(f"Failed to apply configuration v{version}: {e}")
+        return new
+
+    def start_watching(self, interval: float = CONFIG_RELOAD_INTERVAL) -> None:
+        """Check for changes every `interval` seconds on the running loop."""
+        if interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._watch(interval))
+
+    def stop_watching(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            # Validators may create clients, keep that off the event loop
+            await asyncio.to_thread(self.check_for_changes)
+
+    def _file_stamps(self) -> tuple:
+        stamps = []
+        for path in (self.conf_file, self.env_file):
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _read_env_file(self) -> dict[str, Optional[str]]:
+        if not os.path.exists(self.env_file):
+            return {}
+        return dict(dotenv_values(self.env_file))
+
+    def _read_conf(self, env: Mapping[str, str]) -> dict[str, Any]:
+        if not os.path.exists(self.conf_file):
+            return {}
+        with open(self.conf_file, "r") as f:
+            conf = yaml.safe_load(f)
+        if conf is None:
+            return {}
+        validate_conf(conf)
+        return process_dict(conf, env)
+
+    @staticmethod
+    def _sections(conf: dict[str, Any]) -> list[str]:
+        return [*conf, *ENV_SECTIONS]
+
+
+config_reloader = ConfigReloader()
+
+_bound_snapshot: contextvars.ContextVar[Optional[ConfigSnapshot]] = (
+    contextvars.ContextVar("config_snapshot", default=None)
+)
+
+
+def bind_config_snapshot(snapshot: ConfigSnapshot) -> contextvars.Token:
+    """Pin the configuration of the current context (e.g. a research run) and
+    return the reset handle."""
+    return _bound_snapshot.set(snapshot)
+
+
+def current_config() -> ConfigSnapshot:
+    """The snapshot bound to the current context, or the latest one."""
+    return _bound_snapshot.get() or config_reloader.snapshot
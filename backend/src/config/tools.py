@@ -3,6 +3,8 @@
 
 import os
 import enum
+from typing import Optional
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,7 +17,9 @@ class SearchEngine(enum.Enum):
     ARXIV = "arxiv"
 
 
-# Tool configuration
+# Tool configuration. These are the defaults at startup; runs resolve their
+# engine and provider with the functions below, which follow reloads of .env
+# and selections made per request.
 SELECTED_SEARCH_ENGINE = os.getenv("SEARCH_API", SearchEngine.TAVILY.value)
 
 
@@ -24,3 +28,65 @@ class RAGProvider(enum.Enum):
 
 
 SELECTED_RAG_PROVIDER = os.getenv("RAG_PROVIDER")
+
+# Credentials an engine or provider cannot be used without
+SEARCH_ENGINE_CREDENTIALS: dict[str, tuple[str, ...]] = {
+    SearchEngine.TAVILY.value: ("TAVILY_API_KEY",),
+    SearchEngine.BRAVE_SEARCH.value: ("BRAVE_SEARCH_API_KEY",),
+}
+RAG_PROVIDER_CREDENTIALS: dict[str, tuple[str, ...]] = {
+    RAGProvider.RAGFLOW.value: ("RAGFLOW_API_URL", "RAGFLOW_API_KEY"),
+}
+
+
+def _env():
+    # Imported here, the reloader reads the environment loaded above
+    from .reloader import current_config
+
+    return current_config().env
+
+
+def default_search_engine() -> str:
+    """The search engine of runs that do not select one (SEARCH_API)."""
+    return _env().get("SEARCH_API") or SearchEngine.TAVILY.value
+
+
+def default_rag_provider() -> Optional[str]:
+    """The RAG provider of runs that do not select one (RAG_PROVIDER)."""
+    return _env().get("RAG_PROVIDER") or None
+
+
+def resolve_search_engine(engine: Optional[str] = None) -> str:
+    """Return `engine`, or the default if None.
+
+    Raises:
+        ValueError: If the engine is unknown
+    """
+    engine = engine or default_search_engine()
+    if engine not in {e.value for e in SearchEngine}:
+        raise ValueError(f"Unsupported search engine: {engine}")
+    return engine
+
+
+def resolve_rag_provider(provider: Optional[str] = None) -> Optional[str]:
+    """Return `provider`, or the default if None.
+
+    Raises:
+        ValueError: If the provider is unknown
+    """
+    provider = provider or default_rag_provider()
+    if provider and provider not in {p.value for p in RAGProvider}:
+        raise ValueError(f"Unsupported RAG provider: {provider}")
+    return provider
+
+
+def is_search_engine_configured(engine: str) -> bool:
+    """Whether the credentials the engine needs are set."""
+    env = _env()
+    return all(env.get(key) for key in SEARCH_ENGINE_CREDENTIALS.get(engine, ()))
+
+
+def is_rag_provider_configured(provider: str) -> bool:
+    """Whether the credentials the provider needs are set."""
+    env = _env()
+    return all(env.get(key) for key in RAG_PROVIDER_CREDENTIALS.get(provider, ()))
@@ -2,9 +2,11 @@
 # SPDX-License-Identifier: MIT
 
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
 from src.prompts.planner_model import StepType
+from src.utils.lazy import Lazy
 
+from .checkpoint import checkpointer
+from .instrumentation import instrument_node
 from .types import State
 from .nodes import (
     coordinator_node,
@@ -38,14 +40,19 @@ def _build_base_graph():
     """Build and return the base state graph with all nodes and edges."""
     builder = StateGraph(State)
     builder.add_edge(START, "coordinator")
-    builder.add_node("coordinator", coordinator_node)
-    builder.add_node("background_investigator", background_investigation_node)
-    builder.add_node("planner", planner_node)
-    builder.add_node("reporter", reporter_node)
-    builder.add_node("research_team", research_team_node)
-    builder.add_node("researcher", researcher_node)
-    builder.add_node("coder", coder_node)
-    builder.add_node("human_feedback", human_feedback_node)
+    nodes = {
+        "coordinator": coordinator_node,
+        "background_investigator": background_investigation_node,
+        "planner": planner_node,
+        "reporter": reporter_node,
+        "research_team": research_team_node,
+        "researcher": researcher_node,
+        "coder": coder_node,
+        "human_feedback": human_feedback_node,
+    }
+    for name, node in nodes.items():
+        # Time every node execution for the /metrics endpoint
+        builder.add_node(name, instrument_node(name, node))
     builder.add_edge("background_investigator", "planner")
     builder.add_conditional_edges(
         "research_team",
@@ -58,9 +65,9 @@ def _build_base_graph():
 
 def build_graph_with_memory():
     """Build and return the agent workflow graph with memory."""
-    # use persistent memory to save conversation history
-    # TODO: be compatible with SQLite / PostgreSQL
-    memory = MemorySaver()
+    # Thread state is kept in the checkpointer selected by CHECKPOINTER, which
+    # can be shared between server workers (see src.graph.checkpoint)
+    memory = checkpointer.get()
 
     # build state graph
     builder = _build_base_graph()
@@ -74,4 +81,5 @@ def build_graph():
     return builder.compile()
 
 
-graph = build_graph()
+# Compiled on first use, not when the module is imported
+graph = Lazy(build_graph)
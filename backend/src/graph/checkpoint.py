@@ -0,0 +1,270 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Checkpointer of the research graph.
+
+Thread state (messages, plan, observations, pending interrupts) lives in the
+checkpointer. The default in-memory saver is private to one process, so with
+several server workers a plan interrupted on one worker cannot be resumed on
+another. The SQLite and PostgreSQL savers share thread state between workers
+(and keep it across restarts).
+
+The in-memory saver is written to a snapshot file on shutdown and loaded
+again on startup, so runs interrupted by a restart of a single-worker server
+can still be resumed. Threads whose last checkpoint is older than the
+retention period are left out of it, and so are the oldest threads beyond the
+maximum count. With several workers only the one holding the snapshot's lock
+writes it, and any worker may pick up a requeued job, so runs are not treated
+as durable then.
+
+Configuration:
+    CHECKPOINTER: "memory" (default), "sqlite" or "postgres"
+    CHECKPOINTER_URL: Database file for sqlite, connection string for postgres
+    CHECKPOINTER_POOL_SIZE: Maximum number of PostgreSQL connections per worker
+    CHECKPOINTER_SNAPSHOT_FILE: Snapshot of the in-memory saver; empty disables
+    CHECKPOINTER_SNAPSHOT_RETENTION: Seconds a thread is kept in the snapshot
+        after its last checkpoint
+    CHECKPOINTER_SNAPSHOT_MAX_THREADS: Maximum number of threads in the snapshot
+    SERVER_WORKERS: Number of server workers, set by server.py
+"""
+
+import logging
+import os
+import pickle
+import time
+from datetime import datetime
+from pathlib import Path
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.utils.file_lock import try_lock
+from src.utils.lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINTER = os.getenv("CHECKPOINTER", "memory").lower()
+CHECKPOINTER_URL = os.getenv("CHECKPOINTER_URL", "")
+CHECKPOINTER_POOL_SIZE = int(os.getenv("CHECKPOINTER_POOL_SIZE", "10"))
+
+DEFAULT_SQLITE_PATH = str(
+    Path(__file__).parent.parent.parent / "data" / "checkpoints.sqlite"
+)
+CHECKPOINTER_SNAPSHOT_FILE = os.getenv(
+    "CHECKPOINTER_SNAPSHOT_FILE",
+    str(Path(__file__).parent.parent.parent / "data" / "checkpoints" / "memory.pkl"),
+)
+CHECKPOINTER_SNAPSHOT_RETENTION = float(
+    os.getenv("CHECKPOINTER_SNAPSHOT_RETENTION", str(7 * 24 * 3600))
+)
+CHECKPOINTER_SNAPSHOT_MAX_THREADS = int(
+    os.getenv("CHECKPOINTER_SNAPSHOT_MAX_THREADS", "1000")
+)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+
+
+class CheckpointerError(Exception):
+    """Raised when the configured checkpointer cannot be created."""
+
+
+def is_shared(kind: str = CHECKPOINTER) -> bool:
+    """Whether thread state is visible to every server worker."""
+    return kind != "memory"
+
+
+def is_durable(kind: str = CHECKPOINTER) -> bool:
+    """Whether thread state outlives the process and can be resumed by
+    whichever worker picks up the run."""
+    if is_shared(kind):
+        return True
+    return bool(CHECKPOINTER_SNAPSHOT_FILE) and SERVER_WORKERS <= 1
+
+
+def create_checkpointer(kind: str = CHECKPOINTER) -> BaseCheckpointSaver:
+    """Create the checkpointer selected by CHECKPOINTER.
+
+    The database savers are async-only and have to be set up with
+    `setup_checkpointer` on the server's event loop before first use.
+    """
+    if kind == "memory":
+        return MemorySaver()
+
+    if kind == "sqlite":
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError as e:
+            raise CheckpointerError(
+                "CHECKPOINTER=sqlite requires the langgraph-checkpoint-sqlite "
+                "and aiosqlite packages"
+            ) from e
+        path = CHECKPOINTER_URL or DEFAULT_SQLITE_PATH
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Storing thread state in SQLite database {path}")
+        return AsyncSqliteSaver(aiosqlite.connect(path))
+
+    if kind == "postgres":
+        try:
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+            from psycopg.rows import dict_row
+            from psycopg_pool import AsyncConnectionPool
+        except ImportError as e:
+            raise CheckpointerError(
+                "CHECKPOINTER=postgres requires the langgraph-checkpoint-postgres "
+                "and psycopg[pool] packages"
+            ) from e
+        if not CHECKPOINTER_URL:
+            raise CheckpointerError("CHECKPOINTER=postgres requires CHECKPOINTER_URL")
+        logger.info("Storing thread state in PostgreSQL")
+        pool = AsyncConnectionPool(
+            CHECKPOINTER_URL,
+            max_size=CHECKPOINTER_POOL_SIZE,
+            open=False,
+            kwargs={
+                "autocommit": True,
+                "prepare_threshold": 0,
+                "row_factory": dict_row,
+            },
+        )
+        return AsyncPostgresSaver(pool)
+
+    raise CheckpointerError(
+        f"Unknown CHECKPOINTER {kind!r}, expected memory, sqlite or postgres"
+    )
+
+
+# Shared by every graph built with memory in this process
+checkpointer = Lazy(create_checkpointer)
+
+
+def _last_checkpoint_times(saver: MemorySaver) -> dict[str, float]:
+    """The time of the latest checkpoint of each thread of an in-memory saver."""
+    times = {}
+    for thread_id, by_ns in saver.storage.items():
+        latest = 0.0
+        for checkpoints in by_ns.values():
+            for serialized, _, _ in checkpoints.values():
+                ts = saver.serde.loads_typed(serialized)["ts"]
+                latest = max(latest, datetime.fromisoformat(ts).timestamp())
+        times[thread_id] = latest
+    return times
+
+
+def _threads_to_keep(
+    saver: MemorySaver, retention_seconds: float, max_threads: int
+) -> set[str]:
+    """The most recent threads within the retention period."""
+    cutoff = time.time() - retention_seconds
+    times = _last_checkpoint_times(saver)
+    recent = sorted(
+        (thread_id for thread_id, ts in times.items() if ts >= cutoff),
+        key=times.__getitem__,
+        reverse=True,
+    )
+    return set(recent[:max_threads])
+
+
+def save_snapshot(
+    saver: MemorySaver,
+    path: str,
+    retention_seconds: float = CHECKPOINTER_SNAPSHOT_RETENTION,
+    max_threads: int = CHECKPOINTER_SNAPSHOT_MAX_THREADS,
+) -> int:
+    """Write the checkpoints of an in-memory saver to `path`.
+
+    Args:
+        saver: The in-memory saver
+        path: The snapshot file
+        retention_seconds: Threads without a checkpoint for this long are
+            left out
+        max_threads: Only the threads with the latest checkpoints up to this
+            number are written
+
+    Returns:
+        The number of threads written
+    """
+    keep = _threads_to_keep(saver, retention_seconds, max_threads)
+    data = {
+        "storage": {
+            thread_id: {ns: dict(checkpoints) for ns, checkpoints in by_ns.items()}
+            for thread_id, by_ns in saver.storage.items()
+            if thread_id in keep
+        },
+        "writes": {
+            key: dict(writes) for key, writes in saver.writes.items() if key[0] in keep
+        },
+        "blobs": {key: blob for key, blob in saver.blobs.items() if key[0] in keep},
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return len(data["storage"])
+
+
+def load_snapshot(saver: MemorySaver, path: str) -> int:
+    """Load checkpoints written by `save_snapshot` into an in-memory saver.
+
+    Returns:
+        The number of threads loaded
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    for thread_id, by_ns in data["storage"].items():
+        for ns, checkpoints in by_ns.items():
+            saver.storage[thread_id][ns].update(checkpoints)
+    for key, writes in data["writes"].items():
+        saver.writes[key].update(writes)
+    saver.blobs.update(data["blobs"])
+    return len(data["storage"])
+
+
+def _owns_snapshot() -> bool:
+    return bool(CHECKPOINTER_SNAPSHOT_FILE) and try_lock(
+        CHECKPOINTER_SNAPSHOT_FILE + ".lock"
+    )
+
+
+async def setup_checkpointer() -> None:
+    """Connect the checkpointer and create its tables if needed, or load the
+    snapshot of the in-memory saver."""
+    if not is_shared():
+        if _owns_snapshot():
+            try:
+                count = load_snapshot(checkpointer.get(), CHECKPOINTER_SNAPSHOT_FILE)
+            except Exception as e:
+                logger.warning(f"Failed to load the checkpoint snapshot: {e}")
+                return
+            if count:
+                logger.info(f"Restored the checkpoints of {count} thread(s)")
+        return
+    saver = checkpointer.get()
+    conn = saver.conn
+    if hasattr(conn, "open"):
+        # The PostgreSQL connection pool
+        await conn.open()
+    await saver.setup()
+
+
+async def close_checkpointer() -> None:
+    """Close the checkpointer's database connections, or write the snapshot
+    of the in-memory saver."""
+    if not checkpointer.created:
+        return
+    try:
+        if is_shared():
+            await checkpointer.get().conn.close()
+        elif _owns_snapshot():
+            count = save_snapshot(
+                checkpointer.get(),
+                CHECKPOINTER_SNAPSHOT_FILE,
+                CHECKPOINTER_SNAPSHOT_RETENTION,
+                CHECKPOINTER_SNAPSHOT_MAX_THREADS,
+            )
+            logger.info(f"Saved the checkpoints of {count} thread(s)")
+    except Exception as e:
+        logger.warning(f"Failed to close the checkpointer: {e}")
@@ -0,0 +1,316 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Metrics and traces for graph nodes, LLM calls and tool calls.
+
+Nodes are timed and traced by wrapping them when the graph is built. LLM and
+tool calls are timed by MetricsCallbackHandler, which is passed in the run
+config and therefore also sees the calls made by the ReAct agents inside the
+researcher and coder nodes. Calls are attributed to the top-level node they
+happen in. TracingCallbackHandler records LLM calls as spans; tools trace
+themselves (see src.tools.decorators).
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.errors import GraphBubbleUp
+
+from src.utils.metrics import Counter, Histogram, registry
+from src.utils.tracing import SPAN_KIND_CLIENT, tracer
+
+logger = logging.getLogger(__name__)
+
+node_duration = Histogram(
+    "deerflow_node_duration_seconds",
+    "Duration of graph node executions",
+    ["node", "status"],
+    registry=registry,
+)
+llm_duration = Histogram(
+    "deerflow_llm_duration_seconds",
+    "Duration of LLM calls",
+    ["agent", "model", "status"],
+    registry=registry,
+)
+llm_time_to_first_token = Histogram(
+    "deerflow_llm_time_to_first_token_seconds",
+    "Time from the start of a streamed LLM call to its first token",
+    ["agent", "model"],
+    registry=registry,
+)
+llm_tokens = Counter(
+    "deerflow_llm_tokens_total",
+    "Tokens used by LLM calls",
+    ["agent", "model", "type"],
+    registry=registry,
+)
+tool_duration = Histogram(
+    "deerflow_tool_duration_seconds",
+    "Duration of tool calls",
+    ["tool", "agent", "status"],
+    registry=registry,
+)
+
+
+def _status(error: Optional[BaseException]) -> str:
+    if error is None:
+        return "ok"
+    # Interrupts (e.g. waiting for plan feedback) are not failures
+    if isinstance(error, GraphBubbleUp):
+        return "interrupted"
+    return "error"
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """Wrap a graph node so that its executions are timed and traced.
+
+    The wrapper keeps the node's signature and annotations, which LangGraph
+    reads to pass the config and to find the node's destinations.
+    """
+
+    def finish(span, started: float, error: Optional[BaseException]) -> None:
+        status = _status(error)
+        if status == "error":
+            span.record_exception(error)
+        span.set_attribute("graph.node.status", status)
+        node_duration.observe(time.perf_counter() - started, node=name, status=status)
+
+    if inspect.iscoroutinefunction(node):
+
+        @functools.wraps(node)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = None
+            with tracer.start_as_current_span(
+                f"node {name}", attributes={"graph.node": name}, record_exception=False
+            ) as span:
+                try:
+                    return await node(*args, **kwargs)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    finish(span, started, error)
+
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        error = None
+        with tracer.start_as_current_span(
+            f"node {name}", attributes={"graph.node": name}, record_exception=False
+        ) as span:
+            try:
+                return node(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                finish(span, started, error)
+
+    return wrapper
+
+
+def agent_from_metadata(metadata: Optional[dict[str, Any]]) -> str:
+    """The top-level node a callback event belongs to."""
+    if not metadata:
+        return "unknown"
+    namespace = metadata.get("langgraph_checkpoint_ns") or ""
+    if namespace:
+        return namespace.split("|")[0].split(":")[0]
+    return metadata.get("langgraph_node") or "unknown"
+
+
+def token_usage(response: LLMResult) -> tuple[int, int]:
+    """Input and output tokens reported by an LLM response."""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage:
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+    if not input_tokens and not output_tokens and response.llm_output:
+        usage = response.llm_output.get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+    return input_tokens, output_tokens
+
+
+def model_from_params(params: Optional[dict[str, Any]]) -> str:
+    params = params or {}
+    return str(
+        params.get("model_name") or params.get("model") or params.get("_type") or ""
+    )
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records LLM latency, time to first token, token usage and tool
+    durations."""
+
+    # Timing is cheap; run in the caller's thread instead of an executor
+    run_inline = True
+
+    def __init__(self):
+        self._runs: dict[UUID, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, **values: Any) -> None:
+        with self._lock:
+            self._runs[run_id] = {"started": time.perf_counter(), **values}
+
+    def _finish(self, run_id: UUID) -> Optional[dict[str, Any]]:
+        with self._lock:
+            return self._runs.pop(run_id, None)
+
+    # LLM calls
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        self._start(
+            run_id,
+            agent=agent_from_metadata(metadata),
+            model=model_from_params(kwargs.get("invocation_params")),
+            first_token=False,
+        )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self.on_chat_model_start(
+            serialized, prompts, run_id=run_id, metadata=metadata, **kwargs
+        )
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs) -> None:
+        run = self._runs.get(run_id)
+        if run is None or run["first_token"]:
+            return
+        run["first_token"] = True
+        llm_time_to_first_token.observe(
+            time.perf_counter() - run["started"],
+            agent=run["agent"],
+            model=run["model"],
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs) -> None:
+        run = self._finish(run_id)
+        if run is None:
+            return
+        llm_duration.observe(
+            time.perf_counter() - run["started"],
+            agent=run["agent"],
+            model=run["model"],
+            status="ok",
+        )
+        input_tokens, output_tokens = token_usage(response)
+        if input_tokens:
+            llm_tokens.inc(
+                input_tokens, agent=run["agent"], model=run["model"], type="input"
+            )
+        if output_tokens:
+            llm_tokens.inc(
+                output_tokens, agent=run["agent"], model=run["model"], type="output"
+            )
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        run = self._finish(run_id)
+        if run is not None:
+            llm_duration.observe(
+                time.perf_counter() - run["started"],
+                agent=run["agent"],
+                model=run["model"],
+                status="error",
+            )
+
+    # Tool calls
+
+    def on_tool_start(
+        self, serialized, input_str, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        self._start(
+            run_id,
+            tool=(serialized or {}).get("name") or kwargs.get("name") or "unknown",
+            agent=agent_from_metadata(metadata),
+        )
+
+    def _end_tool(self, run_id: UUID, status: str) -> None:
+        run = self._finish(run_id)
+        if run is not None:
+            tool_duration.observe(
+                time.perf_counter() - run["started"],
+                tool=run["tool"],
+                agent=run["agent"],
+                status=status,
+            )
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end_tool(run_id, "error")
+
+
+metrics_callback_handler = MetricsCallbackHandler()
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records LLM calls as spans under the node or tool that made them."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._spans: dict[UUID, Any] = {}
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        model = model_from_params(kwargs.get("invocation_params"))
+        self._spans[run_id] = tracer.start_span(
+            f"llm {model}",
+            kind=SPAN_KIND_CLIENT,
+            attributes={
+                "gen_ai.request.model": model,
+                "deerflow.agent": agent_from_metadata(metadata),
+            },
+        )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self.on_chat_model_start(
+            serialized, prompts, run_id=run_id, metadata=metadata, **kwargs
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        input_tokens, output_tokens = token_usage(response)
+        span.set_attribute("gen_ai.usage.input_tokens", input_tokens)
+        span.set_attribute("gen_ai.usage.output_tokens", output_tokens)
+        span.end()
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.record_exception(error)
+            span.end()
+
+
+tracing_callback_handler = TracingCallbackHandler()
+
+
+def run_callbacks() -> list[BaseCallbackHandler]:
+    """Callback handlers to pass in the config of a workflow run."""
+    if tracer.enabled:
+        return [metrics_callback_handler, tracing_callback_handler]
+    return [metrics_callback_handler]
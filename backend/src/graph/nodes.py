@@ -9,10 +9,14 @@ from typing import Annotated, Literal
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
+from langgraph.config import get_stream_writer
+from langgraph.errors import GraphInterrupt
 from langgraph.types import Command, interrupt
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from pydantic import ValidationError
 
 from src.agents import create_agent
+from src.sandbox import python_sandbox_pool
+from src.tools.mcp_pool import mcp_session_pool
 from src.tools.search import LoggedTavilySearch
 from src.tools import (
     crawl_tool,
@@ -24,12 +28,15 @@ from src.tools import (
 from src.config.agents import AGENT_LLM_MAP
 from src.config.configuration import Configuration
 from src.llms.llm import get_llm_by_type
-from src.prompts.planner_model import Plan
+from src.prompts.planner_model import Plan, Step
 from src.prompts.template import apply_prompt_template
-from src.utils.json_utils import repair_json_output
+from src.utils.cancellation import raise_if_cancelled
+from src.utils.json_utils import JSONArrayItemParser, parse_json_output
+from src.utils.log_utils import preview
 
 from .types import State
-from ..config import SELECTED_SEARCH_ENGINE, SearchEngine
+from ..config import SearchEngine
+from ..config.tools import resolve_search_engine
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +57,8 @@ def background_investigation_node(state: State, config: RunnableConfig):
     configurable = Configuration.from_runnable_config(config)
     query = state.get("research_topic")
     background_investigation_results = None
-    if SELECTED_SEARCH_ENGINE == SearchEngine.TAVILY.value:
+    engine = resolve_search_engine(configurable.search_engine)
+    if engine == SearchEngine.TAVILY.value:
         searched_content = LoggedTavilySearch(
             max_results=configurable.max_search_results
         ).invoke(query)
@@ -69,7 +77,7 @@ def background_investigation_node(state: State, config: RunnableConfig):
             )
     else:
         background_investigation_results = get_web_search_tool(
-            configurable.max_search_results
+            configurable.max_search_results, engine
         ).invoke(query)
     return {
         "background_investigation_results": json.dumps(
@@ -78,6 +86,16 @@ def background_investigation_node(state: State, config: RunnableConfig):
     }
 
 
+def _write_plan_step(stream_writer, index: int, step: dict):
+    """Send a completed plan step to the custom stream."""
+    try:
+        step = Step.model_validate(step)
+    except ValidationError as e:
+        logger.debug(f"Skipping partial plan step {index}: {e}")
+        return
+    stream_writer({"plan_step": {"index": index, **step.model_dump(mode="json")}})
+
+
 def planner_node(
     state: State, config: RunnableConfig
 ) -> Command[Literal["human_feedback", "reporter"]]:
@@ -102,32 +120,37 @@ def planner_node(
         ]
 
     if configurable.enable_deep_thinking:
-        llm = get_llm_by_type("reasoning")
+        llm = get_llm_by_type("reasoning", configurable.model_for("reasoning"))
     elif AGENT_LLM_MAP["planner"] == "basic":
-        llm = get_llm_by_type("basic").with_structured_output(
-            Plan,
-            method="json_mode",
+        # JSON mode without a structured output parser, so the plan can be
+        # parsed while it streams
+        llm = get_llm_by_type("basic", configurable.model_for("basic")).bind(
+            response_format={"type": "json_object"}
         )
     else:
-        llm = get_llm_by_type(AGENT_LLM_MAP["planner"])
+        llm_type = AGENT_LLM_MAP["planner"]
+        llm = get_llm_by_type(llm_type, configurable.model_for(llm_type))
 
     # if the plan iterations is greater than the max plan iterations, return the reporter node
     if plan_iterations >= configurable.max_plan_iterations:
         return Command(goto="reporter")
 
     full_response = ""
-    if AGENT_LLM_MAP["planner"] == "basic" and not configurable.enable_deep_thinking:
-        response = llm.invoke(messages)
-        full_response = response.model_dump_json(indent=4, exclude_none=True)
-    else:
-        response = llm.stream(messages)
-        for chunk in response:
-            full_response += chunk.content
-    logger.debug(f"Current state messages: {state['messages']}")
-    logger.info(f"Planner response: {full_response}")
+    step_parser = JSONArrayItemParser("steps")
+    stream_writer = get_stream_writer()
+    for chunk in llm.stream(messages):
+        # Stop generating as soon as the client is gone
+        raise_if_cancelled()
+        full_response += chunk.content
+        # Publish each step as soon as it is complete, before the rest of the
+        # plan has been generated
+        for index, step in step_parser.feed(chunk.content):
+            _write_plan_step(stream_writer, index, step)
+    logger.debug("Current state messages: %s", preview(state["messages"]))
+    logger.info("Planner response: %s", preview(full_response))
 
     try:
-        curr_plan = json.loads(repair_json_output(full_response))
+        curr_plan = parse_json_output(full_response)
     except json.JSONDecodeError:
         logger.warning("Planner response is not a valid JSON")
         if plan_iterations > 0:
@@ -154,13 +177,22 @@ def planner_node(
 
 
 def human_feedback_node(
-    state,
+    state, config: RunnableConfig
 ) -> Command[Literal["planner", "research_team", "reporter", "__end__"]]:
     current_plan = state.get("current_plan", "")
     # check if the plan is auto accepted
     auto_accepted_plan = state.get("auto_accepted_plan", False)
     if not auto_accepted_plan:
-        feedback = interrupt("Please Review the Plan.")
+        try:
+            feedback = interrupt("Please Review the Plan.")
+        except GraphInterrupt:
+            # The review may take a while; park the coder's variables of this
+            # thread on disk until the research resumes. Not on resume, when
+            # the node runs again and interrupt() returns the feedback.
+            thread_id = config.get("configurable", {}).get("thread_id")
+            if thread_id:
+                python_sandbox_pool.suspend(thread_id)
+            raise
 
         # if the feedback is not accepted, return the planner node
         if feedback and str(feedback).upper().startswith("[EDIT_PLAN]"):
@@ -181,11 +213,10 @@ def human_feedback_node(
     plan_iterations = state["plan_iterations"] if state.get("plan_iterations", 0) else 0
     goto = "research_team"
     try:
-        current_plan = repair_json_output(current_plan)
         # increment the plan iterations
         plan_iterations += 1
         # parse the plan
-        new_plan = json.loads(current_plan)
+        new_plan = parse_json_output(current_plan)
         if new_plan["has_enough_context"]:
             goto = "reporter"
     except json.JSONDecodeError:
@@ -212,12 +243,13 @@ def coordinator_node(
     logger.info("Coordinator talking.")
     configurable = Configuration.from_runnable_config(config)
     messages = apply_prompt_template("coordinator", state)
+    llm_type = AGENT_LLM_MAP["coordinator"]
     response = (
-        get_llm_by_type(AGENT_LLM_MAP["coordinator"])
+        get_llm_by_type(llm_type, configurable.model_for(llm_type))
         .bind_tools([handoff_to_planner])
         .invoke(messages)
     )
-    logger.debug(f"Current state messages: {state['messages']}")
+    logger.debug("Current state messages: %s", preview(state["messages"]))
 
     goto = "__end__"
     locale = state.get("locale", "en-US")  # Default locale if not specified
@@ -244,7 +276,7 @@ def coordinator_node(
         logger.warning(
             "Coordinator response contains no tool calls. Terminating workflow execution."
         )
-        logger.debug(f"Coordinator response: {response}")
+        logger.debug("Coordinator response: %s", preview(response))
 
     return Command(
         update={
@@ -287,10 +319,14 @@ def reporter_node(state: State, config: RunnableConfig):
                 name="observation",
             )
         )
-    logger.debug(f"Current invoke messages: {invoke_messages}")
-    response = get_llm_by_type(AGENT_LLM_MAP["reporter"]).invoke(invoke_messages)
+    logger.debug("Current invoke messages: %s", preview(invoke_messages))
+    raise_if_cancelled()
+    llm_type = AGENT_LLM_MAP["reporter"]
+    response = get_llm_by_type(llm_type, configurable.model_for(llm_type)).invoke(
+        invoke_messages
+    )
     response_content = response.content
-    logger.info(f"reporter response: {response_content}")
+    logger.info("reporter response: %s", preview(response_content))
 
     return {"final_report": response_content}
 
@@ -386,14 +422,19 @@ async def _execute_agent_step(
         )
         recursion_limit = default_recursion_limit
 
-    logger.info(f"Agent input: {agent_input}")
+    # The input carries the plan and all previous findings, so it is only
+    # previewed
+    logger.info("Agent input: %s", preview(agent_input))
+    raise_if_cancelled()
     result = await agent.ainvoke(
         input=agent_input, config={"recursion_limit": recursion_limit}
     )
 
     # Process the result
     response_content = result["messages"][-1].content
-    logger.debug(f"{agent_name.capitalize()} full response: {response_content}")
+    logger.debug(
+        "%s full response: %s", agent_name.capitalize(), preview(response_content)
+    )
 
     # Update the step with the execution result
     current_step.execution_res = response_content
@@ -436,6 +477,7 @@ async def _setup_and_execute_agent_step(
         Command to update state and go to research_team
     """
     configurable = Configuration.from_runnable_config(config)
+    model_name = configurable.model_for(AGENT_LLM_MAP[agent_type])
     mcp_servers = {}
     enabled_tools = {}
 
@@ -456,19 +498,28 @@ async def _setup_and_execute_agent_step(
 
     # Create and execute agent with MCP tools if available
     if mcp_servers:
-        async with MultiServerMCPClient(mcp_servers) as client:
+        # Sessions are pooled across steps, so the handshake (and spawning
+        # stdio servers) only happens on first use
+        async with mcp_session_pool.session(mcp_servers) as mcp_tools:
             loaded_tools = default_tools[:]
-            for tool in client.get_tools():
+            for tool in mcp_tools:
                 if tool.name in enabled_tools:
-                    tool.description = (
-                        f"Powered by '{enabled_tools[tool.name]}'.\n{tool.description}"
+                    # Copy the pooled tool instead of editing its description
+                    tool = tool.model_copy(
+                        update={
+                            "description": f"Powered by '{enabled_tools[tool.name]}'.\n{tool.description}"
+                        }
                     )
                     loaded_tools.append(tool)
-            agent = create_agent(agent_type, agent_type, loaded_tools, agent_type)
+            agent = create_agent(
+                agent_type, agent_type, loaded_tools, agent_type, model_name
+            )
             return await _execute_agent_step(state, agent, agent_type)
     else:
         # Use default tools if no MCP servers are configured
-        agent = create_agent(agent_type, agent_type, default_tools, agent_type)
+        agent = create_agent(
+            agent_type, agent_type, default_tools, agent_type, model_name
+        )
         return await _execute_agent_step(state, agent, agent_type)
 
 
@@ -478,11 +529,18 @@ async def researcher_node(
     """Researcher node that do research"""
     logger.info("Researcher node is researching.")
     configurable = Configuration.from_runnable_config(config)
-    tools = [get_web_search_tool(configurable.max_search_results), crawl_tool]
-    retriever_tool = get_retriever_tool(state.get("resources", []))
+    tools = [
+        get_web_search_tool(
+            configurable.max_search_results, configurable.search_engine
+        ),
+        crawl_tool,
+    ]
+    retriever_tool = get_retriever_tool(
+        state.get("resources", []), configurable.rag_provider
+    )
     if retriever_tool:
         tools.insert(0, retriever_tool)
-    logger.info(f"Researcher tools: {tools}")
+    logger.info("Researcher tools: %s", [tool.name for tool in tools])
     return await _setup_and_execute_agent_step(
         state,
         config,
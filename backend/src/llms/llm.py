@@ -1,26 +1,28 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from pathlib import Path
-from typing import Any, Dict
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
 import os
 import ssl
 import httpx
 
-from langchain_openai import ChatOpenAI
-from langchain_deepseek import ChatDeepSeek
 from typing import get_args
 
-from src.config import load_yaml_config
 from src.config.agents import LLMType
+from src.config.reloader import ConfigSnapshot, config_reloader, current_config
 
-# Cache for LLM instances
-_llm_cache: dict[LLMType, ChatOpenAI] = {}
+if TYPE_CHECKING:
+    # The provider SDKs take about a second to import, so they are loaded when
+    # the first model is created rather than at startup
+    from langchain_deepseek import ChatDeepSeek
+    from langchain_openai import ChatOpenAI
 
+logger = logging.getLogger(__name__)
 
-def _get_config_file_path() -> str:
-    """Get the path to the configuration file."""
-    return str((Path(__file__).parent.parent.parent / "conf.yaml").resolve())
+# Cache for LLM instances, keyed by type, the version of its configuration and
+# the model selected for the run (None for the configured one)
+_llm_cache: dict[tuple[LLMType, int, Optional[str]], "ChatOpenAI"] = {}
 
 
 def _get_llm_type_config_keys() -> dict[str, str]:
@@ -32,7 +34,9 @@ def _get_llm_type_config_keys() -> dict[str, str]:
     }
 
 
-def _get_env_llm_conf(llm_type: str) -> Dict[str, Any]:
+def _get_env_llm_conf(
+    llm_type: str, env: Optional[Mapping[str, str]] = None
+) -> Dict[str, Any]:
     """
     Get LLM configuration from environment variables.
     Environment variables should follow the format: {LLM_TYPE}__{KEY}
@@ -40,7 +44,7 @@ def _get_env_llm_conf(llm_type: str) -> Dict[str, Any]:
     """
     prefix = f"{llm_type.upper()}_MODEL__"
     conf = {}
-    for key, value in os.environ.items():
+    for key, value in (os.environ if env is None else env).items():
         if key.startswith(prefix):
             conf_key = key[len(prefix) :].lower()
             conf[conf_key] = value
@@ -48,9 +52,16 @@ def _get_env_llm_conf(llm_type: str) -> Dict[str, Any]:
 
 
 def _create_llm_use_conf(
-    llm_type: LLMType, conf: Dict[str, Any]
-) -> ChatOpenAI | ChatDeepSeek:
-    """Create LLM instance using configuration."""
+    llm_type: LLMType,
+    conf: Dict[str, Any],
+    env: Optional[Mapping[str, str]] = None,
+    model: Optional[str] = None,
+) -> "ChatOpenAI | ChatDeepSeek":
+    """Create LLM instance using configuration, optionally with another of the
+    type's available models."""
+    from langchain_deepseek import ChatDeepSeek
+    from langchain_openai import ChatOpenAI
+
     llm_type_config_keys = _get_llm_type_config_keys()
     config_key = llm_type_config_keys.get(llm_type)
 
@@ -62,7 +73,7 @@ def _create_llm_use_conf(
         raise ValueError(f"Invalid LLM configuration for {llm_type}: {llm_conf}")
 
     # Get configuration from environment variables
-    env_conf = _get_env_llm_conf(llm_type)
+    env_conf = _get_env_llm_conf(llm_type, env)
 
     # Merge configurations, with environment variables taking precedence
     merged_conf = {**llm_conf, **env_conf}
@@ -70,6 +81,11 @@ def _create_llm_use_conf(
     if not merged_conf:
         raise ValueError(f"No configuration found for LLM type: {llm_type}")
 
+    # Other models served by the same endpoint, selectable per request
+    merged_conf.pop("available_models", None)
+    if model:
+        merged_conf["model"] = model
+
     if llm_type == "reasoning":
         merged_conf["api_base"] = merged_conf.pop("base_url", None)
 
@@ -90,21 +106,82 @@ def _create_llm_use_conf(
     )
 
 
+def _config_version(llm_type: LLMType, snapshot: ConfigSnapshot) -> int:
+    return snapshot.section_version(_get_llm_type_config_keys().get(llm_type, ""))
+
+
+def _available_models(llm_type: LLMType, snapshot: ConfigSnapshot) -> list[str]:
+    """The configured model of a type followed by its `available_models`."""
+    config_key = _get_llm_type_config_keys().get(llm_type, "")
+    merged_conf = {
+        **(snapshot.conf.get(config_key) or {}),
+        **_get_env_llm_conf(llm_type, snapshot.env),
+    }
+    available = merged_conf.get("available_models") or []
+    if isinstance(available, str):
+        # From a {TYPE}_MODEL__AVAILABLE_MODELS environment variable
+        available = available.split(",")
+    models = [merged_conf.get("model"), *(str(m).strip() for m in available)]
+    return list(dict.fromkeys(m for m in models if m))
+
+
 def get_llm_by_type(
     llm_type: LLMType,
-) -> ChatOpenAI:
+    model: Optional[str] = None,
+) -> "ChatOpenAI":
     """
     Get LLM instance by type. Returns cached instance if available.
-    """
-    if llm_type in _llm_cache:
-        return _llm_cache[llm_type]
 
-    conf = load_yaml_config(_get_config_file_path())
-    llm = _create_llm_use_conf(llm_type, conf)
-    _llm_cache[llm_type] = llm
+    The configuration is that of the current research run (or the latest one),
+    so a run keeps its models when the configuration is reloaded. `model`
+    selects another of the type's available models for the run.
+
+    Raises:
+        ValueError: If `model` is not available for the type
+    """
+    snapshot = current_config()
+    if model:
+        available = _available_models(llm_type, snapshot)
+        if model not in available:
+            raise ValueError(f"Model {model} is not available for {llm_type}")
+        if model == available[0]:
+            model = None
+    key = (llm_type, _config_version(llm_type, snapshot), model or None)
+    if key in _llm_cache:
+        return _llm_cache[key]
+
+    llm = _create_llm_use_conf(llm_type, snapshot.conf, snapshot.env, model)
+    _llm_cache[key] = llm
     return llm
 
 
+def _validate_llm_conf(snapshot: ConfigSnapshot) -> None:
+    """Check that the changed models of a new configuration can be created."""
+    previous = config_reloader.snapshot
+    for llm_type in get_args(LLMType):
+        config_key = _get_llm_type_config_keys()[llm_type]
+        if snapshot.section_version(config_key) == previous.section_version(config_key):
+            continue
+        configured = snapshot.conf.get(config_key) or _get_env_llm_conf(
+            llm_type, snapshot.env
+        )
+        if configured:
+            _create_llm_use_conf(llm_type, snapshot.conf, snapshot.env)
+
+
+def _drop_stale_llms(old: ConfigSnapshot, new: ConfigSnapshot) -> None:
+    """Forget the clients of models whose configuration changed. Runs that
+    started before the change create their own again on demand."""
+    for llm_type, version, model in list(_llm_cache):
+        if version != _config_version(llm_type, new):
+            logger.info(f"Configuration of the {llm_type} model changed")
+            _llm_cache.pop((llm_type, version, model), None)
+
+
+config_reloader.add_validator(_validate_llm_conf)
+config_reloader.on_reload(_drop_stale_llms)
+
+
 def get_configured_llm_models() -> dict[str, list[str]]:
     """
     Get all configured LLM models grouped by type.
@@ -113,26 +190,14 @@ def get_configured_llm_models() -> dict[str, list[str]]:
         Dictionary mapping LLM type to list of configured model names.
     """
     try:
-        conf = load_yaml_config(_get_config_file_path())
-        llm_type_config_keys = _get_llm_type_config_keys()
-
+        snapshot = current_config()
         configured_models: dict[str, list[str]] = {}
 
         for llm_type in get_args(LLMType):
-            # Get configuration from YAML file
-            config_key = llm_type_config_keys.get(llm_type, "")
-            yaml_conf = conf.get(config_key, {}) if config_key else {}
-
-            # Get configuration from environment variables
-            env_conf = _get_env_llm_conf(llm_type)
-
-            # Merge configurations, with environment variables taking precedence
-            merged_conf = {**yaml_conf, **env_conf}
-
-            # Check if model is configured
-            model_name = merged_conf.get("model")
-            if model_name:
-                configured_models.setdefault(llm_type, []).append(model_name)
+            # The configured model first, then the others requests may select
+            models = _available_models(llm_type, snapshot)
+            if models:
+                configured_models[llm_type] = models
 
         return configured_models
 
@@ -7,6 +7,7 @@ from src.podcast.graph.audio_mixer_node import audio_mixer_node
 from src.podcast.graph.script_writer_node import script_writer_node
 from src.podcast.graph.state import PodcastState
 from src.podcast.graph.tts_node import tts_node
+from src.utils.lazy import Lazy
 
 
 def build_graph():
@@ -23,7 +24,8 @@ def build_graph():
     return builder.compile()
 
 
-workflow = build_graph()
+# Compiled on first use, not when the module is imported
+workflow = Lazy(build_graph)
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -6,6 +6,7 @@ from langgraph.graph import END, START, StateGraph
 from src.ppt.graph.ppt_composer_node import ppt_composer_node
 from src.ppt.graph.ppt_generator_node import ppt_generator_node
 from src.ppt.graph.state import PPTState
+from src.utils.lazy import Lazy
 
 
 def build_graph():
@@ -20,7 +21,8 @@ def build_graph():
     return builder.compile()
 
 
-workflow = build_graph()
+# Compiled on first use, not when the module is imported
+workflow = Lazy(build_graph)
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -1,12 +1,31 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-import os
+"""
+Prompt templates rendered as a static prefix plus a dynamic suffix.
+
+A template's front matter (the leading `---` block, e.g. CURRENT_TIME) is the
+dynamic part and is rendered on every call. The body is the static part: it is
+rendered once per combination of the variables it references (e.g. locale,
+report_style, max_step_num) and then served from memory. The dynamic part is
+placed after the static part, so system prompts share a byte-identical prefix
+across requests and provider prompt caches can hit.
+"""
+
 import dataclasses
+import functools
+import json
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import Any, Optional
+
+from jinja2 import Environment, FileSystemLoader, Template, meta, select_autoescape
 from langgraph.prebuilt.chat_agent_executor import AgentState
 from src.config.configuration import Configuration
+from src.utils.metrics import CacheStats, registry
 
 # Initialize Jinja2 environment
 env = Environment(
@@ -16,6 +35,88 @@ env = Environment(
     lstrip_blocks=True,
 )
 
+# CURRENT_TIME is rounded down to this many seconds
+PROMPT_TIME_GRANULARITY = int(os.getenv("PROMPT_TIME_GRANULARITY_SECONDS", "60"))
+
+_FRONT_MATTER = re.compile(r"\A---\n.*?\n---\n", re.DOTALL)
+
+# Rendered static parts, keyed by template and the variables it references
+_static_cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+_STATIC_CACHE_SIZE = 512
+_static_cache_stats = CacheStats()
+registry.register_cache("prompts", _static_cache_stats)
+
+
+@dataclass(frozen=True)
+class _SplitTemplate:
+    static: Template
+    static_variables: frozenset[str]
+    dynamic: Optional[Template]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_template(prompt_name: str) -> _SplitTemplate:
+    source, _, _ = env.loader.get_source(env, f"{prompt_name}.md")
+    match = _FRONT_MATTER.match(source)
+    dynamic_source = match.group(0) if match else ""
+    static_source = source[len(dynamic_source) :].lstrip("\n")
+    return _SplitTemplate(
+        static=env.from_string(static_source),
+        static_variables=frozenset(
+            meta.find_undeclared_variables(env.parse(static_source))
+        ),
+        dynamic=env.from_string(dynamic_source) if dynamic_source else None,
+    )
+
+
+def _cache_key(variables: dict[str, Any]) -> str:
+    return json.dumps(
+        variables,
+        sort_keys=True,
+        default=lambda obj: (
+            obj.model_dump() if hasattr(obj, "model_dump") else str(obj)
+        ),
+    )
+
+
+def render_prompt(prompt_name: str, variables: dict[str, Any]) -> str:
+    """
+    Render a prompt template, reusing the rendered static part.
+
+    Args:
+        prompt_name: Name of the prompt template file (without .md extension)
+        variables: Template variables
+
+    Returns:
+        The static part followed by the dynamic part
+    """
+    template = _load_template(prompt_name)
+    static_variables = {name: variables.get(name) for name in template.static_variables}
+    key = (prompt_name, _cache_key(static_variables))
+    static = _static_cache.get(key)
+    if static is None:
+        _static_cache_stats.misses += 1
+        static = template.static.render(**variables)
+        _static_cache[key] = static
+        while len(_static_cache) > _STATIC_CACHE_SIZE:
+            _static_cache.popitem(last=False)
+    else:
+        _static_cache_stats.hits += 1
+        _static_cache.move_to_end(key)
+
+    if template.dynamic is None:
+        return static
+    return f"{static}\n\n{template.dynamic.render(**variables)}"
+
+
+def current_time() -> str:
+    """The current time for prompts, rounded down to PROMPT_TIME_GRANULARITY."""
+    now = datetime.now()
+    if PROMPT_TIME_GRANULARITY > 1:
+        timestamp = now.timestamp()
+        now = datetime.fromtimestamp(timestamp - timestamp % PROMPT_TIME_GRANULARITY)
+    return now.strftime("%a %b %d %Y %H:%M:%S %z")
+
 
 def get_prompt_template(prompt_name: str) -> str:
     """
@@ -28,8 +129,7 @@ def get_prompt_template(prompt_name: str) -> str:
         The template string with proper variable substitution syntax
     """
     try:
-        template = env.get_template(f"{prompt_name}.md")
-        return template.render()
+        return render_prompt(prompt_name, {})
     except Exception as e:
         raise ValueError(f"Error loading template {prompt_name}: {e}")
 
@@ -49,17 +149,22 @@ def apply_prompt_template(
     """
     # Convert state to dict for template rendering
     state_vars = {
-        "CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
+        "CURRENT_TIME": current_time(),
         **state,
     }
 
-    # Add configurable variables
+    # Add configurable variables. Templates only read top-level fields, so a
+    # shallow view avoids the deep copy of dataclasses.asdict.
     if configurable:
-        state_vars.update(dataclasses.asdict(configurable))
+        state_vars.update(
+            {
+                field.name: getattr(configurable, field.name)
+                for field in dataclasses.fields(configurable)
+            }
+        )
 
     try:
-        template = env.get_template(f"{prompt_name}.md")
-        system_prompt = template.render(**state_vars)
+        system_prompt = render_prompt(prompt_name, state_vars)
         return [{"role": "system", "content": system_prompt}] + state["messages"]
     except Exception as e:
         raise ValueError(f"Error applying template {prompt_name}: {e}")
@@ -1,14 +1,13 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from src.config.tools import SELECTED_RAG_PROVIDER, RAGProvider
+from src.config.tools import RAGProvider, resolve_rag_provider
 from src.rag.ragflow import RAGFlowProvider
 from src.rag.retriever import Retriever
 
 
-def build_retriever() -> Retriever | None:
-    if SELECTED_RAG_PROVIDER == RAGProvider.RAGFLOW.value:
+def build_retriever(provider: str | None = None) -> Retriever | None:
+    provider = resolve_rag_provider(provider)
+    if provider == RAGProvider.RAGFLOW.value:
         return RAGFlowProvider()
-    elif SELECTED_RAG_PROVIDER:
-        raise ValueError(f"Unsupported RAG provider: {SELECTED_RAG_PROVIDER}")
     return None
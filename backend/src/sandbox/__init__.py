@@ -0,0 +1,10 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from .pool import PythonSandboxPool, SandboxResult, python_sandbox_pool
+
+__all__ = [
+    "PythonSandboxPool",
+    "SandboxResult",
+    "python_sandbox_pool",
+]
@@ -0,0 +1,462 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Pool of sandboxed worker processes that run Python code for the coder agent.
+
+Workers are started ahead of time with numpy and pandas already imported.
+Each research thread runs its code in a namespace of its own and sticks to
+one worker, so its variables are still there in the thread's next step.
+Namespaces that are idle while a worker is short on memory, or whose thread
+is waiting for the user, are spilled to disk and restored on next use (see
+src.sandbox.state).
+Code runs under a CPU time limit enforced by the worker itself. Code that
+overruns the wall-clock timeout or the memory limit is interrupted, and the
+worker keeps the namespaces of its other threads. Only a worker that does not
+respond to the interrupt (e.g. stuck in a C extension) is killed and
+replaced, taking the namespaces it holds in memory with it. The next run of
+each thread that lost its namespace this way reports `state_reset`, so the
+coder is told to load its data again rather than just seeing a NameError.
+
+Threads share their worker's process, so the memory limit applies to all of
+them together. Before a thread runs code, the worker spills idle namespaces
+of other threads while it is over the spill threshold, so that a thread is
+charged mostly for its own memory; keep the threshold well below the limit.
+If memory is still over the limit once the running code is interrupted, that
+thread's namespace is dropped, and if that is not enough either, the other
+namespaces are spilled and the worker is replaced.
+
+Threads on different workers run in parallel, and the server process never
+executes user code.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from src.sandbox.state import remove_stale_snapshots, snapshot_path
+from src.sandbox.worker import worker_main
+
+logger = logging.getLogger(__name__)
+
+# How often a running execution is checked against the memory limit
+_POLL_INTERVAL = 0.1
+# Maximum number of remembered thread-to-worker assignments
+_MAX_ASSIGNMENTS = 4096
+# How long interrupted code gets to stop before its worker is killed
+_INTERRUPT_GRACE = 2.0
+
+PYTHON_SANDBOX_SPILL_DIR = os.getenv(
+    "PYTHON_SANDBOX_SPILL_DIR",
+    str(Path(__file__).parent.parent.parent / "data" / "sandbox"),
+)
+
+
+@dataclass
+class SandboxResult:
+    output: str
+    error: Optional[str] = None
+    # The thread's variables from earlier runs were lost before this run
+    state_reset: bool = False
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+    """A worker process and the pipe to it. Used by one caller at a time."""
+
+    def __init__(self, pool: "PythonSandboxPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.lock = threading.Lock()
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.executions = 0
+
+    def start(self) -> None:
+        parent_conn, child_conn = self.pool._context.Pipe()
+        self.process = self.pool._context.Process(
+            target=worker_main,
+            args=(
+                child_conn,
+                self.pool.warm_imports,
+                self.pool.cpu_time_limit,
+                self.pool.max_namespaces,
+                self.pool.spill_dir,
+                self.pool.spill_threshold_mb * 1024 * 1024,
+            ),
+            name=f"python-sandbox-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.ready = False
+
+    def stop(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        self.process = None
+        self.conn = None
+        self.ready = False
+
+    def restart(self, reason: str) -> None:
+        logger.warning(f"Replacing Python sandbox worker {self.index}: {reason}")
+        self.pool._mark_state_lost(self)
+        self.stop()
+        self.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def wait_ready(self, timeout: float) -> None:
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            raise TimeoutError("Python sandbox worker did not start in time")
+        self.conn.recv()
+        self.ready = True
+
+
+class PythonSandboxPool:
+    """Runs Python code in a pool of warm, resource-limited worker processes."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        timeout: float = 60,
+        cpu_time_limit: float = 30,
+        memory_limit_mb: int = 1024,
+        max_namespaces: int = 16,
+        warm_imports: tuple[str, ...] = ("numpy", "pandas"),
+        start_method: Optional[str] = None,
+        startup_timeout: float = 60,
+        spill_dir: Optional[str] = None,
+        spill_threshold_mb: int = 512,
+        spill_ttl: float = 86400,
+    ):
+        """
+        Args:
+            size: Number of worker processes
+            timeout: Wall-clock seconds an execution may take before its
+                worker is killed and replaced
+            cpu_time_limit: CPU seconds an execution may use, 0 for no limit
+            memory_limit_mb: Resident memory a worker may use, 0 for no limit
+            max_namespaces: Thread namespaces kept in memory per worker
+            warm_imports: Modules imported by workers when they start
+            start_method: multiprocessing start method, defaults to
+                forkserver where available
+            startup_timeout: Seconds to wait for a new worker to get ready
+            spill_dir: Directory for spilled namespaces; without one,
+                namespaces over the limits are dropped
+            spill_threshold_mb: Worker memory above which idle namespaces
+                are spilled, 0 to only spill by count
+            spill_ttl: Seconds after which unused spilled namespaces are
+                deleted
+        """
+        self.size = size
+        self.timeout = timeout
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.max_namespaces = max_namespaces
+        self.warm_imports = tuple(warm_imports)
+        self.startup_timeout = startup_timeout
+        self.spill_dir = spill_dir
+        self.spill_threshold_mb = spill_threshold_mb
+        self.spill_ttl = spill_ttl
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        self._workers: list[_Worker] = []
+        self._assignments: OrderedDict[str, _Worker] = OrderedDict()
+        # Threads whose namespace may have been lost since their last run
+        self._lost_state: set[str] = set()
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.memory_kills = 0
+
+    def start(self) -> None:
+        """Start the worker processes. Safe to call more than once."""
+        with self._lock:
+            if self._workers:
+                return
+            if self.spill_dir:
+                removed = remove_stale_snapshots(self.spill_dir, self.spill_ttl)
+                if removed:
+                    logger.info(f"Removed {removed} stale Python sandbox snapshots")
+            for index in range(self.size):
+                worker = _Worker(self, index)
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"Started {self.size} Python sandbox workers")
+
+    def close(self) -> None:
+        """Stop all worker processes. The pool starts again on next use."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._assignments.clear()
+            self._lost_state.clear()
+        for worker in workers:
+            with worker.lock:
+                worker.stop()
+
+    def _worker_for(self, thread_id: str) -> _Worker:
+        self.start()
+        with self._lock:
+            worker = self._assignments.get(thread_id)
+            if worker is None or worker not in self._workers:
+                # New threads go to the worker with the fewest threads
+                load = {id(w): 0 for w in self._workers}
+                for assigned in self._assignments.values():
+                    if id(assigned) in load:
+                        load[id(assigned)] += 1
+                worker = min(self._workers, key=lambda w: load[id(w)])
+            self._assignments[thread_id] = worker
+            self._assignments.move_to_end(thread_id)
+            while len(self._assignments) > _MAX_ASSIGNMENTS:
+                forgotten, _ = self._assignments.popitem(last=False)
+                self._lost_state.discard(forgotten)
+            return worker
+
+    def _mark_state_lost(self, worker: _Worker) -> None:
+        """Remember the threads of a worker that is being replaced."""
+        with self._lock:
+            self._lost_state.update(
+                thread_id
+                for thread_id, assigned in self._assignments.items()
+                if assigned is worker
+            )
+
+    def _take_state_lost(self, thread_id: str) -> bool:
+        """Whether the thread's namespace was lost since its last run.
+
+        Namespaces spilled to disk before their worker was replaced are not.
+        """
+        with self._lock:
+            if thread_id not in self._lost_state:
+                return False
+            self._lost_state.discard(thread_id)
+        return not (
+            self.spill_dir and os.path.exists(snapshot_path(self.spill_dir, thread_id))
+        )
+
+    def run(
+        self, code: str, thread_id: str = "default", timeout: Optional[float] = None
+    ) -> SandboxResult:
+        """Run code in the thread's namespace and wait for the result.
+
+        Blocks until the code finishes, fails, or is stopped by a limit. The
+        result's `state_reset` tells whether the thread's variables from
+        earlier runs were lost in the meantime, e.g. because its worker had to
+        be replaced.
+        """
+        state_reset = self._take_state_lost(thread_id)
+        result = self._request("run", thread_id, code, timeout or self.timeout)
+        result.state_reset = state_reset
+        return result
+
+    async def submit(
+        self, code: str, thread_id: str = "default", timeout: Optional[float] = None
+    ) -> SandboxResult:
+        """Async variant of run() that waits without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.run, code, thread_id, timeout
+        )
+
+    def reset(self, thread_id: str) -> None:
+        """Drop the thread's namespace, in memory and on disk."""
+        with self._lock:
+            worker = self._assignments.pop(thread_id, None)
+            self._lost_state.discard(thread_id)
+        if worker is not None:
+            self._send(worker, "reset", thread_id, "", self.timeout)
+        elif self.spill_dir:
+            try:
+                os.remove(snapshot_path(self.spill_dir, thread_id))
+            except FileNotFoundError:
+                pass
+
+    def suspend(self, thread_id: str) -> None:
+        """Move the thread's namespace to disk while the thread is idle.
+
+        Call this when a thread is going to wait, e.g. for the user to review
+        a plan. The namespace is restored when the thread next runs code.
+        Does nothing for threads that have not run code in this pool.
+        """
+        with self._lock:
+            worker = self._assignments.get(thread_id)
+        if worker is not None and self.spill_dir:
+            result = self._send(worker, "spill", thread_id, "", self.timeout)
+            if result.error:
+                logger.warning(
+                    f"Failed to spill Python namespace of thread {thread_id}: "
+                    f"{result.error}"
+                )
+
+    def _request(
+        self, op: str, thread_id: str, code: str, timeout: float
+    ) -> SandboxResult:
+        return self._send(self._worker_for(thread_id), op, thread_id, code, timeout)
+
+    def _send(
+        self, worker: _Worker, op: str, thread_id: str, code: str, timeout: float
+    ) -> SandboxResult:
+        with worker.lock:
+            if worker.process is None:
+                # The pool was closed while we waited for the worker
+                return SandboxResult("", "RuntimeError('Python sandbox is closed')")
+            if not worker.alive:
+                worker.restart("worker process exited")
+            worker.wait_ready(self.startup_timeout)
+            worker.conn.send((op, thread_id, code))
+            worker.executions += 1
+            return self._wait_for_result(worker, thread_id, timeout)
+
+    def _wait_for_result(
+        self, worker: _Worker, thread_id: str, timeout: float
+    ) -> SandboxResult:
+        memory_limit = self.memory_limit_mb * 1024 * 1024
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.timeouts += 1
+                self._stop_execution(
+                    worker, thread_id, f"execution exceeded {timeout} seconds"
+                )
+                return SandboxResult(
+                    "", f"TimeoutError('Execution exceeded {timeout} seconds')"
+                )
+            if worker.conn.poll(min(remaining, _POLL_INTERVAL)):
+                try:
+                    output, error = worker.conn.recv()
+                except (EOFError, OSError):
+                    break
+                return SandboxResult(output, error)
+            if not worker.alive:
+                break
+            rss = _rss_bytes(worker.process.pid)
+            if memory_limit and rss is not None and rss > memory_limit:
+                self.memory_kills += 1
+                self._stop_execution(
+                    worker,
+                    thread_id,
+                    f"worker exceeded {self.memory_limit_mb} MB",
+                    free_memory=True,
+                )
+                return SandboxResult(
+                    "",
+                    f"MemoryError('Execution exceeded {self.memory_limit_mb} MB')",
+                )
+
+        # The pipe can close just before the process is reaped
+        worker.process.join(timeout=1)
+        exitcode = worker.process.exitcode
+        worker.restart(f"worker process died with exit code {exitcode}")
+        return SandboxResult(
+            "", f"RuntimeError('Worker process died with exit code {exitcode}')"
+        )
+
+    def _stop_execution(
+        self, worker: _Worker, thread_id: str, reason: str, free_memory: bool = False
+    ) -> None:
+        """Interrupt the running code, replacing the worker only if needed.
+
+        Args:
+            worker: The worker running the code, locked by the caller
+            thread_id: The thread whose code is running
+            reason: Why the code is stopped
+            free_memory: Whether the worker has to get back under the memory
+                limit
+        """
+        if self._interrupt(worker):
+            if not free_memory or not self._over_memory_limit(worker):
+                logger.warning(
+                    f"Interrupted Python sandbox worker {worker.index}: {reason}"
+                )
+                return
+            # The thread's own variables go first, then everyone else's
+            self._exchange(worker, "reset", thread_id)
+            with self._lock:
+                self._lost_state.add(thread_id)
+            if not self._over_memory_limit(worker):
+                logger.warning(
+                    f"Interrupted Python sandbox worker {worker.index} and reset "
+                    f"thread {thread_id}: {reason}"
+                )
+                return
+            self._exchange(worker, "spill_others", thread_id)
+        worker.restart(reason)
+
+    def _interrupt(self, worker: _Worker) -> bool:
+        """Interrupt the worker's running code and wait for it to stop."""
+        if not hasattr(signal, "SIGUSR1") or not worker.alive:
+            return False
+        try:
+            os.kill(worker.process.pid, signal.SIGUSR1)
+            if not worker.conn.poll(_INTERRUPT_GRACE):
+                return False
+            # The result of the interrupted code, replaced by the caller's
+            worker.conn.recv()
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def _exchange(self, worker: _Worker, op: str, thread_id: str) -> bool:
+        """Send a request to a worker that holds no other, and wait for it."""
+        try:
+            worker.conn.send((op, thread_id, ""))
+            if not worker.conn.poll(self.timeout):
+                return False
+            _, error = worker.conn.recv()
+        except (EOFError, OSError):
+            return False
+        return error is None
+
+    def _over_memory_limit(self, worker: _Worker) -> bool:
+        rss = _rss_bytes(worker.process.pid)
+        limit = self.memory_limit_mb * 1024 * 1024
+        return bool(limit) and rss is not None and rss > limit
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "busy": sum(1 for worker in self._workers if worker.lock.locked()),
+            "threads": len(self._assignments),
+            "executions": sum(worker.executions for worker in self._workers),
+            "timeouts": self.timeouts,
+            "memory_kills": self.memory_kills,
+        }
+
+
+python_sandbox_pool = PythonSandboxPool(
+    size=int(os.getenv("PYTHON_SANDBOX_WORKERS", "2")),
+    timeout=float(os.getenv("PYTHON_SANDBOX_TIMEOUT", "60")),
+    cpu_time_limit=float(os.getenv("PYTHON_SANDBOX_CPU_TIME_LIMIT", "30")),
+    memory_limit_mb=int(os.getenv("PYTHON_SANDBOX_MEMORY_LIMIT_MB", "1024")),
+    max_namespaces=int(os.getenv("PYTHON_SANDBOX_MAX_NAMESPACES", "16")),
+    spill_dir=PYTHON_SANDBOX_SPILL_DIR or None,
+    spill_threshold_mb=int(os.getenv("PYTHON_SANDBOX_SPILL_THRESHOLD_MB", "512")),
+    spill_ttl=float(os.getenv("PYTHON_SANDBOX_SPILL_TTL", "86400")),
+)
@@ -0,0 +1,227 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Per-thread namespaces of a sandbox worker, with spilling to disk.
+
+A research thread keeps its variables (e.g. loaded DataFrames) between
+coder steps. When a worker holds too many namespaces or uses too much
+memory, the least recently used namespaces are pickled to the spill
+directory and dropped from memory. A spilled namespace is loaded again the
+next time its thread runs code, on whichever worker that happens.
+
+Like the worker, this module only uses the standard library.
+"""
+
+import builtins
+import gc
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import types
+from collections import OrderedDict
+from typing import Any, Optional
+
+_SNAPSHOT_VERSION = 1
+
+
+def new_namespace() -> dict[str, Any]:
+    return {"__name__": "__main__", "__builtins__": builtins}
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def snapshot_path(spill_dir: str, thread_id: str) -> str:
+    name = hashlib.sha256(thread_id.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(spill_dir, f"{name}.pkl")
+
+
+def dump_namespace(namespace: dict[str, Any]) -> dict[str, Any]:
+    """Turn a namespace into a picklable snapshot.
+
+    Modules are stored by name and imported again on restore. Values that
+    cannot be pickled (e.g. open files, or functions defined in the
+    namespace itself) are left out.
+    """
+    values: dict[str, bytes] = {}
+    modules: dict[str, str] = {}
+    for name, value in namespace.items():
+        if name.startswith("__"):
+            continue
+        if isinstance(value, types.ModuleType):
+            modules[name] = value.__name__
+            continue
+        try:
+            values[name] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            continue
+    return {"version": _SNAPSHOT_VERSION, "values": values, "modules": modules}
+
+
+def load_namespace(snapshot: dict[str, Any]) -> dict[str, Any]:
+    namespace = new_namespace()
+    if snapshot.get("version") != _SNAPSHOT_VERSION:
+        return namespace
+    for name, module in snapshot["modules"].items():
+        try:
+            namespace[name] = __import__(module, fromlist=["_"])
+        except ImportError:
+            continue
+    for name, data in snapshot["values"].items():
+        try:
+            namespace[name] = pickle.loads(data)
+        except Exception:
+            continue
+    return namespace
+
+
+class NamespaceStore:
+    """In-memory namespaces per thread, spilled to disk under pressure."""
+
+    def __init__(
+        self,
+        spill_dir: Optional[str],
+        max_namespaces: int = 16,
+        spill_threshold_bytes: int = 0,
+    ):
+        """
+        Args:
+            spill_dir: Directory for spilled namespaces; namespaces are
+                dropped instead of spilled if None
+            max_namespaces: Namespaces kept in memory
+            spill_threshold_bytes: Process RSS above which idle namespaces are
+                spilled, 0 to only spill by count
+        """
+        self.spill_dir = spill_dir
+        self.max_namespaces = max_namespaces
+        self.spill_threshold_bytes = spill_threshold_bytes
+        self._namespaces: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __contains__(self, thread_id: str) -> bool:
+        return thread_id in self._namespaces
+
+    def get(self, thread_id: str) -> dict[str, Any]:
+        """Return the thread's namespace, restoring it from disk if spilled."""
+        namespace = self._namespaces.get(thread_id)
+        if namespace is None:
+            namespace = self._restore(thread_id) or new_namespace()
+            self._namespaces[thread_id] = namespace
+        self._namespaces.move_to_end(thread_id)
+        return namespace
+
+    def drop(self, thread_id: str) -> None:
+        """Forget the thread's namespace, in memory and on disk."""
+        self._namespaces.pop(thread_id, None)
+        if self.spill_dir:
+            try:
+                os.remove(snapshot_path(self.spill_dir, thread_id))
+            except FileNotFoundError:
+                pass
+
+    def spill(self, thread_id: str) -> bool:
+        """Write the thread's namespace to disk and drop it from memory.
+
+        Returns whether the namespace was in memory.
+        """
+        namespace = self._namespaces.pop(thread_id, None)
+        if namespace is None:
+            return False
+        if self.spill_dir:
+            self._write(thread_id, dump_namespace(namespace))
+        del namespace
+        gc.collect()
+        return True
+
+    def spill_all(self, keep: Optional[str] = None) -> list[str]:
+        """Spill the namespaces of all threads but `keep`, e.g. before the
+        worker is replaced."""
+        spilled = [thread_id for thread_id in self._namespaces if thread_id != keep]
+        for thread_id in spilled:
+            self.spill(thread_id)
+        return spilled
+
+    def relieve_pressure(self, keep: Optional[str] = None) -> list[str]:
+        """Spill least recently used namespaces while over the limits.
+
+        Args:
+            keep: Thread whose namespace stays in memory regardless
+
+        Returns:
+            The threads whose namespaces were spilled
+        """
+        spilled = []
+        for thread_id in list(self._namespaces):
+            if not self._over_limit():
+                break
+            if thread_id == keep:
+                continue
+            self.spill(thread_id)
+            spilled.append(thread_id)
+        return spilled
+
+    def _over_limit(self) -> bool:
+        if len(self._namespaces) > self.max_namespaces:
+            return True
+        if self.spill_threshold_bytes:
+            rss = current_rss_bytes()
+            return rss is not None and rss > self.spill_threshold_bytes
+        return False
+
+    def _write(self, thread_id: str, snapshot: dict[str, Any]) -> None:
+        path = snapshot_path(self.spill_dir, thread_id)
+        fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _restore(self, thread_id: str) -> Optional[dict[str, Any]]:
+        if not self.spill_dir:
+            return None
+        path = snapshot_path(self.spill_dir, thread_id)
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A truncated or incompatible snapshot is as good as none
+            snapshot = None
+        # The namespace in memory is authoritative from now on
+        os.remove(path)
+        return load_namespace(snapshot) if snapshot else None
+
+
+def remove_stale_snapshots(spill_dir: str, max_age: float) -> int:
+    """Delete snapshots not touched for `max_age` seconds. Returns the count."""
+    removed = 0
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(spill_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
@@ -0,0 +1,162 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Entry point of a sandbox worker process.
+
+This module only uses the standard library so that starting a worker does
+not import the server's dependencies.
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import signal
+from typing import Any, Optional
+
+from src.sandbox.state import NamespaceStore
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Output beyond this many characters is cut off
+MAX_OUTPUT_CHARS = 100_000
+
+
+class CPUTimeLimitExceeded(BaseException):
+    """Raised in user code when it uses up its CPU time.
+
+    Derives from BaseException so that `except Exception` in user code does
+    not swallow it.
+    """
+
+
+class ExecutionInterrupted(BaseException):
+    """Raised in user code when the pool stops it for overrunning its
+    wall-clock timeout or the memory limit."""
+
+
+# Whether user code is running, so an interrupt that arrives late is ignored
+_executing = False
+
+
+def _on_cpu_limit(signum, frame):
+    raise CPUTimeLimitExceeded("CPU time limit exceeded")
+
+
+def _on_interrupt(signum, frame):
+    if _executing:
+        raise ExecutionInterrupted("Execution interrupted by the sandbox pool")
+
+
+def _set_cpu_limit(seconds: Optional[float]) -> None:
+    """Allow `seconds` more CPU time from now, or lift the limit if None."""
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        soft = hard
+    else:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _execute(
+    code: str, namespace: dict[str, Any], cpu_time_limit: float
+) -> tuple[str, Optional[str]]:
+    """Run code in the namespace and return its stdout and error, if any."""
+    global _executing
+    stdout = io.StringIO()
+    error = None
+    try:
+        with contextlib.redirect_stdout(stdout):
+            _set_cpu_limit(cpu_time_limit or None)
+            try:
+                _executing = True
+                exec(code, namespace)
+            finally:
+                _executing = False
+                _set_cpu_limit(None)
+    except BaseException as e:
+        error = repr(e)
+    output = stdout.getvalue()
+    if len(output) > MAX_OUTPUT_CHARS:
+        output = output[:MAX_OUTPUT_CHARS] + "\n... (output truncated)"
+    return output, error
+
+
+def worker_main(
+    conn,
+    warm_imports: tuple[str, ...],
+    cpu_time_limit: float,
+    max_namespaces: int,
+    spill_dir: Optional[str] = None,
+    spill_threshold_bytes: int = 0,
+) -> None:
+    """Serve execution requests from the pool until the pipe closes.
+
+    Requests are `(op, thread_id, code)` tuples, with op "run", "spill" (move
+    the thread's namespace to disk), "spill_others" (move every other
+    thread's namespace to disk) or "reset" (forget it). Before and after
+    each run, the least recently used namespaces of other threads are spilled
+    while the worker is over `max_namespaces` or `spill_threshold_bytes`, so
+    a run starts without the memory of idle threads. SIGUSR1 interrupts the
+    running code.
+    """
+    # Ctrl-C in the server's terminal is handled by the server
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _on_interrupt)
+
+    # One BLAS thread per worker, the pool provides the parallelism
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("MKL_NUM_THREADS", "1")
+    for module in warm_imports:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    conn.send("ready")
+
+    store = NamespaceStore(spill_dir, max_namespaces, spill_threshold_bytes)
+    while True:
+        try:
+            op, thread_id, code = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        # Spill directory trouble must not take the worker down
+        try:
+            if op == "reset":
+                store.drop(thread_id)
+                result = ("", None)
+            elif op == "spill":
+                store.spill(thread_id)
+                result = ("", None)
+            elif op == "spill_others":
+                store.spill_all(keep=thread_id)
+                result = ("", None)
+            else:
+                try:
+                    store.relieve_pressure(keep=thread_id)
+                except Exception:
+                    pass
+                result = _execute(code, store.get(thread_id), cpu_time_limit)
+        except Exception as e:
+            result = ("", repr(e))
+        conn.send(result)
+
+        if op == "run":
+            try:
+                store.relieve_pressure(keep=thread_id)
+            except Exception:
+                pass
@@ -1,34 +1,73 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import copy
+import functools
 import logging
-from typing import Dict, Any, Optional, List
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator, Optional, List
 from datetime import datetime
 
-from appwrite.client import Client
-from appwrite.services.databases import Databases
-from appwrite.services.users import Users
 from appwrite.exception import AppwriteException
 from appwrite.query import Query
 
 from src.config.appwrite_config import appwrite_config
 from src.config.tools import SearchEngine, RAGProvider
 from src.config.report_style import ReportStyle
+from src.utils.async_cache import AsyncTTLCache
+from src.utils.metrics import registry
 
 logger = logging.getLogger(__name__)
 
+# How long (in seconds) a user's config is served from memory
+CONFIG_CACHE_TTL = float(os.getenv("APPWRITE_CONFIG_CACHE_TTL", "60"))
+
+# Number of threads used for blocking Appwrite SDK calls
+APPWRITE_MAX_WORKERS = int(os.getenv("APPWRITE_MAX_WORKERS", "8"))
+
+# How long (in seconds) tool config updates are collected before being written
+TOOL_CONFIG_WRITE_DELAY = float(os.getenv("APPWRITE_TOOL_CONFIG_WRITE_DELAY", "0.05"))
+
+
+@dataclass
+class _ToolConfigBatch:
+    """Tool config updates of one user that are written together."""
+    
+    result: asyncio.Future
+    updates: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
 
 class AppwriteService:
-    """Service for managing user configurations with Appwrite."""
+    """Service for managing user configurations with Appwrite.
+
+    The Appwrite SDK is synchronous, so every call runs on a dedicated thread
+    pool to keep the event loop free. User configs are cached per user with a
+    TTL and kept up to date on writes from this process.
+    """
     
     def __init__(self):
+        self._config_cache = AsyncTTLCache(CONFIG_CACHE_TTL)
+        registry.register_cache("user_config", self._config_cache)
+        self._tool_config_batches: Dict[str, _ToolConfigBatch] = {}
+        self._tool_config_writes: Dict[str, asyncio.Future] = {}
+        # Pending batch writes, referenced so they are not garbage collected
+        self._write_tasks: set[asyncio.Task] = set()
         if not appwrite_config.is_configured():
             logger.warning("Appwrite is not configured. Service will be disabled.")
             self.client = None
             self.databases = None
             self.users = None
             return
-            
+
+        # The SDK client imports all Appwrite models, which takes about a
+        # second, so it is only loaded when Appwrite is configured
+        from appwrite.client import Client
+        from appwrite.services.databases import Databases
+        from appwrite.services.users import Users
+
         self.client = Client()
         self.client.set_endpoint(appwrite_config.endpoint)
         self.client.set_project(appwrite_config.project_id)
@@ -36,6 +75,14 @@ class AppwriteService:
         
         self.databases = Databases(self.client)
         self.users = Users(self.client)
+        self._executor = ThreadPoolExecutor(
+            max_workers=APPWRITE_MAX_WORKERS, thread_name_prefix="appwrite"
+        )
+    
+    async def _run(self, func, **kwargs):
+        """Run a blocking SDK call on the Appwrite thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, **kwargs))
     
     def is_available(self) -> bool:
         """Check if Appwrite service is available."""
@@ -47,7 +94,8 @@ class AppwriteService:
             raise Exception("Appwrite service is not available")
             
         try:
-            user = self.users.create(
+            user = await self._run(
+                self.users.create,
                 user_id=user_id,
                 email=email,
                 name=name,
@@ -68,7 +116,7 @@ class AppwriteService:
             raise Exception("Appwrite service is not available")
             
         try:
-            return self.users.get(user_id)
+            return await self._run(self.users.get, user_id=user_id)
         except AppwriteException as e:
             logger.error(f"Failed to get user {user_id}: {e}")
             raise
@@ -118,23 +166,38 @@ class AppwriteService:
         }
         
         try:
-            return self.databases.create_document(
+            document = await self._run(
+                self.databases.create_document,
                 database_id=appwrite_config.database_id,
                 collection_id=appwrite_config.configs_collection_id,
                 document_id=user_id,  # Use user_id as document_id for easy lookup
                 data=default_config
             )
+            self._config_cache.set(user_id, document)
+            return copy.deepcopy(document)
         except AppwriteException as e:
             logger.error(f"Failed to create default config for user {user_id}: {e}")
             raise
     
     async def get_user_config(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user configuration."""
+        """Get user configuration.
+
+        Reads are served from the per-user cache. Concurrent misses for the same
+        user share a single Appwrite request.
+        """
         if not self.is_available():
             raise Exception("Appwrite service is not available")
-            
+        
+        document = await self._config_cache.get_or_load(
+            user_id, lambda: self._load_user_config(user_id)
+        )
+        # Callers may modify the config, so never hand out the cached object
+        return copy.deepcopy(document)
+    
+    async def _load_user_config(self, user_id: str) -> Dict[str, Any]:
         try:
-            document = self.databases.get_document(
+            document = await self._run(
+                self.databases.get_document,
                 database_id=appwrite_config.database_id,
                 collection_id=appwrite_config.configs_collection_id,
                 document_id=user_id
@@ -155,42 +218,95 @@ class AppwriteService:
         # Add updated timestamp
         config_updates["updated_at"] = datetime.now().isoformat()
         
+        self._config_cache.invalidate(user_id)
         try:
-            return self.databases.update_document(
+            document = await self._run(
+                self.databases.update_document,
                 database_id=appwrite_config.database_id,
                 collection_id=appwrite_config.configs_collection_id,
                 document_id=user_id,
                 data=config_updates
             )
+            self._config_cache.set(user_id, document)
+            return copy.deepcopy(document)
         except AppwriteException as e:
             logger.error(f"Failed to update config for user {user_id}: {e}")
             raise
     
     async def update_tool_config(self, user_id: str, tool_name: str, tool_config: Dict[str, Any]) -> Dict[str, Any]:
         """Update specific tool configuration for a user."""
+        return await self.update_tool_configs(user_id, {tool_name: tool_config})
+    
+    async def update_tool_configs(self, user_id: str, tool_configs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Update several tool configurations for a user.
+        
+        Updates are held for TOOL_CONFIG_WRITE_DELAY seconds, and all updates
+        for the user within that window are written as one merged update.
+        
+        Args:
+            user_id: The user whose configuration is updated
+            tool_configs: New configurations keyed by tool name
+            
+        Returns:
+            The updated configuration document
+        """
         if not self.is_available():
             raise Exception("Appwrite service is not available")
-            
-        # Get current config
-        current_config = await self.get_user_config(user_id)
         
-        # Update tool config
-        if "tools_config" not in current_config:
-            current_config["tools_config"] = {}
+        batch = self._tool_config_batches.get(user_id)
+        if batch is None:
+            batch = _ToolConfigBatch(asyncio.get_running_loop().create_future())
+            self._tool_config_batches[user_id] = batch
+            task = asyncio.create_task(self._write_tool_configs(user_id, batch))
+            self._write_tasks.add(task)
+            task.add_done_callback(self._write_tasks.discard)
+        batch.updates.update(copy.deepcopy(tool_configs))
+        document = await asyncio.shield(batch.result)
+        return copy.deepcopy(document)
+    
+    async def _write_tool_configs(self, user_id: str, batch: "_ToolConfigBatch") -> None:
+        """Write a batch of tool config updates once its window has passed.
         
-        current_config["tools_config"][tool_name] = tool_config
-        current_config["updated_at"] = datetime.now().isoformat()
+        Batches for a user are written one after another, so updates made
+        through this service never overwrite each other. Each batch is merged
+        into the document read from Appwrite rather than the cache, which keeps
+        changes made by other server workers since the cache was filled.
+        """
+        previous_write = self._tool_config_writes.get(user_id)
+        self._tool_config_writes[user_id] = batch.result
+        await asyncio.sleep(TOOL_CONFIG_WRITE_DELAY)
+        # Updates arriving from now on go into the next batch
+        if self._tool_config_batches.get(user_id) is batch:
+            del self._tool_config_batches[user_id]
+        if previous_write is not None:
+            await asyncio.wait([previous_write])
         
         try:
-            return self.databases.update_document(
+            current_config = await self._load_user_config(user_id)
+            tools_config = current_config.get("tools_config") or {}
+            tools_config.update(batch.updates)
+            
+            self._config_cache.invalidate(user_id)
+            document = await self._run(
+                self.databases.update_document,
                 database_id=appwrite_config.database_id,
                 collection_id=appwrite_config.configs_collection_id,
                 document_id=user_id,
-                data={"tools_config": current_config["tools_config"], "updated_at": current_config["updated_at"]}
+                data={"tools_config": tools_config, "updated_at": datetime.now().isoformat()}
             )
-        except AppwriteException as e:
+            self._config_cache.set(user_id, document)
+            batch.result.set_result(document)
+        except Exception as e:
             logger.error(f"Failed to update tool config for user {user_id}: {e}")
-            raise
+            batch.result.set_exception(e)
+        finally:
+            if self._tool_config_writes.get(user_id) is batch.result:
+                del self._tool_config_writes[user_id]
+    
+    async def flush(self) -> None:
+        """Wait for batched tool config writes, e.g. before shutting down."""
+        while self._write_tasks:
+            await asyncio.gather(*self._write_tasks, return_exceptions=True)
     
     async def get_tool_config(self, user_id: str, tool_name: str) -> Optional[Dict[str, Any]]:
         """Get specific tool configuration for a user."""
@@ -199,26 +315,72 @@ class AppwriteService:
             return config["tools_config"].get(tool_name)
         return None
     
-    async def list_users_with_configs(self, limit: int = 25, offset: int = 0) -> List[Dict[str, Any]]:
-        """List users with their configurations."""
+    async def list_users_with_configs(
+        self,
+        limit: int = 25,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """List users with their configurations, most recently updated first.
+        
+        Pages are addressed with a cursor instead of an offset, so every page
+        costs the same no matter how deep it is. Documents are ordered by
+        `updated_at` with `$id` as the tie-breaker, which Appwrite uses to
+        resume after the cursor document.
+        
+        Args:
+            limit: Maximum number of users to return
+            cursor: `next_cursor` of the previous page, or None for the first page
+            fields: Attributes to return, or None for whole documents
+            
+        Returns:
+            The page of documents, the total number of configs, and the cursor
+            of the next page (None on the last page)
+        """
         if not self.is_available():
             raise Exception("Appwrite service is not available")
+        
+        queries = [
+            Query.limit(limit),
+            Query.order_desc("updated_at"),
+            Query.order_desc("$id"),
+        ]
+        if cursor:
+            queries.append(Query.cursor_after(cursor))
+        if fields:
+            # The cursor needs the document ID and the sort key
+            queries.append(Query.select(list(dict.fromkeys(["$id", "updated_at", *fields]))))
             
         try:
-            response = self.databases.list_documents(
+            response = await self._run(
+                self.databases.list_documents,
                 database_id=appwrite_config.database_id,
                 collection_id=appwrite_config.configs_collection_id,
-                queries=[
-                    Query.limit(limit),
-                    Query.offset(offset),
-                    Query.order_desc("updated_at")
-                ]
+                queries=queries
             )
-            return response["documents"]
         except AppwriteException as e:
             logger.error(f"Failed to list users with configs: {e}")
             raise
-
+        
+        documents = response["documents"]
+        return {
+            "documents": documents,
+            "total": response["total"],
+            "next_cursor": documents[-1]["$id"] if len(documents) == limit else None,
+        }
+    
+    async def iter_users_with_configs(
+        self, batch_size: int = 100, fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over all user configurations, one page at a time."""
+        cursor = None
+        while True:
+            page = await self.list_users_with_configs(limit=batch_size, cursor=cursor, fields=fields)
+            for document in page["documents"]:
+                yield document
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
 
 # Global instance
 appwrite_service = AppwriteService()
\ No newline at end of file
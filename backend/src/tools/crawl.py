@@ -7,8 +7,6 @@ from typing import Annotated
 from langchain_core.tools import tool
 from .decorators import log_io
 
-from src.crawler import Crawler
-
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +16,9 @@ def crawl_tool(
     url: Annotated[str, "The url to crawl."],
 ) -> str:
     """Use this to crawl a url and get a readable content in markdown format."""
+    # The crawler's HTML and markdown stack is loaded on first use
+    from src.crawler import Crawler
+
     try:
         crawler = Crawler()
         article = crawler.crawl(url)
@@ -3,17 +3,34 @@
 
 import logging
 import functools
+import time
 from typing import Any, Callable, Type, TypeVar
 
+from src.utils.cancellation import raise_if_cancelled
+from src.utils.log_utils import Preview, preview, should_sample
+from src.utils.tracing import tool_span
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
 
+# Injected by LangChain rather than chosen by the model, and large
+_UNLOGGED_KWARGS = ("config", "run_manager", "callbacks")
+
+
+def _params(args: tuple, kwargs: dict) -> Preview:
+    params = {k: v for k, v in kwargs.items() if k not in _UNLOGGED_KWARGS}
+    return preview([*args, params] if args else params)
+
+
 def log_io(func: Callable) -> Callable:
     """
     A decorator that logs the input parameters and output of a tool function.
 
+    Inputs and outputs are formatted lazily and truncated (see
+    src.utils.log_utils), and only for the sampled share of calls.
+
     Args:
         func: The tool function to be decorated
 
@@ -23,18 +40,34 @@ def log_io(func: Callable) -> Callable:
 
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
-        # Log input parameters
+        # Don't start new tool work for a workflow whose client has gone away
+        raise_if_cancelled()
+
         func_name = func.__name__
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
-        )
-        logger.info(f"Tool {func_name} called with parameters: {params}")
+        log = logger.isEnabledFor(logging.INFO) and should_sample()
+        if log:
+            logger.info(
+                "Tool %s called with parameters: %s",
+                func_name,
+                _params(args, kwargs),
+                extra={"tool": func_name},
+            )
 
         # Execute the function
-        result = func(*args, **kwargs)
-
-        # Log the output
-        logger.info(f"Tool {func_name} returned: {result}")
+        started = time.perf_counter()
+        with tool_span(func_name):
+            result = func(*args, **kwargs)
+
+        if log:
+            logger.info(
+                "Tool %s returned: %s",
+                func_name,
+                preview(result),
+                extra={
+                    "tool": func_name,
+                    "duration_ms": round((time.perf_counter() - started) * 1000),
+                },
+            )
 
         return result
 
@@ -47,18 +80,38 @@ class LoggedToolMixin:
     def _log_operation(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """Helper method to log tool operations."""
         tool_name = self.__class__.__name__.replace("Logged", "")
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+        logger.debug(
+            "Tool %s.%s called with parameters: %s",
+            tool_name,
+            method_name,
+            _params(args, kwargs),
+            extra={"tool": self.name},
+        )
+
+    def _log_result(self, result: Any) -> None:
+        logger.debug(
+            "Tool %s returned: %s",
+            self.__class__.__name__.replace("Logged", ""),
+            preview(result),
+            extra={"tool": self.name},
         )
-        logger.debug(f"Tool {tool_name}.{method_name} called with parameters: {params}")
 
     def _run(self, *args: Any, **kwargs: Any) -> Any:
         """Override _run method to add logging."""
+        raise_if_cancelled()
         self._log_operation("_run", *args, **kwargs)
-        result = super()._run(*args, **kwargs)
-        logger.debug(
-            f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
-        )
+        with tool_span(self.name):
+            result = super()._run(*args, **kwargs)
+        self._log_result(result)
+        return result
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """Override _arun method to add logging."""
+        raise_if_cancelled()
+        self._log_operation("_arun", *args, **kwargs)
+        with tool_span(self.name):
+            result = await super()._arun(*args, **kwargs)
+        self._log_result(result)
         return result
 
 
@@ -0,0 +1,279 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Pool of warm MCP server sessions shared across research steps.
+
+Opening an MCP session means spawning a subprocess (stdio) or connecting
+(SSE) and running the MCP handshake. The pool keeps one session per distinct
+server configuration open between steps, pings sessions that have been idle
+for a while before reusing them, closes sessions that stay idle too long (a
+background task checks every half idle timeout), and bounds the number of
+open sessions.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.tools import BaseTool
+
+from src.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+def mcp_config_key(connection: dict[str, Any]) -> str:
+    """Hash of a server connection config, used to share sessions."""
+    encoded = json.dumps(connection, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _PooledSession:
+    """An MCP session kept open by a dedicated task.
+
+    MCP transports are anyio task groups that must be entered and exited by
+    the same task, so the session lives in its own task until it is closed.
+    Tools bound to the session can be called from any task.
+    """
+
+    def __init__(self, key: str, connection: dict[str, Any]):
+        self.key = key
+        self.connection = connection
+        self.tools: list[BaseTool] = []
+        self.users = 0
+        self.last_used = time.monotonic()
+        self.last_checked = time.monotonic()
+        self._session = None
+        self._ready = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # Loaded on first use, so servers without MCP settings never import it
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+
+        try:
+            async with MultiServerMCPClient({"server": self.connection}) as client:
+                self._session = client.sessions["server"]
+                self.tools = client.get_tools()
+                self._ready.set_result(None)
+                await self._closing.wait()
+        except Exception as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            else:
+                logger.warning(f"MCP session {self.key[:12]} closed unexpectedly: {e}")
+        finally:
+            if not self._ready.done():
+                self._ready.cancel()
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self._ready.done()
+            and not self._ready.cancelled()
+            and self._ready.exception() is None
+        )
+
+    @property
+    def alive(self) -> bool:
+        return not self._task.done() and not self._closing.is_set()
+
+    async def wait_ready(self, timeout: float) -> None:
+        await asyncio.wait_for(asyncio.shield(self._ready), timeout=timeout)
+
+    async def ping(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._session.send_ping(), timeout=timeout)
+            self.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"MCP session {self.key[:12]} failed health check: {e}")
+            return False
+
+    async def close(self, timeout: float = 5.0) -> None:
+        self._closing.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    """Keeps MCP sessions open across steps, keyed by server config hash."""
+
+    def __init__(
+        self,
+        max_size: int = 16,
+        idle_timeout: float = 600,
+        health_check_interval: float = 60,
+        connect_timeout: float = 120,
+    ):
+        """
+        Args:
+            max_size: Maximum number of open sessions; idle sessions are closed
+                least recently used first once the pool is full
+            idle_timeout: Seconds after which an unused session is closed
+            health_check_interval: Sessions idle for longer than this are
+                pinged before they are reused
+            connect_timeout: Seconds to wait for a new session to initialize
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self._sessions: OrderedDict[str, _PooledSession] = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reaper: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def session(
+        self, servers: dict[str, dict[str, Any]]
+    ) -> AsyncIterator[list[BaseTool]]:
+        """Borrow sessions for the given servers and yield all of their tools.
+
+        Sessions stay open when the context exits and are reused by the next
+        caller with the same server configuration.
+        """
+        self._check_loop()
+        borrowed: list[_PooledSession] = []
+        try:
+            for name, connection in servers.items():
+                # Traced, so runs waiting on MCP startup show up in traces
+                with tracer.start_as_current_span(
+                    "mcp.acquire", attributes={"mcp.server": name}
+                ):
+                    pooled = await self._acquire(connection)
+                borrowed.append(pooled)
+            yield [tool for pooled in borrowed for tool in pooled.tools]
+        finally:
+            for pooled in borrowed:
+                pooled.users -= 1
+                pooled.last_used = time.monotonic()
+            await self.evict()
+
+    async def _acquire(self, connection: dict[str, Any]) -> _PooledSession:
+        key = mcp_config_key(connection)
+        pooled = self._sessions.get(key)
+        if pooled is not None and pooled.alive:
+            if pooled.ready and not await self._is_healthy(pooled):
+                await self._discard(pooled)
+                pooled = None
+        elif pooled is not None:
+            await self._discard(pooled)
+            pooled = None
+
+        if pooled is None:
+            logger.info(f"Opening MCP session {key[:12]}")
+            pooled = _PooledSession(key, connection)
+            self._sessions[key] = pooled
+        self._sessions.move_to_end(key)
+
+        # Count the borrower before waiting, so concurrent callers share the
+        # handshake and the session is not evicted under them
+        pooled.users += 1
+        try:
+            await pooled.wait_ready(self.connect_timeout)
+        except BaseException:
+            pooled.users -= 1
+            # Keep a session that is still starting up for other waiters
+            if pooled._task.done() or pooled.users == 0:
+                await self._discard(pooled)
+            raise
+        return pooled
+
+    async def _is_healthy(self, pooled: _PooledSession) -> bool:
+        last_seen = max(pooled.last_used, pooled.last_checked)
+        if time.monotonic() - last_seen < self.health_check_interval:
+            return True
+        if pooled.users > 0:
+            # Someone is using it right now, which is as good as a ping
+            return True
+        return await pooled.ping(timeout=10)
+
+    async def _discard(self, pooled: _PooledSession) -> None:
+        if self._sessions.get(pooled.key) is pooled:
+            del self._sessions[pooled.key]
+        await pooled.close()
+
+    async def evict(self) -> None:
+        """Close idle sessions past the idle timeout, then the least recently
+        used idle sessions while the pool is over capacity."""
+        now = time.monotonic()
+        for pooled in list(self._sessions.values()):
+            if pooled.users == 0 and now - pooled.last_used > self.idle_timeout:
+                logger.info(f"Closing idle MCP session {pooled.key[:12]}")
+                await self._discard(pooled)
+        for pooled in list(self._sessions.values()):
+            if len(self._sessions) <= self.max_size:
+                break
+            if pooled.users == 0:
+                await self._discard(pooled)
+
+    async def _reap(self) -> None:
+        """Evict idle sessions even while no step finishes using the pool."""
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1))
+            try:
+                await self.evict()
+            except Exception as e:
+                logger.warning(f"Failed to evict idle MCP sessions: {e}")
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def close_all(self) -> None:
+        """Close every pooled session."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for pooled in list(self._sessions.values()):
+            await self._discard(pooled)
+
+    def _check_loop(self) -> None:
+        # Sessions are bound to the event loop they were opened on. A new loop
+        # (e.g. a fresh asyncio.run) cannot reuse them.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._sessions:
+                logger.info("Event loop changed, dropping pooled MCP sessions")
+                self._close_on(self._loop, list(self._sessions.values()))
+            self._sessions.clear()
+            if self._reaper is not None and self._loop is not None:
+                if not self._loop.is_closed():
+                    self._loop.call_soon_threadsafe(self._reaper.cancel)
+            self._reaper = None
+            self._loop = loop
+        self._start_reaper()
+
+    @staticmethod
+    def _close_on(
+        loop: Optional[asyncio.AbstractEventLoop], sessions: list[_PooledSession]
+    ) -> None:
+        """Let the tasks holding `sessions` close them on their own loop."""
+        if loop is None or loop.is_closed():
+            # asyncio.run cancelled the tasks, which closed the sessions
+            return
+        for pooled in sessions:
+            loop.call_soon_threadsafe(pooled._closing.set)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+mcp_session_pool = MCPSessionPool(
+    max_size=int(os.getenv("MCP_POOL_MAX_SIZE", "16")),
+    idle_timeout=float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "600")),
+    health_check_interval=float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "60")),
+    connect_timeout=float(os.getenv("MCP_POOL_CONNECT_TIMEOUT", "120")),
+)
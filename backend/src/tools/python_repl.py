@@ -3,14 +3,21 @@
 
 import logging
 from typing import Annotated
+
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from langchain_experimental.utilities import PythonREPL
+
+from src.sandbox import python_sandbox_pool
 from .decorators import log_io
 
-# Initialize REPL and logger
-repl = PythonREPL()
 logger = logging.getLogger(__name__)
 
+STATE_RESET_NOTICE = (
+    "Note: the Python sandbox state was reset since the last step, so variables "
+    "defined earlier (e.g. loaded DataFrames) are gone. Load or compute them "
+    "again before using them.\n"
+)
+
 
 @tool
 @log_io
@@ -18,6 +25,7 @@ def python_repl_tool(
     code: Annotated[
         str, "The python code to execute to do further analysis or calculation."
     ],
+    config: RunnableConfig,
 ):
     """Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
     you should print it out with `print(...)`. This is visible to the user."""
@@ -26,18 +34,29 @@ def python_repl_tool(
         logger.error(error_msg)
         return f"Error executing code:\n```python\n{code}\n```\nError: {error_msg}"
 
-    logger.info("Executing Python code")
+    # Code runs in a sandbox worker, in a namespace private to the research
+    # thread, so variables carry over between the thread's coder steps
+    thread_id = (config or {}).get("configurable", {}).get("thread_id", "default")
+    logger.info(f"Executing Python code for thread {thread_id}")
     try:
-        result = repl.run(code)
-        # Check if the result is an error message by looking for typical error patterns
-        if isinstance(result, str) and ("Error" in result or "Exception" in result):
-            logger.error(result)
-            return f"Error executing code:\n```python\n{code}\n```\nError: {result}"
-        logger.info("Code execution successful")
+        result = python_sandbox_pool.run(code, thread_id=thread_id)
     except BaseException as e:
         error_msg = repr(e)
         logger.error(error_msg)
         return f"Error executing code:\n```python\n{code}\n```\nError: {error_msg}"
 
-    result_str = f"Successfully executed:\n```python\n{code}\n```\nStdout: {result}"
+    if result.error:
+        logger.error(result.error)
+        result_str = (
+            f"Error executing code:\n```python\n{code}\n```\nError: {result.error}"
+        )
+    else:
+        logger.info("Code execution successful")
+        result_str = (
+            f"Successfully executed:\n```python\n{code}\n```\nStdout: {result.output}"
+        )
+    if result.state_reset:
+        # Tell the coder, which would otherwise only see a NameError
+        logger.warning(f"Python sandbox state of thread {thread_id} was reset")
+        result_str = STATE_RESET_NOTICE + result_str
     return result_str
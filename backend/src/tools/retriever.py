@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+from collections import OrderedDict
 from typing import List, Optional, Type
 from langchain_core.tools import BaseTool
 from langchain_core.callbacks import (
@@ -10,8 +11,10 @@ from langchain_core.callbacks import (
 )
 from pydantic import BaseModel, Field
 
-from src.config.tools import SELECTED_RAG_PROVIDER
+from src.config.reloader import current_config
+from src.config.tools import resolve_rag_provider
 from src.rag import Document, Retriever, Resource, build_retriever
+from src.utils.tracing import tool_span
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +41,10 @@ class RetrieverTool(BaseTool):
         logger.info(
             f"Retriever tool query: {keywords}", extra={"resources": self.resources}
         )
-        documents = self.retriever.query_relevant_documents(keywords, self.resources)
+        with tool_span(self.name):
+            documents = self.retriever.query_relevant_documents(
+                keywords, self.resources
+            )
         if not documents:
             return "No results found from the local knowledge base."
         return [doc.to_dict() for doc in documents]
@@ -51,12 +57,34 @@ class RetrieverTool(BaseTool):
         return self._run(keywords, run_manager.get_sync())
 
 
-def get_retriever_tool(resources: List[Resource]) -> RetrieverTool | None:
+# Retriever tools per provider and resource set, so agents built on them can
+# be reused
+_retriever_tools: OrderedDict[tuple, RetrieverTool] = OrderedDict()
+_RETRIEVER_TOOL_CACHE_SIZE = 64
+
+
+def get_retriever_tool(
+    resources: List[Resource], provider: Optional[str] = None
+) -> RetrieverTool | None:
     if not resources:
         return None
-    logger.info(f"create retriever tool: {SELECTED_RAG_PROVIDER}")
-    retriever = build_retriever()
+    provider = resolve_rag_provider(provider)
+    key = (
+        provider,
+        tuple(resource.uri for resource in resources),
+        current_config().section_version("rag"),
+    )
+    if key in _retriever_tools:
+        _retriever_tools.move_to_end(key)
+        return _retriever_tools[key]
+
+    logger.info(f"create retriever tool: {provider}")
+    retriever = build_retriever(provider)
 
     if not retriever:
         return None
-    return RetrieverTool(retriever=retriever, resources=resources)
+    tool = RetrieverTool(retriever=retriever, resources=resources)
+    _retriever_tools[key] = tool
+    while len(_retriever_tools) > _RETRIEVER_TOOL_CACHE_SIZE:
+        _retriever_tools.popitem(last=False)
+    return tool
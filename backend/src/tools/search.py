@@ -1,15 +1,16 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import functools
 import json
 import logging
 import os
+import threading
+from collections import OrderedDict
 
-from langchain_community.tools import BraveSearch, DuckDuckGoSearchResults
-from langchain_community.tools.arxiv import ArxivQueryRun
-from langchain_community.utilities import ArxivAPIWrapper, BraveSearchWrapper
-
-from src.config import SearchEngine, SELECTED_SEARCH_ENGINE
+from src.config import SearchEngine
+from src.config.tools import default_search_engine, resolve_search_engine
+from src.config.reloader import config_reloader, current_config
 from src.tools.tavily_search.tavily_search_results_with_images import (
     TavilySearchResultsWithImages,
 )
@@ -18,16 +19,87 @@ from src.tools.decorators import create_logged_tool
 
 logger = logging.getLogger(__name__)
 
-# Create logged versions of the search tools
+# Create logged versions of the search tools. Tavily is the default engine;
+# the others are only imported when they are selected.
 LoggedTavilySearch = create_logged_tool(TavilySearchResultsWithImages)
-LoggedDuckDuckGoSearch = create_logged_tool(DuckDuckGoSearchResults)
-LoggedBraveSearch = create_logged_tool(BraveSearch)
-LoggedArxivSearch = create_logged_tool(ArxivQueryRun)
 
 
-# Get the selected search tool
-def get_web_search_tool(max_search_results: int):
-    if SELECTED_SEARCH_ENGINE == SearchEngine.TAVILY.value:
+@functools.cache
+def _logged_community_tool(name: str):
+    if name == "LoggedDuckDuckGoSearch":
+        from langchain_community.tools import DuckDuckGoSearchResults
+
+        return create_logged_tool(DuckDuckGoSearchResults)
+    if name == "LoggedBraveSearch":
+        from langchain_community.tools import BraveSearch
+
+        return create_logged_tool(BraveSearch)
+    if name == "LoggedArxivSearch":
+        from langchain_community.tools.arxiv import ArxivQueryRun
+
+        return create_logged_tool(ArxivQueryRun)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __getattr__(name: str):
+    return _logged_community_tool(name)
+
+
+# Search tools are stateless, so one instance per configuration is shared by
+# all runs, whichever engine they select. Keyed by engine, result count and the
+# version of the search credentials; the least recently used are dropped.
+_web_search_tools: OrderedDict[tuple[str, int, int], object] = OrderedDict()
+_WEB_SEARCH_TOOL_CACHE_SIZE = 32
+_web_search_tools_lock = threading.Lock()
+
+# Engines whose tools are built ahead of the first run (comma-separated);
+# defaults to the default engine
+SEARCH_ENGINES = os.getenv("SEARCH_ENGINES", "")
+# Result count the tools are built for ahead of time (the runs' default)
+SEARCH_PREBUILD_RESULTS = int(os.getenv("SEARCH_PREBUILD_RESULTS", "3"))
+
+
+# Get the search tool of an engine, by default the selected one
+def get_web_search_tool(max_search_results: int, engine: str | None = None):
+    engine = resolve_search_engine(engine)
+    version = current_config().section_version("search")
+    key = (engine, max_search_results, version)
+    with _web_search_tools_lock:
+        if key in _web_search_tools:
+            _web_search_tools.move_to_end(key)
+            return _web_search_tools[key]
+        tool = _create_web_search_tool(engine, max_search_results)
+        _web_search_tools[key] = tool
+        while len(_web_search_tools) > _WEB_SEARCH_TOOL_CACHE_SIZE:
+            _web_search_tools.popitem(last=False)
+        return tool
+
+
+def prebuild_web_search_tools(
+    engines: str = SEARCH_ENGINES, max_search_results: int = SEARCH_PREBUILD_RESULTS
+) -> None:
+    """Build the search tools of `engines` ahead of the first run."""
+    selected = [engine.strip() for engine in engines.split(",") if engine.strip()]
+    for engine in selected or [default_search_engine()]:
+        try:
+            get_web_search_tool(max_search_results, engine)
+        except Exception as e:
+            logger.warning(f"Failed to build the {engine} search tool: {e}")
+
+
+def _drop_stale_search_tools(old, new) -> None:
+    version = new.section_version("search")
+    with _web_search_tools_lock:
+        for key in list(_web_search_tools):
+            if key[2] != version:
+                _web_search_tools.pop(key, None)
+
+
+config_reloader.on_reload(_drop_stale_search_tools)
+
+
+def _create_web_search_tool(engine: str, max_search_results: int):
+    if engine == SearchEngine.TAVILY.value:
         return LoggedTavilySearch(
             name="web_search",
             max_results=max_search_results,
@@ -35,21 +107,25 @@ def get_web_search_tool(max_search_results: int):
             include_images=True,
             include_image_descriptions=True,
         )
-    elif SELECTED_SEARCH_ENGINE == SearchEngine.DUCKDUCKGO.value:
-        return LoggedDuckDuckGoSearch(
+    elif engine == SearchEngine.DUCKDUCKGO.value:
+        return _logged_community_tool("LoggedDuckDuckGoSearch")(
             name="web_search",
             num_results=max_search_results,
         )
-    elif SELECTED_SEARCH_ENGINE == SearchEngine.BRAVE_SEARCH.value:
-        return LoggedBraveSearch(
+    elif engine == SearchEngine.BRAVE_SEARCH.value:
+        from langchain_community.utilities import BraveSearchWrapper
+
+        return _logged_community_tool("LoggedBraveSearch")(
             name="web_search",
             search_wrapper=BraveSearchWrapper(
                 api_key=os.getenv("BRAVE_SEARCH_API_KEY", ""),
                 search_kwargs={"count": max_search_results},
             ),
         )
-    elif SELECTED_SEARCH_ENGINE == SearchEngine.ARXIV.value:
-        return LoggedArxivSearch(
+    elif engine == SearchEngine.ARXIV.value:
+        from langchain_community.utilities import ArxivAPIWrapper
+
+        return _logged_community_tool("LoggedArxivSearch")(
             name="web_search",
             api_wrapper=ArxivAPIWrapper(
                 top_k_results=max_search_results,
@@ -58,4 +134,4 @@ def get_web_search_tool(max_search_results: int):
             ),
         )
     else:
-        raise ValueError(f"Unsupported search engine: {SELECTED_SEARCH_ENGINE}")
+        raise ValueError(f"Unsupported search engine: {engine}")
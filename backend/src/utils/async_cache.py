@@ -0,0 +1,135 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+In-process read-through cache for coroutine loaders.
+
+Entries expire after a TTL. Concurrent misses for the same key share a
+single load (single-flight), and a key that is invalidated while a load is
+in flight does not get the stale result stored. Optionally, expired entries
+keep being served for a grace period while they are reloaded in the
+background (stale-while-revalidate).
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """LRU-bounded TTL cache with single-flight loading."""
+
+    def __init__(
+        self, ttl_seconds: float, max_entries: int = 10000, stale_seconds: float = 0
+    ):
+        """
+        Args:
+            ttl_seconds: How long an entry is served before it is reloaded
+            max_entries: Maximum number of entries kept, least recently used
+                entries are evicted first
+            stale_seconds: How long past its TTL an entry is still served while
+                it is reloaded in the background
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._loads: dict[Hashable, asyncio.Future] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry and discard the result of any load in flight."""
+        self._entries.pop(key, None)
+        self._loads.pop(key, None)
+
+    def clear(self) -> None:
+        for key in list(self._entries) + list(self._loads):
+            self.invalidate(key)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        refresh: bool = False,
+    ) -> Any:
+        """Return the cached value, loading it with `loader` on a miss.
+
+        Concurrent callers that miss on the same key wait for one shared load.
+        An entry within its stale period is returned right away and reloaded
+        in the background.
+
+        Args:
+            key: The cache key
+            loader: Coroutine function that loads the value
+            refresh: Reload even if the entry is fresh
+        """
+        if refresh:
+            self.invalidate(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age <= self.ttl_seconds + self.stale_seconds:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                if age > self.ttl_seconds:
+                    self._start_load(key, loader)
+                return value
+            del self._entries[key]
+        self.misses += 1
+
+        # Shield the shared load so one cancelled caller does not cancel it
+        # for everyone else
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def _start_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Future:
+        load = self._loads.get(key)
+        if load is None:
+            load = asyncio.ensure_future(loader())
+            self._loads[key] = load
+            load.add_done_callback(lambda _: self._on_load_done(key, load))
+        return load
+
+    def _on_load_done(self, key: Hashable, load: asyncio.Future) -> None:
+        if self._loads.get(key) is not load:
+            # Invalidated while loading, the result may already be stale
+            return
+        del self._loads[key]
+        if load.cancelled():
+            return
+        if load.exception() is not None:
+            logger.debug(f"Failed to load cache entry {key}: {load.exception()}")
+            return
+        if load.result() is not None:
+            self.set(key, load.result())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
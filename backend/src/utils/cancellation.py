@@ -0,0 +1,68 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Cooperative cancellation for research workflows.
+
+A CancellationToken is bound to the context of the task that drives a
+workflow. LangGraph copies the context into child tasks and executor threads,
+so nodes and tools can check the token without it being passed around.
+"""
+
+import contextvars
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowCancelledError(Exception):
+    """Raised inside a workflow once its run has been cancelled."""
+
+
+class CancellationToken:
+    """Thread-safe cancellation flag for a single workflow run."""
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Mark the run as cancelled. Subsequent checks will raise."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+            logger.info(f"Workflow for thread {self.thread_id} cancelled: {reason}")
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise WorkflowCancelledError(
+                f"Workflow for thread {self.thread_id} was cancelled: {self.reason}"
+            )
+
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = (
+    contextvars.ContextVar("cancellation_token", default=None)
+)
+
+
+def bind_cancellation_token(token: CancellationToken) -> contextvars.Token:
+    """Bind a token to the current context and return the reset handle."""
+    return _current_token.set(token)
+
+
+def get_cancellation_token() -> Optional[CancellationToken]:
+    return _current_token.get()
+
+
+def raise_if_cancelled() -> None:
+    """Raise WorkflowCancelledError if the current workflow has been cancelled."""
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
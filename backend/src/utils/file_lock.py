@@ -0,0 +1,40 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Advisory file locks that elect one of several server workers to own a
+resource on disk (the in-memory checkpoint snapshot).
+"""
+
+import logging
+from pathlib import Path
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Open lock files, kept so the locks are held until the process exits
+_held: dict[str, IO] = {}
+
+
+def try_lock(path: str) -> bool:
+    """Take an exclusive lock on `path` without waiting.
+
+    Locks are held until the process exits. Returns True if this process
+    holds the lock, which always succeeds where file locks are unsupported.
+    """
+    if path in _held or fcntl is None:
+        return True
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _held[path] = lock_file
+    return True
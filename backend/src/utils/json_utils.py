@@ -4,6 +4,7 @@
 import logging
 import json
 import json_repair
+from typing import Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -37,3 +38,96 @@ def repair_json_output(content: str) -> str:
         except Exception as e:
             logger.warning(f"JSON repair failed: {e}")
     return content
+
+
+def parse_json_output(content: str) -> Any:
+    """
+    Parse JSON output, repairing it only if strict parsing fails.
+
+    Args:
+        content (str): String content that may contain JSON
+
+    Returns:
+        The parsed JSON value
+
+    Raises:
+        json.JSONDecodeError: If the content is not JSON even after repair
+    """
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return json.loads(repair_json_output(content))
+
+
+class JSONArrayItemParser:
+    """
+    Extract the object items of a top-level array field from a JSON object
+    that arrives in chunks, e.g. from a streaming LLM.
+
+    Each item is returned as soon as its closing bracket arrives, without
+    waiting for the rest of the document. Text around the object, such as a
+    ```json fence, is ignored.
+    """
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: Name of the top-level field holding the array
+        """
+        self.key = key
+        self.count = 0
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[int, Any]]:
+        """
+        Add a chunk of the document.
+
+        Returns:
+            (index, item) pairs of the items completed by this chunk
+        """
+        self._text += chunk
+        text = self._text
+        items = []
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start + 1 : i]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._last_string == self.key:
+                    self._in_array = True
+                elif char == "{" and self._in_array and self._depth == 3:
+                    self._item_start = i
+            elif char in "}]":
+                if char == "}" and self._depth == 3 and self._item_start is not None:
+                    try:
+                        items.append(
+                            (self.count, json.loads(text[self._item_start : i + 1]))
+                        )
+                        self.count += 1
+                    except json.JSONDecodeError:
+                        logger.debug("Skipping an array item that is not valid JSON")
+                    self._item_start = None
+                elif char == "]" and self._depth == 2:
+                    self._in_array = False
+                self._depth -= 1
+        self._pos = len(text)
+        return items
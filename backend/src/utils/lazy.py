@@ -0,0 +1,38 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import threading
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """A value that is created on first use.
+
+    Attribute access is forwarded to the value, so a module-level
+    `graph = Lazy(build_graph)` can be used like the compiled graph while
+    deferring its construction (and the imports it needs) out of module
+    import. The factory runs at most once, even with concurrent first uses.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._value: Any = None
+        self._created = False
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    self._value = self._factory()
+                    self._created = True
+        return self._value
+
+    @property
+    def created(self) -> bool:
+        return self._created
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
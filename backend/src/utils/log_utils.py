@@ -0,0 +1,122 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Cheap logging of large values on hot paths.
+
+Tool inputs and outputs (crawled pages, raw search results, agent inputs with
+the whole plan) can be megabytes. `preview` wraps such a value so that it is
+only formatted if the record is actually emitted, and then only up to a fixed
+number of characters. `should_sample` lets callers log the I/O of a fraction
+of calls, and `install_queue_logging` moves writing records to the handlers
+off the calling thread.
+
+Configuration:
+    LOG_PREVIEW_CHARS: Maximum length of a formatted preview
+    TOOL_LOG_SAMPLE_RATE: Fraction of tool calls whose I/O is logged
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import reprlib
+from typing import Any, Optional
+
+LOG_PREVIEW_CHARS = int(os.getenv("LOG_PREVIEW_CHARS", "500"))
+TOOL_LOG_SAMPLE_RATE = float(os.getenv("TOOL_LOG_SAMPLE_RATE", "1.0"))
+
+
+class Preview:
+    """A value that formats itself lazily and truncated when logged."""
+
+    __slots__ = ("value", "max_chars", "_text")
+
+    def __init__(self, value: Any, max_chars: Optional[int] = None):
+        self.value = value
+        self.max_chars = LOG_PREVIEW_CHARS if max_chars is None else max_chars
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = format_preview(self.value, self.max_chars)
+        return self._text
+
+    __repr__ = __str__
+
+
+def preview(value: Any, max_chars: Optional[int] = None) -> Preview:
+    """Wrap a value for logging with %-style arguments.
+
+    Example:
+        logger.info("Tool %s returned: %s", name, preview(result))
+    """
+    return Preview(value, max_chars)
+
+
+def format_preview(value: Any, max_chars: int = LOG_PREVIEW_CHARS) -> str:
+    """Format a value in at most about `max_chars` characters.
+
+    Strings are cut directly. Containers are formatted with reprlib, which
+    stops descending into long strings and collections instead of formatting
+    them in full first.
+    """
+    if isinstance(value, str):
+        text = value
+        size = len(value)
+    else:
+        formatter = reprlib.Repr()
+        formatter.maxstring = max_chars
+        formatter.maxother = max_chars
+        formatter.maxlist = formatter.maxtuple = formatter.maxdict = 20
+        formatter.maxset = formatter.maxfrozenset = 20
+        formatter.maxlevel = 4
+        text = formatter.repr(value)
+        size = None
+    if len(text) <= max_chars:
+        return text
+    suffix = f"... ({size} chars)" if size is not None else "..."
+    return text[:max_chars] + suffix
+
+
+def should_sample(rate: float = TOOL_LOG_SAMPLE_RATE) -> bool:
+    """Whether to log this call, for a sampling rate between 0 and 1."""
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def install_queue_logging(logger: Optional[logging.Logger] = None) -> None:
+    """Route the records of a logger (the root logger by default) through a
+    queue, and write them to its current handlers on a background thread.
+
+    Records are still rendered to a message on the calling thread, so values
+    logged later are not affected by changes made in the meantime. Idempotent.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    logger = logger or logging.getLogger()
+    handlers = list(logger.handlers)
+    if not handlers:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_queue_logging)
+
+
+def stop_queue_logging() -> None:
+    """Write the queued records and stop the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
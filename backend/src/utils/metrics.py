@@ -0,0 +1,402 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Minimal Prometheus-compatible metrics.
+
+Counters, gauges and histograms with labels, rendered in the Prometheus text
+exposition format (version 0.0.4). Metrics are thread-safe, since graph nodes
+and tools run in executor threads. Caches register themselves with
+`register_cache` and their hit and miss counts are read at scrape time;
+other values that are only known at scrape time can be added with
+`register_collector`.
+
+With several server workers, each has its own registry and a scrape reaches
+one of them at random. If METRICS_MULTIPROC_DIR is set, workers write their
+values to a file in that directory every METRICS_WRITE_INTERVAL seconds and a
+scrape renders the sum over all files, like the multiprocess mode of
+prometheus_client. Counters and histograms of workers that have stopped are
+kept; their gauges are dropped once their file is stale.
+
+Configuration:
+    METRICS_SNAPSHOT_FILE: Where the last values are written on shutdown, in
+        the format of the node exporter's textfile collector; empty disables
+    METRICS_MULTIPROC_DIR: Directory shared by the workers; empty disables
+    METRICS_WRITE_INTERVAL: Seconds between writes of a worker's values
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+METRICS_SNAPSHOT_FILE = os.getenv("METRICS_SNAPSHOT_FILE", "")
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_WRITE_INTERVAL = float(os.getenv("METRICS_WRITE_INTERVAL", "5"))
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: dict[str, Any]) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def to_dict(self) -> dict[str, Any]:
+        """The metric and its values, for another process to merge."""
+        with self._lock:
+            values = [
+                [list(key), json.loads(json.dumps(value))]
+                for key, value in self._values.items()
+            ]
+        return {
+            "name": self.name,
+            "type": self.type,
+            "documentation": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": values,
+        }
+
+    def merge(self, values: list) -> None:
+        """Add values written by `to_dict`."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def merge(self, values: list) -> None:
+        with self._lock:
+            for key, value in values:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Observations counted in cumulative buckets, with their sum."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Optional["MetricsRegistry"] = None,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        data = super().to_dict()
+        data["buckets"] = list(self.buckets[:-1])
+        return data
+
+    def merge(self, values: list) -> None:
+        with self._lock:
+            for key, (counts, total, count) in values:
+                key = tuple(key)
+                state = self._values.get(key)
+                if state is None:
+                    state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+                state[2] += count
+
+    def get_count(self, **labels: Any) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def get_sum(self, **labels: Any) -> float:
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, (list(state[0]), state[1], state[2]))
+                for key, state in self._values.items()
+            )
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+class CacheStats:
+    """Hit and miss counts of an in-process cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[_Metric]]] = []
+        self._caches: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.worker_id = uuid.uuid4().hex
+        self._share_task: Optional[asyncio.Task] = None
+        self._shared_dir = ""
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        """Add a function that returns unregistered metrics at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def register_cache(self, name: str, cache: Any) -> None:
+        """Report the `hits` and `misses` attributes of a cache."""
+        with self._lock:
+            self._caches[name] = cache
+
+    def _cache_metrics(self) -> list[_Metric]:
+        hits = Counter("deerflow_cache_hits_total", "Cache hits", ["cache"])
+        misses = Counter("deerflow_cache_misses_total", "Cache misses", ["cache"])
+        for name, cache in self._caches.items():
+            hits.inc(cache.hits, cache=name)
+            misses.inc(cache.misses, cache=name)
+        return [hits, misses] if self._caches else []
+
+    def collect(self) -> list[_Metric]:
+        """The registered metrics and those read at scrape time."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        metrics.extend(self._cache_metrics())
+        for collector in collectors:
+            metrics.extend(collector())
+        return metrics
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        return _render(self.collect())
+
+    def write(self, path: str) -> None:
+        """Write all metrics to a file, replacing it atomically."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def write_worker_file(self, directory: str, worker_id: str) -> None:
+        """Write this worker's values for `render_workers` to merge."""
+        path = Path(directory) / f"{worker_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "written_at": time.time(),
+            "metrics": [metric.to_dict() for metric in self.collect()],
+        }
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def render_workers(self, directory: str, worker_id: str, stale_after: float) -> str:
+        """Render the sum of the values of all workers sharing `directory`.
+
+        Gauges of workers that have not written for `stale_after` seconds
+        are left out.
+        """
+        self.write_worker_file(directory, worker_id)
+        merged: dict[str, _Metric] = {}
+        now = time.time()
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # Being replaced, or written by a worker that crashed midway
+                continue
+            stale = now - data["written_at"] > stale_after
+            for item in data["metrics"]:
+                if item["type"] == "gauge" and stale:
+                    continue
+                metric = merged.get(item["name"])
+                if metric is None:
+                    metric = merged[item["name"]] = _metric_from_dict(item)
+                metric.merge(item["values"])
+        return _render(merged.values())
+
+    def share(self, directory: str, interval: float = METRICS_WRITE_INTERVAL):
+        """Write this worker's values to `directory` every `interval` seconds
+        from the running loop, until `stop_sharing`."""
+        self._shared_dir = directory
+
+        async def write_periodically():
+            while True:
+                await asyncio.to_thread(
+                    self.write_worker_file, directory, self.worker_id
+                )
+                await asyncio.sleep(interval)
+
+        self._share_task = asyncio.get_running_loop().create_task(write_periodically())
+
+    def stop_sharing(self) -> None:
+        """Stop writing, after writing the final values of this worker."""
+        if self._share_task is None:
+            return
+        self._share_task.cancel()
+        self._share_task = None
+        self.write_worker_file(self._shared_dir, self.worker_id)
+
+
+def _metric_from_dict(data: dict[str, Any]) -> _Metric:
+    if data["type"] == "histogram":
+        return Histogram(
+            data["name"],
+            data["documentation"],
+            data["labelnames"],
+            buckets=data["buckets"],
+        )
+    cls = Gauge if data["type"] == "gauge" else Counter
+    return cls(data["name"], data["documentation"], data["labelnames"])
+
+
+def _render(metrics: Iterable[_Metric]) -> str:
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,547 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Minimal OpenTelemetry-compatible tracing.
+
+Spans are kept in a context variable, so spans started in graph nodes, tools
+and outbound HTTP requests become children of the span of the request that
+caused them. This includes work in threads started by LangChain's
+run_in_executor or asyncio.to_thread, which copy the context. Finished spans
+are exported in the background in the OTLP JSON format, either appended to a
+local file or posted to an OTLP/HTTP endpoint such as a local collector or
+Jaeger. At most TRACING_MAX_QUEUE_SIZE spans wait for export; while an
+exporter cannot keep up, further spans are dropped and counted in
+deerflow_tracing_dropped_spans_total.
+
+Configuration:
+    TRACING_EXPORTER: "file", "otlp" or "none" (default)
+    TRACING_FILE: File the "file" exporter appends to, one OTLP request per line
+    TRACING_OTLP_ENDPOINT: URL the "otlp" exporter posts to
+    TRACING_SERVICE_NAME: service.name resource attribute
+    TRACING_MAX_QUEUE_SIZE: Finished spans kept while waiting for export
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+
+from src.utils.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv(
+    "TRACING_FILE",
+    str(Path(__file__).parent.parent.parent / "data" / "traces" / "spans.jsonl"),
+)
+TRACING_OTLP_ENDPOINT = os.getenv(
+    "TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+)
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "deerflow")
+# The default of OpenTelemetry's BatchSpanProcessor
+TRACING_MAX_QUEUE_SIZE = int(os.getenv("TRACING_MAX_QUEUE_SIZE", "2048"))
+
+dropped_spans = Counter(
+    "deerflow_tracing_dropped_spans_total",
+    "Finished spans dropped because the export queue was full",
+    registry=registry,
+)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: dict[str, Any] = dict(attributes or {})
+        self.events: list[dict[str, Any]] = []
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+
+    @property
+    def is_recording(self) -> bool:
+        return self.end_time_ns is None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_status(self, code: int, message: str = "") -> None:
+        self.status_code = code
+        self.status_message = message
+
+    def record_exception(self, error: BaseException) -> None:
+        self.events.append(
+            {
+                "name": "exception",
+                "time_ns": time.time_ns(),
+                "attributes": {
+                    "exception.type": type(error).__name__,
+                    "exception.message": str(error)[:1000],
+                },
+            }
+        )
+        self.set_status(STATUS_ERROR, type(error).__name__)
+
+    def end(self) -> None:
+        if self.end_time_ns is not None:
+            return
+        self.end_time_ns = time.time_ns()
+        self.tracer._on_end(self)
+
+    def to_otlp(self) -> dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns or self.start_time_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status_code},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        if self.events:
+            span["events"] = [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["time_ns"]),
+                    "attributes": _otlp_attributes(event["attributes"]),
+                }
+                for event in self.events
+            ]
+        return span
+
+
+class _NonRecordingSpan(Span):
+    """Returned while tracing is disabled; all operations are no-ops."""
+
+    def __init__(self):
+        self.name = ""
+        self.trace_id = "0" * 32
+        self.span_id = "0" * 16
+        self.attributes = {}
+
+    @property
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_status(self, code: int, message: str = "") -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def get_current_span() -> Optional[Span]:
+    """The innermost span active in this context, if any."""
+    return _current_span.get()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)} for key, value in attributes.items()
+    ]
+
+
+class FileSpanExporter:
+    """Appends batches of spans to a file, one OTLP JSON request per line."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def export(self, request: dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+
+class OTLPHttpSpanExporter:
+    """Posts batches of spans to an OTLP/HTTP endpoint as JSON."""
+
+    def __init__(self, endpoint: str, timeout: float = 10):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, request: dict[str, Any]) -> None:
+        import httpx
+
+        response = httpx.post(self.endpoint, json=request, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class Tracer:
+    """Creates spans and exports the finished ones in a background thread.
+
+    Without an exporter, spans are not recorded at all.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[Any] = None,
+        service_name: str = TRACING_SERVICE_NAME,
+        batch_size: int = 512,
+        export_interval: float = 5.0,
+        max_queue_size: int = TRACING_MAX_QUEUE_SIZE,
+    ):
+        self.exporter = exporter
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.export_interval = export_interval
+        self.dropped_spans = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+        root: bool = False,
+    ) -> Span:
+        """Start a span without making it current.
+
+        Args:
+            name: Span name
+            kind: OTLP span kind
+            attributes: Initial attributes
+            parent: Parent span, the current span by default
+            root: Start a new trace even if there is a current span
+        """
+        if not self.enabled:
+            return NON_RECORDING_SPAN
+        if parent is None and not root:
+            parent = get_current_span()
+        return Span(
+            self,
+            name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            attributes=attributes,
+        )
+
+    @contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[dict[str, Any]] = None,
+        root: bool = False,
+        record_exception: bool = True,
+    ) -> Iterator[Span]:
+        """Start a span, make it current for the block and end it afterwards.
+
+        Exceptions raised in the block are recorded on the span unless
+        `record_exception` is False.
+        """
+        if not self.enabled:
+            yield NON_RECORDING_SPAN
+            return
+        span = self.start_span(name, kind, attributes, root=root)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if record_exception:
+                span.record_exception(e)
+            raise
+        finally:
+            span.end()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Async generators may be closed from another context
+                _current_span.set(None)
+
+    def _on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # The exporter is behind (e.g. the collector is down); never block
+            # or grow without bound because of it
+            if not self.dropped_spans:
+                logger.warning("Span export queue is full, dropping spans")
+            self.dropped_spans += 1
+            dropped_spans.inc()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._export_loop, name="span-exporter", daemon=True
+                    )
+                    self._thread.start()
+
+    def _export_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.export_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._export([span for span in batch if span is not None])
+            for _ in batch:
+                self._queue.task_done()
+
+    def _export(self, spans: list[Span]) -> None:
+        if not spans or self.exporter is None:
+            return
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "deerflow"},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        try:
+            self.exporter.export(request)
+        except Exception as e:
+            logger.warning(f"Failed to export {len(spans)} spans: {e}")
+
+    def flush(self, timeout: float = 10) -> None:
+        """Export the spans finished so far, waiting at most `timeout` seconds."""
+        if self._thread is None:
+            return
+        # Wake the exporter, so it does not wait for the batch interval. A full
+        # queue wakes it anyway.
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+def _exporter_from_env() -> Optional[Any]:
+    if TRACING_EXPORTER == "file":
+        return FileSpanExporter(TRACING_FILE)
+    if TRACING_EXPORTER == "otlp":
+        return OTLPHttpSpanExporter(TRACING_OTLP_ENDPOINT)
+    if TRACING_EXPORTER not in ("", "none"):
+        logger.warning(f"Unknown TRACING_EXPORTER {TRACING_EXPORTER}, tracing is off")
+    return None
+
+
+tracer = Tracer(exporter=_exporter_from_env())
+
+
+@contextmanager
+def tool_span(tool_name: str) -> Iterator[Span]:
+    """Trace a tool call.
+
+    Nested calls of the same tool (e.g. an async implementation that runs the
+    sync one) share one span.
+    """
+    current = get_current_span()
+    if current is not None and current.attributes.get("tool.name") == tool_name:
+        yield current
+        return
+    with tracer.start_as_current_span(
+        f"tool {tool_name}", attributes={"tool.name": tool_name}
+    ) as span:
+        yield span
+
+
+# Outbound HTTP
+
+
+def _http_attributes(method: str, url: Any) -> dict[str, Any]:
+    parts = urlsplit(str(url))
+    # Leave out the query string, which may carry API keys
+    return {
+        "http.request.method": method.upper(),
+        "server.address": parts.hostname or "",
+        "url.full": f"{parts.scheme}://{parts.netloc}{parts.path}",
+    }
+
+
+def _start_http_span(method: str, url: Any) -> Optional[Span]:
+    # Only requests made on behalf of a traced operation are recorded
+    if get_current_span() is None or not tracer.enabled:
+        return None
+    attributes = _http_attributes(method, url)
+    return tracer.start_span(
+        f"HTTP {attributes['http.request.method']} {attributes['server.address']}",
+        kind=SPAN_KIND_CLIENT,
+        attributes=attributes,
+    )
+
+
+def _end_http_span(
+    span: Span, status: Optional[int] = None, error: Optional[BaseException] = None
+) -> None:
+    if error is not None:
+        span.record_exception(error)
+    if status is not None:
+        span.set_attribute("http.response.status_code", status)
+        if status >= 400:
+            span.set_status(STATUS_ERROR, f"HTTP {status}")
+    span.end()
+
+
+def _wrap_send(send):
+    @functools.wraps(send)
+    def wrapper(self, request, *args, **kwargs):
+        span = _start_http_span(request.method, request.url)
+        if span is None:
+            return send(self, request, *args, **kwargs)
+        try:
+            response = send(self, request, *args, **kwargs)
+        except BaseException as e:
+            _end_http_span(span, error=e)
+            raise
+        _end_http_span(span, status=response.status_code)
+        return response
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def _wrap_async_send(send):
+    @functools.wraps(send)
+    async def wrapper(self, request, *args, **kwargs):
+        span = _start_http_span(request.method, request.url)
+        if span is None:
+            return await send(self, request, *args, **kwargs)
+        try:
+            response = await send(self, request, *args, **kwargs)
+        except BaseException as e:
+            _end_http_span(span, error=e)
+            raise
+        _end_http_span(span, status=response.status_code)
+        return response
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def _wrap_aiohttp_request(request):
+    @functools.wraps(request)
+    async def wrapper(self, method, str_or_url, *args, **kwargs):
+        span = _start_http_span(method, str_or_url)
+        if span is None:
+            return await request(self, method, str_or_url, *args, **kwargs)
+        try:
+            response = await request(self, method, str_or_url, *args, **kwargs)
+        except BaseException as e:
+            _end_http_span(span, error=e)
+            raise
+        _end_http_span(span, status=response.status)
+        return response
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def instrument_http() -> None:
+    """Record requests made with requests, httpx and aiohttp as client spans.
+
+    Idempotent; libraries that are not installed are skipped.
+    """
+    try:
+        import requests
+
+        if not getattr(requests.Session.send, "__traced__", False):
+            requests.Session.send = _wrap_send(requests.Session.send)
+    except ImportError:
+        pass
+    try:
+        import httpx
+
+        if not getattr(httpx.Client.send, "__traced__", False):
+            httpx.Client.send = _wrap_send(httpx.Client.send)
+        if not getattr(httpx.AsyncClient.send, "__traced__", False):
+            httpx.AsyncClient.send = _wrap_async_send(httpx.AsyncClient.send)
+    except ImportError:
+        pass
+    try:
+        import aiohttp
+
+        if not getattr(aiohttp.ClientSession._request, "__traced__", False):
+            aiohttp.ClientSession._request = _wrap_aiohttp_request(
+                aiohttp.ClientSession._request
+            )
+    except ImportError:
+        pass
@@ -4,6 +4,7 @@
 import asyncio
 import logging
 from src.graph import build_graph
+from src.utils.lazy import Lazy
 
 # Configure logging
 logging.basicConfig(
@@ -19,8 +20,8 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-graph = build_graph()
+# Create the graph on first use
+graph = Lazy(build_graph)
 
 
 async def run_agent_workflow_async(
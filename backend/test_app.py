@@ -1,6 +1,7 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import base64
 import json
 import logging
@@ -19,10 +20,13 @@ import pytest
 from fastapi.testclient import TestClient
 from fastapi import HTTPException, logger
 from server.app import app
-from server.routes.chat import _make_event, _astream_workflow_generator
+from server.routes.chat import _astream_workflow_generator
+from server.stream_utils import make_event
+from server.workflow_run import WorkflowRun, stream_events
 from server.mcp_request import MCPServerMetadataRequest
 from server.rag_request import RAGResourceRequest
 from src.config.report_style import ReportStyle
+from src.utils.cancellation import get_cancellation_token
 from langgraph.types import Command
 from langchain_core.messages import ToolMessage
 from langchain_core.messages import AIMessageChunk
@@ -49,25 +53,25 @@ class TestMakeEvent:
     def test_make_event_with_content(self):
         event_type = "message_chunk"
         data = {"content": "Hello", "role": "assistant"}
-        result = _make_event(event_type, data)
+        result = make_event(event_type, data)
         expected = (
-            'event: message_chunk\ndata: {"content": "Hello", "role": "assistant"}\n\n'
+            'event: message_chunk\ndata: {"content":"Hello","role":"assistant"}\n\n'
         )
         assert result == expected
 
     def test_make_event_with_empty_content(self):
         event_type = "message_chunk"
         data = {"content": "", "role": "assistant"}
-        result = _make_event(event_type, data)
-        expected = 'event: message_chunk\ndata: {"role": "assistant"}\n\n'
+        result = make_event(event_type, data)
+        expected = 'event: message_chunk\ndata: {"role":"assistant"}\n\n'
         assert result == expected
 
     def test_make_event_without_content(self):
         event_type = "tool_calls"
         data = {"role": "assistant", "tool_calls": []}
-        result = _make_event(event_type, data)
+        result = make_event(event_type, data)
         expected = (
-            'event: tool_calls\ndata: {"role": "assistant", "tool_calls": []}\n\n'
+            'event: tool_calls\ndata: {"role":"assistant","tool_calls":[]}\n\n'
         )
         assert result == expected
 
@@ -453,8 +457,104 @@ class TestAstreamWorkflowGenerator:
         assert "event: message_chunk" in events[0]
         assert "Hello world" in events[0]
         # Check for the actual agent name that appears in the output
-        assert '"agent": "a"' in events[0]
+        assert '"agent":"a"' in events[0]
 
+    @pytest.mark.asyncio
+    @patch("server.routes.chat.graph")
+    async def test_astream_workflow_generator_plan_steps(self, mock_graph):
+        async def mock_astream(*args, **kwargs):
+            assert "custom" in kwargs["stream_mode"]
+            yield ((), "custom", {"plan_step": {"index": 0, "title": "Step 1"}})
+
+        mock_graph.astream = mock_astream
+
+        generator = _astream_workflow_generator(
+            messages=[{"role": "user", "content": "Hello"}],
+            thread_id="test_thread",
+            resources=[],
+            max_plan_iterations=3,
+            max_step_num=10,
+            max_search_results=5,
+            auto_accepted_plan=True,
+            interrupt_feedback="",
+            mcp_settings={},
+            enable_background_investigation=False,
+            report_style=ReportStyle.ACADEMIC,
+            enable_deep_thinking=False,
+        )
+        events = [event async for event in generator]
+
+        assert len(events) == 1
+        assert "event: plan_step" in events[0]
+        assert '"agent":"planner"' in events[0]
+        assert '"title":"Step 1"' in events[0]
+
+
+class TestWorkflowRun:
+    @pytest.mark.asyncio
+    async def test_streams_all_events_with_ids(self):
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(return_value=False)
+
+        async def events():
+            yield "event: a\n\n"
+            yield "event: b\n\n"
+
+        run = WorkflowRun("t1", events())
+        received = [
+            event
+            async for event in stream_events(
+                request, run.buffer, run.buffer.start_id, run
+            )
+        ]
+        assert received == ["id: 1\nevent: a\n\n", "id: 2\nevent: b\n\n"]
+
+    @pytest.mark.asyncio
+    @patch("server.workflow_run.DISCONNECT_POLL_INTERVAL", 0.01)
+    @patch("server.workflow_run.RECONNECT_GRACE_PERIOD", 0)
+    async def test_cancels_workflow_on_disconnect(self):
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(return_value=True)
+        seen_tokens = []
+        cancelled = asyncio.Event()
+
+        async def events():
+            seen_tokens.append(get_cancellation_token())
+            yield "event: a\n\n"
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            yield "event: never\n\n"
+
+        run = WorkflowRun("t2", events())
+        received = [
+            event
+            async for event in stream_events(
+                request, run.buffer, run.buffer.start_id, run
+            )
+        ]
+        await asyncio.wait({run.task})
+        assert received == ["id: 1\nevent: a\n\n"]
+        assert cancelled.is_set()
+        assert seen_tokens[0].cancelled
+
+    @pytest.mark.asyncio
+    async def test_reconnect_replays_only_missed_events(self):
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(return_value=False)
+
+        async def events():
+            for name in ("a", "b", "c"):
+                yield f"event: {name}\n\n"
+
+        run = WorkflowRun("t3", events())
+        await run.task
+        received = [
+            event async for event in stream_events(request, run.buffer, 1, None)
+        ]
+        assert received == ["id: 2\nevent: b\n\n", "id: 3\nevent: c\n\n"]
 
 
 # class TestAstreamWorkflowGenerator:
@@ -0,0 +1,35 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from src.config.configuration import Configuration
+
+
+def test_from_runnable_config_reads_configurable_fields():
+    config = {"configurable": {"max_step_num": 5, "report_style": "news"}}
+    configurable = Configuration.from_runnable_config(config)
+    assert configurable.max_step_num == 5
+    assert configurable.report_style == "news"
+    assert configurable.max_plan_iterations == 1
+
+
+def test_selection_of_the_run_is_not_overridden_by_server_defaults():
+    config = {
+        "configurable": {
+            "search_engine": "arxiv",
+            "rag_provider": "ragflow",
+            "models": {"basic": "basic-2"},
+        }
+    }
+    with patch.dict(os.environ, {"RAG_PROVIDER": "other", "SEARCH_ENGINE": "x"}):
+        configurable = Configuration.from_runnable_config(config)
+    assert configurable.search_engine == "arxiv"
+    assert configurable.rag_provider == "ragflow"
+    assert configurable.model_for("basic") == "basic-2"
+    assert configurable.model_for("reasoning") is None
+    assert Configuration.from_runnable_config().model_for("basic") is None
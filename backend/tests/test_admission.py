@@ -0,0 +1,184 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.middleware.admission import (
+    AdmissionControlMiddleware,
+    AdmissionController,
+    AdmissionRejectedError,
+    admission_slot,
+)
+
+
+class TestAdmissionController:
+    @pytest.mark.asyncio
+    async def test_per_user_limit_queues_but_other_users_proceed(self):
+        controller = AdmissionController(max_concurrent=4, max_concurrent_per_user=1)
+        await controller.acquire("alice")
+        waiting = asyncio.create_task(controller.acquire("alice"))
+        await asyncio.sleep(0)
+        assert controller.stats()["queued_by_user"] == {"alice": 1}
+
+        # Bob is not held up by Alice's queued request
+        await asyncio.wait_for(controller.acquire("bob"), timeout=1)
+
+        controller.release("alice")
+        await asyncio.wait_for(waiting, timeout=1)
+        assert controller.stats()["running_by_user"] == {"alice": 1, "bob": 1}
+
+    @pytest.mark.asyncio
+    async def test_global_limit_is_fifo(self):
+        controller = AdmissionController(max_concurrent=1, max_concurrent_per_user=0)
+        await controller.acquire("a")
+        order = []
+
+        async def acquire(user_id):
+            await controller.acquire(user_id)
+            order.append(user_id)
+
+        tasks = [asyncio.create_task(acquire(u)) for u in ("b", "c")]
+        await asyncio.sleep(0)
+        controller.release("a")
+        await asyncio.sleep(0)
+        controller.release("b")
+        await asyncio.gather(*tasks)
+        assert order == ["b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full_or_timed_out(self):
+        controller = AdmissionController(
+            max_concurrent=1, max_queued=1, queue_timeout=0.05
+        )
+        await controller.acquire("a")
+        waiting = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError, match="queued"):
+            await controller.acquire("c")
+        with pytest.raises(AdmissionRejectedError, match="Timed out"):
+            await waiting
+        assert controller.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit(self):
+        controller = AdmissionController(requests_per_minute_per_user=6)
+        await controller.acquire("a")
+        controller.release("a")
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await controller.acquire("a")
+        assert 0 < exc_info.value.retry_after <= 10
+        await controller.acquire("b")
+
+    @pytest.mark.asyncio
+    async def test_buckets_of_idle_users_are_forgotten(self):
+        controller = AdmissionController(requests_per_minute_per_user=600)
+        for user_id in ("a", "b"):
+            await controller.acquire(user_id)
+            controller.release(user_id)
+        assert list(controller._user_buckets) == ["a", "b"]
+
+        for bucket in controller._user_buckets.values():
+            bucket.updated_at -= 60
+        await controller.acquire("c")
+        assert list(controller._user_buckets) == ["c"]
+
+
+def test_middleware_returns_429_with_retry_after():
+    app = FastAPI()
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    app.add_middleware(
+        AdmissionControlMiddleware, controller=controller, paths=("/limited",)
+    )
+
+    @app.post("/limited")
+    async def limited():
+        return {"ok": True}
+
+    @app.post("/open")
+    async def open_endpoint():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/limited").status_code == 200
+
+    controller._running["someone"] = 1
+    response = client.post("/limited", headers={"X-User-ID": "alice"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.post("/open").status_code == 200
+
+
+def test_anonymous_callers_are_limited_per_address():
+    app = FastAPI()
+    controller = AdmissionController(max_concurrent=4, max_concurrent_per_user=1)
+    app.add_middleware(
+        AdmissionControlMiddleware, controller=controller, paths=("/limited",)
+    )
+    seen = []
+
+    @app.post("/limited")
+    async def limited():
+        seen.append(dict(controller._running))
+        return {"ok": True}
+
+    TestClient(app).post("/limited")
+    TestClient(app, client=("10.0.0.2", 123)).post("/limited")
+    assert seen == [{"anonymous:testclient": 1}, {"anonymous:10.0.0.2": 1}]
+
+
+@pytest.mark.asyncio
+async def test_slot_is_held_by_the_run_and_reconnects_are_admitted_apart():
+    app = FastAPI()
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    reattach = AdmissionController(max_concurrent_per_user=1, max_queued=0)
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=controller,
+        paths=("/limited", "/other"),
+        reattach=reattach,
+        reattach_paths=("/limited",),
+    )
+    finish_run = asyncio.Event()
+
+    @app.post("/limited")
+    async def limited(request: Request):
+        if request.headers.get("Last-Event-ID") is None:
+            run = asyncio.create_task(finish_run.wait())
+            admission_slot(request).hold_until_done(run)
+        return {"ok": True}
+
+    @app.post("/other")
+    async def other():
+        return {"ok": True}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.post("/limited")).status_code == 200
+        # The response has ended but the run still holds the slot
+        assert controller.running_count == 1
+        assert (await client.post("/limited")).status_code == 429
+        reconnect = await client.post("/limited", headers={"Last-Event-ID": "3"})
+        assert reconnect.status_code == 200
+        # The header only resumes streams on the reattach paths
+        headers = {"Last-Event-ID": "3"}
+        assert (await client.post("/other", headers=headers)).status_code == 429
+        headers = {"Last-Event-ID": "x"}
+        assert (await client.post("/limited", headers=headers)).status_code == 429
+        reattach._running["anonymous:127.0.0.1"] = 1
+        headers = {"Last-Event-ID": "3"}
+        assert (await client.post("/limited", headers=headers)).status_code == 429
+        del reattach._running["anonymous:127.0.0.1"]
+
+        finish_run.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert controller.running_count == 0
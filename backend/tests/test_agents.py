@@ -0,0 +1,54 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.tools import tool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.agents import agents
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    return query
+
+
+@pytest.fixture
+def create_react_agent():
+    agents._agent_cache.clear()
+    with (
+        patch.object(agents, "get_llm_by_type", return_value=MagicMock()),
+        patch.object(
+            agents, "create_react_agent", side_effect=lambda **kwargs: MagicMock()
+        ) as create,
+    ):
+        yield create
+    agents._agent_cache.clear()
+
+
+def test_agents_are_reused_for_the_same_tools(create_react_agent):
+    first = agents.create_agent("researcher", "researcher", [lookup], "researcher")
+    second = agents.create_agent("researcher", "researcher", [lookup], "researcher")
+    assert first is second
+    assert create_react_agent.call_count == 1
+
+
+def test_copied_tools_share_agents_unless_description_changes(create_react_agent):
+    copy = lookup.model_copy()
+    renamed = lookup.model_copy(update={"description": "Powered by 'x'."})
+    first = agents.create_agent("coder", "coder", [lookup], "coder")
+    assert agents.create_agent("coder", "coder", [copy], "coder") is first
+    assert agents.create_agent("coder", "coder", [renamed], "coder") is not first
+
+
+def test_cache_is_bounded(create_react_agent):
+    with patch.object(agents, "AGENT_CACHE_SIZE", 2):
+        for name in ("a", "b", "c"):
+            agents.create_agent(name, "coder", [lookup], "coder")
+    assert len(agents._agent_cache) == 2
@@ -0,0 +1,210 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.appwrite_service import AppwriteService
+from src.utils.async_cache import AsyncTTLCache
+
+
+@pytest.fixture
+def service():
+    service = AppwriteService()
+    service.client = MagicMock()
+    service.databases = MagicMock()
+    service.users = MagicMock()
+    service._executor = ThreadPoolExecutor(max_workers=4)
+    yield service
+    service._executor.shutdown()
+
+
+class TestUserConfigCache:
+    @pytest.mark.asyncio
+    async def test_reads_are_cached_and_copied(self, service):
+        service.databases.get_document.return_value = {
+            "user_id": "u1",
+            "tools_config": {"tavily_search": {"enabled": True}},
+        }
+        config = await service.get_user_config("u1")
+        config["tools_config"]["tavily_search"]["enabled"] = False
+
+        assert (await service.get_user_config("u1"))["tools_config"] == {
+            "tavily_search": {"enabled": True}
+        }
+        assert service.databases.get_document.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_request(self, service):
+        calling_threads = set()
+
+        def get_document(**kwargs):
+            calling_threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+            return {"user_id": kwargs["document_id"]}
+
+        service.databases.get_document.side_effect = get_document
+        results = await asyncio.gather(
+            *(service.get_user_config("u1") for _ in range(10))
+        )
+        assert all(result == {"user_id": "u1"} for result in results)
+        assert service.databases.get_document.call_count == 1
+        # The SDK call ran off the event loop thread
+        assert threading.current_thread().name not in calling_threads
+
+    @pytest.mark.asyncio
+    async def test_updates_refresh_the_cache(self, service):
+        service.databases.get_document.return_value = {"report_style": "academic"}
+        service.databases.update_document.return_value = {"report_style": "news"}
+        await service.get_user_config("u1")
+        await service.update_user_config("u1", {"report_style": "news"})
+
+        assert (await service.get_user_config("u1")) == {"report_style": "news"}
+        assert service.databases.get_document.call_count == 1
+
+
+class TestAsyncTTLCache:
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_reloaded(self):
+        cache = AsyncTTLCache(ttl_seconds=0)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return len(loads)
+
+        assert await cache.get_or_load("k", loader) == 1
+        await asyncio.sleep(0.001)
+        assert await cache.get_or_load("k", loader) == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_discards_load_in_flight(self):
+        cache = AsyncTTLCache(ttl_seconds=60)
+        release = asyncio.Event()
+
+        async def slow_loader():
+            await release.wait()
+            return "stale"
+
+        pending = asyncio.create_task(cache.get_or_load("k", slow_loader))
+        await asyncio.sleep(0)
+        cache.invalidate("k")
+        release.set()
+        assert await pending == "stale"
+        assert cache.get("k") is None
+
+
+class TestToolConfigWrites:
+    @pytest.mark.asyncio
+    async def test_concurrent_updates_are_merged_into_one_write(self, service):
+        service.databases.get_document.return_value = {
+            "tools_config": {"tavily_search": {"enabled": True}}
+        }
+        service.databases.update_document.side_effect = lambda **kwargs: kwargs["data"]
+        await service.get_user_config("u1")
+
+        results = await asyncio.gather(
+            service.update_tool_config("u1", "brave_search", {"enabled": True}),
+            service.update_tool_config("u1", "arxiv_search", {"enabled": True}),
+        )
+
+        assert service.databases.update_document.call_count == 1
+        # The cached read and the one the batch is merged into
+        assert service.databases.get_document.call_count == 2
+        assert results[0]["tools_config"] == {
+            "tavily_search": {"enabled": True},
+            "brave_search": {"enabled": True},
+            "arxiv_search": {"enabled": True},
+        }
+
+    @pytest.mark.asyncio
+    async def test_updates_keep_changes_of_other_workers(self, service):
+        service.databases.get_document.return_value = {"tools_config": {}}
+        service.databases.update_document.side_effect = lambda **kwargs: kwargs["data"]
+        await service.get_user_config("u1")
+        # Written through another worker, whose cache this one cannot see
+        service.databases.get_document.return_value = {
+            "tools_config": {"tavily_search": {"enabled": False}}
+        }
+
+        result = await service.update_tool_config("u1", "arxiv_search", {})
+
+        assert result["tools_config"] == {
+            "tavily_search": {"enabled": False},
+            "arxiv_search": {},
+        }
+
+    @pytest.mark.asyncio
+    async def test_flush_waits_for_pending_writes(self, service):
+        service.databases.get_document.return_value = {"tools_config": {}}
+        service.databases.update_document.side_effect = lambda **kwargs: kwargs["data"]
+
+        update = asyncio.create_task(service.update_tool_config("u1", "a", {}))
+        await asyncio.sleep(0)
+        assert len(service._write_tasks) == 1
+        await service.flush()
+
+        assert not service._write_tasks
+        assert service.databases.update_document.call_count == 1
+        assert (await update)["tools_config"] == {"a": {}}
+
+    @pytest.mark.asyncio
+    async def test_write_failures_reach_every_caller(self, service):
+        service.databases.get_document.return_value = {"tools_config": {}}
+        service.databases.update_document.side_effect = RuntimeError("down")
+
+        results = await asyncio.gather(
+            service.update_tool_config("u1", "a", {}),
+            service.update_tool_config("u1", "b", {}),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+
+class TestListUsers:
+    @pytest.mark.asyncio
+    async def test_pages_with_cursor_and_projection(self, service):
+        pages = [
+            {"total": 3, "documents": [{"$id": "a"}, {"$id": "b"}]},
+            {"total": 3, "documents": [{"$id": "c"}]},
+        ]
+        service.databases.list_documents.side_effect = pages
+
+        documents = [
+            document["$id"]
+            async for document in service.iter_users_with_configs(
+                batch_size=2, fields=["search_engine"]
+            )
+        ]
+
+        assert documents == ["a", "b", "c"]
+        first_queries = service.databases.list_documents.call_args_list[0].kwargs[
+            "queries"
+        ]
+        second_queries = service.databases.list_documents.call_args_list[1].kwargs[
+            "queries"
+        ]
+        assert not any("offset" in query for query in first_queries)
+        assert any(
+            '"select"' in query and "search_engine" in query for query in first_queries
+        )
+        assert any('"cursorAfter","values":["b"]' in query for query in second_queries)
+
+    @pytest.mark.asyncio
+    async def test_reports_total_from_appwrite(self, service):
+        service.databases.list_documents.return_value = {
+            "total": 120,
+            "documents": [{"$id": "a"}],
+        }
+        page = await service.list_users_with_configs(limit=25)
+        assert page["total"] == 120
+        assert page["next_cursor"] is None
@@ -0,0 +1,115 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import httpx
+
+from benchmarks.common import compare_results, percentile
+from benchmarks.fakes import ScriptedChatModel, offline_environment
+from benchmarks.research_graph import run_benchmark
+from benchmarks.sse_load import capacity_report, consume_stream
+from src.sandbox import python_sandbox_pool
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_results_flags_regressions():
+    baseline = {
+        "metrics": {
+            "latency_p50_ms": 100.0,
+            "events_per_second": 50.0,
+            "peak_rss_mb": 200.0,
+            "events_per_run": 80.0,
+        }
+    }
+    current = {
+        "metrics": {
+            "latency_p50_ms": 120.0,
+            "events_per_second": 40.0,
+            "peak_rss_mb": 205.0,
+            "events_per_run": 120.0,
+        }
+    }
+    rows = {row["metric"]: row for row in compare_results(baseline, current, 0.1)}
+    assert rows["latency_p50_ms"]["regression"]
+    assert rows["events_per_second"]["regression"]
+    assert not rows["peak_rss_mb"]["regression"]
+    assert not rows["events_per_run"]["regression"]
+
+    # Improvements are never regressions
+    rows = compare_results(current, baseline, 0.1)
+    assert not any(row["regression"] for row in rows)
+
+
+def test_research_graph_runs_offline():
+    model = ScriptedChatModel(tokens_per_second=0, first_token_latency=0)
+    try:
+        with offline_environment(model, tool_latency=0):
+            metrics = asyncio.run(
+                run_benchmark(runs=2, concurrency=2, warmup=0, with_resources=True)
+            )
+    finally:
+        python_sandbox_pool.close()
+    assert metrics["latency_p50_ms"] > 0
+    assert 0 < metrics["ttft_p50_ms"] <= metrics["latency_p50_ms"]
+    assert metrics["events_per_run"] > 10
+    assert metrics["peak_rss_mb"] > 0
+
+
+def test_consume_stream_times_events():
+    body = (
+        b"event: message_chunk\ndata: {}\n\n"
+        b"event: message_chunk\ndata: {}\n\n"
+        b"event: message_chunk\ndata: {}\n\n"
+    )
+
+    def handler(request):
+        if request.url.path == "/api/prose/generate":
+            return httpx.Response(429, json={"detail": "Too many queued requests"})
+        return httpx.Response(200, content=body)
+
+    async def consume(endpoint):
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await consume_stream(client, endpoint)
+
+    result = asyncio.run(consume("chat"))
+    assert result.status == 200
+    assert result.events == 3
+    assert len(result.gaps) == 2
+    assert result.first_event is not None
+
+    rejected = asyncio.run(consume("prose"))
+    assert rejected.status == 429
+    assert rejected.events == 0
+
+
+def test_capacity_report_uses_highest_level_within_slo():
+    def level(concurrency, within_slo, gap):
+        return {
+            "concurrency": concurrency,
+            "within_slo": within_slo,
+            "events_per_second": concurrency * 10.0,
+            "event_gap_p95_ms": gap,
+            "first_event_p95_ms": gap * 2,
+            "cpu_ms_per_event": 1.0,
+            "rss_mb_per_stream": 0.5,
+        }
+
+    levels = [level(1, True, 10), level(8, True, 50), level(32, False, 900)]
+    metrics = capacity_report(levels, workers=2)
+    assert metrics["capacity_streams_per_worker"] == 4
+    assert metrics["event_gap_p95_ms"] == 50
+    assert metrics["rss_mb_per_stream"] == 0.5
+
+    assert (
+        capacity_report([level(1, False, 900)], 1)["capacity_streams_per_worker"] == 0
+    )
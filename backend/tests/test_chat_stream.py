@@ -279,7 +279,7 @@ class TestChatStream:
             
             # 验证所有参数都被正确传递给_astream_workflow_generator
             call_args = mock_generator.call_args[0]
-            assert len(call_args) == 12  # 应该有12个参数
+            assert len(call_args) == 13  # 应该有13个参数
     
     @patch('server.routes.chat._astream_workflow_generator')
     def test_chat_stream_generator_exception(self, mock_generator):
@@ -0,0 +1,149 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.middleware import auth
+from server.routes import config as config_routes
+from src.config import reloader
+from src.config.reloader import ConfigError, ConfigReloader, bind_config_snapshot
+from src.llms import llm
+
+CONF = """
+BASIC_MODEL:
+  model: "basic-1"
+  api_key: $TEST_MODEL_KEY
+REASONING_MODEL:
+  model: "reasoning-1"
+  api_key: "key"
+"""
+
+
+@pytest.fixture
+def files(tmp_path):
+    conf_file = tmp_path / "conf.yaml"
+    env_file = tmp_path / ".env"
+    conf_file.write_text(CONF)
+    env_file.write_text("TEST_MODEL_KEY=key-1\n")
+    with patch.dict(os.environ, {"TEST_MODEL_KEY": "key-1"}):
+        yield conf_file, env_file
+
+
+def _touch(path, text):
+    path.write_text(text)
+    # Make sure the change is seen even on coarse file timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_versions_only_changed_sections(files):
+    conf_file, env_file = files
+    config = ConfigReloader(str(conf_file), str(env_file))
+    assert config.snapshot.conf["BASIC_MODEL"]["api_key"] == "key-1"
+    assert not config.check_for_changes()
+
+    _touch(conf_file, CONF.replace("reasoning-1", "reasoning-2"))
+    assert config.check_for_changes()
+    snapshot = config.snapshot
+    assert snapshot.version == 2
+    assert snapshot.section_version("REASONING_MODEL") == 2
+    assert snapshot.section_version("BASIC_MODEL") == 1
+    assert snapshot.section_version("search") == 1
+
+
+def test_env_file_changes_are_applied(files):
+    conf_file, env_file = files
+    config = ConfigReloader(str(conf_file), str(env_file))
+
+    _touch(env_file, "TEST_MODEL_KEY=key-2\nTEST_ADDED=1\n")
+    assert config.check_for_changes()
+    assert os.environ["TEST_MODEL_KEY"] == "key-2"
+    assert config.snapshot.conf["BASIC_MODEL"]["api_key"] == "key-2"
+    assert config.snapshot.section_version("BASIC_MODEL") == 2
+
+    _touch(env_file, "TEST_MODEL_KEY=key-2\n")
+    assert config.check_for_changes()
+    assert "TEST_ADDED" not in os.environ
+
+
+def test_process_environment_takes_precedence(files):
+    conf_file, env_file = files
+    with patch.dict(os.environ, {"TEST_MODEL_KEY": "from-process"}):
+        config = ConfigReloader(str(conf_file), str(env_file))
+        _touch(env_file, "TEST_MODEL_KEY=key-2\n")
+        config.check_for_changes()
+        assert os.environ["TEST_MODEL_KEY"] == "from-process"
+
+
+def test_invalid_changes_keep_the_previous_configuration(files):
+    conf_file, env_file = files
+    config = ConfigReloader(str(conf_file), str(env_file))
+
+    _touch(conf_file, "BASIC_MODEL: [unclosed")
+    assert not config.check_for_changes()
+    _touch(conf_file, "BASIC_MODEL: gpt")
+    with pytest.raises(ConfigError, match="mapping"):
+        config.reload()
+
+    def reject(snapshot):
+        raise ValueError("bad model")
+
+    config.add_validator(reject)
+    _touch(env_file, "TEST_MODEL_KEY=key-2\n")
+    _touch(conf_file, CONF)
+    assert not config.check_for_changes()
+    assert config.snapshot.version == 1
+    assert os.environ["TEST_MODEL_KEY"] == "key-1"
+
+
+def test_llms_follow_the_configuration_of_the_run(files):
+    conf_file, env_file = files
+    config = ConfigReloader(str(conf_file), str(env_file))
+    with (
+        patch.object(reloader, "config_reloader", config),
+        patch.object(llm, "config_reloader", config),
+        patch.dict(llm._llm_cache, clear=True),
+    ):
+        first = llm.get_llm_by_type("basic")
+        assert first.model_name == "basic-1"
+        assert llm.get_llm_by_type("basic") is first
+
+        started = config.snapshot
+        _touch(conf_file, CONF.replace("basic-1", "basic-2"))
+        config.check_for_changes()
+        llm._drop_stale_llms(started, config.snapshot)
+        assert llm.get_llm_by_type("basic").model_name == "basic-2"
+
+        # A run that started before the change keeps its model
+        token = bind_config_snapshot(started)
+        try:
+            assert llm.get_llm_by_type("basic").model_name == "basic-1"
+        finally:
+            reloader._bound_snapshot.reset(token)
+
+
+def test_reload_endpoint_is_for_administrators(files):
+    conf_file, env_file = files
+    app = FastAPI()
+    app.include_router(config_routes.router)
+    config = ConfigReloader(str(conf_file), str(env_file))
+    remote = TestClient(app, client=("203.0.113.5", 1234))
+    local = TestClient(app, client=("127.0.0.1", 1234))
+    with patch.object(config_routes, "config_reloader", config):
+        headers = {"X-User-ID": "alice"}
+        assert remote.post("/api/config/reload", headers=headers).status_code == 403
+        assert local.post("/api/config/reload").status_code == 200
+
+        with patch.object(auth, "ADMIN_API_TOKEN", "secret"):
+            assert local.post("/api/config/reload").status_code == 403
+            headers = {"X-Admin-Token": "secret"}
+            response = remote.post("/api/config/reload", headers=headers)
+            assert response.status_code == 200
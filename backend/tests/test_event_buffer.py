@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.event_buffer import EventBuffer, EventBufferRegistry
+from server.routes import chat
+from server.workflow_run import WorkflowRun, active_runs
+
+
+class TestEventBuffer:
+    def test_assigns_monotonic_ids(self):
+        buffer = EventBuffer("t", max_events=10, max_bytes=1024)
+        assert buffer.append("event: a\n\n") == 1
+        assert buffer.append("event: b\n\n") == 2
+        assert buffer.events_after(1) == [(2, "id: 2\nevent: b\n\n")]
+
+    def test_evicts_oldest_events_beyond_limits(self):
+        buffer = EventBuffer("t", max_events=2, max_bytes=1024)
+        for name in ("a", "b", "c"):
+            buffer.append(f"event: {name}\n\n")
+        assert [i for i, _ in buffer.events_after(0)] == [2, 3]
+
+        buffer = EventBuffer("t", max_events=10, max_bytes=40)
+        for name in ("a", "b", "c"):
+            buffer.append(f"event: {name}\n\n")
+        assert [i for i, _ in buffer.events_after(0)] == [2, 3]
+
+    @pytest.mark.asyncio
+    async def test_wait_wakes_up_on_append(self):
+        buffer = EventBuffer("t", max_events=10, max_bytes=1024)
+
+        async def append_later():
+            await asyncio.sleep(0.01)
+            buffer.append("event: a\n\n")
+
+        task = asyncio.create_task(append_later())
+        await buffer.wait_for_events(0, timeout=5)
+        await task
+        assert buffer.last_id == 1
+
+
+class TestEventBufferRegistry:
+    def test_ids_continue_across_runs_of_a_thread(self):
+        registry = EventBufferRegistry()
+        first = registry.create("t")
+        first.append("event: a\n\n")
+        first.close()
+        second = registry.create("t")
+        assert second.start_id == 1
+        assert second.append("event: b\n\n") == 2
+
+    def test_evicts_closed_buffers_after_ttl(self):
+        registry = EventBufferRegistry(ttl_seconds=10)
+        registry.create("open")
+        registry.create("done").close()
+        with patch("server.event_buffer.time.monotonic", return_value=1e12):
+            registry.evict_expired()
+        assert registry.get("done") is None
+        assert registry.get("open") is not None
+
+    def test_bounds_number_of_finished_buffers(self):
+        registry = EventBufferRegistry(max_threads=2)
+        for thread_id in ("a", "b", "c"):
+            registry.create(thread_id).close()
+        assert len(registry) == 2
+        assert registry.get("a") is None
+
+
+def test_only_the_owner_can_replay_a_thread():
+    app = FastAPI()
+    app.include_router(chat.router)
+    buffer = chat.event_buffers.create("owned-thread", owner="alice")
+    buffer.append("event: message_chunk\ndata: {}\n\n")
+    buffer.close()
+    client = TestClient(app)
+
+    def reconnect(user_id):
+        return client.post(
+            "/api/chat/stream",
+            json={"thread_id": "owned-thread", "messages": []},
+            headers={"Last-Event-ID": "0", "X-User-ID": user_id},
+        )
+
+    assert reconnect("bob").status_code == 404
+    response = reconnect("alice")
+    assert response.status_code == 200
+    assert "id: 1" in response.text
+
+
+@pytest.mark.asyncio
+async def test_only_the_owner_can_supersede_a_run():
+    async def events():
+        await asyncio.sleep(10)
+        yield "event: message_chunk\ndata: {}\n\n"
+
+    runs = [WorkflowRun("contested-thread", events(), owner="alice")]
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            WorkflowRun("contested-thread", events(), owner="bob")
+        assert exc_info.value.status_code == 409
+        assert chat.event_buffers.get("contested-thread").owner == "alice"
+        assert active_runs["contested-thread"] is runs[0]
+
+        runs.append(WorkflowRun("contested-thread", events(), owner="alice"))
+        assert runs[0].cancel_reason == "superseded by a new request"
+    finally:
+        for run in runs:
+            run.cancel("test")
+        await asyncio.gather(*(run.task for run in runs), return_exceptions=True)
@@ -0,0 +1,222 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.job_queue import Job, JobQueue, JobStatus, JobStore, QueueFullError
+
+
+def make_job(job_id, user_id="u1", priority=0):
+    return Job(
+        job_id=job_id,
+        user_id=user_id,
+        thread_id=job_id,
+        request={},
+        priority=priority,
+    )
+
+
+class BlockingRunner:
+    """Runs jobs until released and records the order they were started in."""
+
+    def __init__(self):
+        self.started = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, job):
+        self.started.append(job.job_id)
+        await self.release.wait()
+        return f"report {job.job_id}"
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestJobQueue:
+    @pytest.mark.asyncio
+    async def test_runs_jobs_with_bounded_concurrency(self, tmp_path):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, JobStore(tmp_path), max_concurrency=2)
+        for i in range(3):
+            queue.submit(make_job(f"j{i}"))
+        await settle()
+        assert runner.started == ["j0", "j1"]
+        assert queue.stats()["queued"] == 1
+
+        runner.release.set()
+        await settle()
+        assert runner.started == ["j0", "j1", "j2"]
+        job = queue.get("j0")
+        assert job.status == JobStatus.COMPLETED
+        assert job.final_report == "report j0"
+
+    @pytest.mark.asyncio
+    async def test_prefers_users_with_fewer_running_jobs(self, tmp_path):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, JobStore(tmp_path), max_concurrency=1)
+        queue.submit(make_job("a1", "alice"))
+        queue.submit(make_job("a2", "alice", priority=5))
+        queue.submit(make_job("b1", "bob"))
+        await settle()
+        assert runner.started == ["a1"]
+
+        # Alice still has a job running when the slot is raised to two
+        queue.max_concurrency = 2
+        queue._dispatch()
+        await settle()
+        assert runner.started == ["a1", "b1"]
+        runner.release.set()
+        await settle()
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_runs_first_within_user(self, tmp_path):
+        runner = BlockingRunner()
+        runner.release.set()
+        queue = JobQueue(runner, JobStore(tmp_path), max_concurrency=0)
+        queue.submit(make_job("low"))
+        queue.submit(make_job("high", priority=10))
+        queue.max_concurrency = 1
+        queue._dispatch()
+        await settle()
+        assert runner.started == ["high", "low"]
+
+    @pytest.mark.asyncio
+    async def test_failed_and_cancelled_jobs(self, tmp_path):
+        async def fail(job):
+            raise RuntimeError("boom")
+
+        queue = JobQueue(fail, JobStore(tmp_path), max_concurrency=1)
+        queue.submit(make_job("j1"))
+        queue.submit(make_job("j2"))
+        queue.cancel("j2")
+        await settle()
+        assert queue.get("j1").status == JobStatus.FAILED
+        assert queue.get("j1").error == "boom"
+        assert queue.get("j2").status == JobStatus.CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_job(self, tmp_path):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, JobStore(tmp_path), max_concurrency=1)
+        queue.submit(make_job("j1"))
+        await settle()
+        queue.cancel("j1")
+        await settle()
+        assert queue.get("j1").status == JobStatus.CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_rejects_submissions_when_full(self, tmp_path):
+        queue = JobQueue(
+            BlockingRunner(), JobStore(tmp_path), max_concurrency=0, max_queued=1
+        )
+        queue.submit(make_job("j1"))
+        with pytest.raises(QueueFullError):
+            queue.submit(make_job("j2"))
+
+    @pytest.mark.asyncio
+    async def test_restore_requeues_and_fails_interrupted_jobs(self, tmp_path):
+        store = JobStore(tmp_path)
+        running = make_job("running")
+        running.status = JobStatus.RUNNING
+        store.save(running)
+        store.save(make_job("queued"))
+
+        runner = BlockingRunner()
+        queue = JobQueue(runner, store, max_concurrency=0)
+        queue.restore()
+        assert queue.get("running").status == JobStatus.FAILED
+        assert queue.get("queued").status == JobStatus.QUEUED
+        assert JobStore(tmp_path).load_all()
+        queue.max_concurrency = 1
+        queue._dispatch()
+        await settle()
+        assert runner.started == ["queued"]
+        runner.release.set()
+        await settle()
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_jobs_of_live_workers_are_not_taken_over(self, tmp_path):
+        store = JobStore(tmp_path)
+        live = make_job("live")
+        live.status = JobStatus.RUNNING
+        live.owner = "live-worker"
+        gone = make_job("gone")
+        gone.owner = "gone-worker"
+        store.save(live)
+        store.save(gone)
+        store.heartbeat("live-worker")
+
+        queue = JobQueue(BlockingRunner(), JobStore(tmp_path), max_concurrency=0)
+        queue.restore()
+        assert queue.queued_count() == 1
+        assert store.load("gone").owner == queue.worker_id
+        # The live worker's job is left alone, its persisted state is visible
+        assert queue.get("live").status == JobStatus.RUNNING
+        assert queue.cancel("live").status == JobStatus.RUNNING
+
+        # Once the worker stops sending heartbeats its jobs are taken over
+        claimed = store.claim_orphans(queue.worker_id, timeout=0)
+        assert [job.job_id for job in claimed] == ["live"]
+        assert store.load("live").status == JobStatus.FAILED
+        await queue.close()
+        assert not store.is_alive(queue.worker_id, timeout=60)
+
+    @pytest.mark.asyncio
+    async def test_stop_keeps_queued_jobs_and_fails_interrupted_ones(self, tmp_path):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, JobStore(tmp_path), max_concurrency=1)
+        queue.submit(make_job("running"))
+        queue.submit(make_job("queued"))
+        await settle()
+        queue.stop()
+        queue.cancel("running")
+        await settle()
+        assert runner.started == ["running"]
+        assert queue.get("running").status == JobStatus.FAILED
+        await queue.flush()
+        assert JobStore(tmp_path).load("queued").status == JobStatus.QUEUED
+
+    @pytest.mark.asyncio
+    async def test_stop_can_requeue_interrupted_jobs_to_resume(self, tmp_path):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, JobStore(tmp_path), max_concurrency=1)
+        queue.submit(make_job("running"))
+        await settle()
+        queue.stop(requeue_interrupted=True)
+        queue.cancel("running")
+        await settle()
+        await queue.flush()
+        job = JobStore(tmp_path).load("running")
+        assert job.status == JobStatus.QUEUED
+        assert job.resume
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_forgotten(self, tmp_path):
+        async def finish(job):
+            return "report"
+
+        store = JobStore(tmp_path)
+        old = make_job("old")
+        old.status = JobStatus.COMPLETED
+        old.finished_at = "2020-01-01T00:00:00"
+        store.save(old)
+
+        queue = JobQueue(finish, store, max_concurrency=1, max_finished=2)
+        queue.restore()
+        for i in range(3):
+            queue.submit(make_job(f"j{i}"))
+            await settle()
+        await queue.close()
+        assert queue.get("old") is None
+        assert queue.get("j0") is None
+        assert queue.get("j2").final_report == "report"
+        assert sorted(job.job_id for job in store.load_all()) == ["j1", "j2"]
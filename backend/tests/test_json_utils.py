@@ -0,0 +1,69 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.json_utils import JSONArrayItemParser, parse_json_output
+
+PLAN = {
+    "locale": "en-US",
+    "has_enough_context": False,
+    "thought": 'Compare "steps" in {braces} and [brackets]',
+    "title": "Plan",
+    "steps": [
+        {
+            "need_search": True,
+            "title": "A",
+            "description": "a",
+            "step_type": "research",
+        },
+        {
+            "need_search": False,
+            "title": "B",
+            "description": "b}",
+            "step_type": "processing",
+        },
+    ],
+}
+
+
+def chunks(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_emits_each_step_when_it_completes(size):
+    text = "```json\n" + json.dumps(PLAN, indent=2) + "\n```"
+    parser = JSONArrayItemParser("steps")
+    emitted = []
+    for chunk in chunks(text, size):
+        emitted += parser.feed(chunk)
+    assert emitted == [(0, PLAN["steps"][0]), (1, PLAN["steps"][1])]
+
+
+def test_emits_first_step_before_document_is_complete():
+    text = json.dumps(PLAN)
+    parser = JSONArrayItemParser("steps")
+    end_of_first_step = text.index('"research"}') + len('"research"}')
+    assert parser.feed(text[:end_of_first_step]) == [(0, PLAN["steps"][0])]
+
+
+def test_ignores_arrays_of_other_fields():
+    parser = JSONArrayItemParser("steps")
+    assert (
+        parser.feed(json.dumps({"other": [{"a": 1}], "nested": {"steps": [{}]}})) == []
+    )
+
+
+def test_parse_json_output_repairs_only_on_failure():
+    with patch("src.utils.json_utils.repair_json_output") as repair:
+        assert parse_json_output('{"a": 1}') == {"a": 1}
+        repair.assert_not_called()
+    assert parse_json_output('```json\n{"a": 1,}\n```') == {"a": 1}
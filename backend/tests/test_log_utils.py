@@ -0,0 +1,101 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import logging
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.tools import decorators
+from src.tools.decorators import log_io
+from src.utils import log_utils
+from src.utils.log_utils import format_preview, preview, should_sample
+
+
+class _Expensive:
+    formatted = 0
+
+    def __repr__(self):
+        _Expensive.formatted += 1
+        return "expensive"
+
+
+def test_strings_are_cut_with_their_size():
+    text = format_preview("x" * 10_000, max_chars=100)
+    assert text == "x" * 100 + "... (10000 chars)"
+    assert format_preview("short", max_chars=100) == "short"
+
+
+def test_containers_are_bounded():
+    value = {"raw_content": "y" * 1_000_000, "results": list(range(10_000))}
+    text = format_preview(value, max_chars=200)
+    assert len(text) <= 203
+    assert text.startswith("{'raw_content': 'yyy")
+
+
+def test_previews_are_only_formatted_when_emitted(caplog):
+    logger = logging.getLogger("test_log_utils")
+    _Expensive.formatted = 0
+    with caplog.at_level(logging.WARNING, logger="test_log_utils"):
+        logger.info("value: %s", preview(_Expensive()))
+    assert _Expensive.formatted == 0
+
+    with caplog.at_level(logging.INFO, logger="test_log_utils"):
+        logger.info("value: %s", preview(_Expensive()))
+    assert _Expensive.formatted == 1
+    assert "value: expensive" in caplog.text
+
+
+def test_sampling():
+    assert should_sample(1.0)
+    assert not should_sample(0.0)
+
+
+def test_log_io_truncates_and_skips_injected_config(caplog):
+    @log_io
+    def crawl(url, config=None):
+        return "page " * 10_000
+
+    with caplog.at_level(logging.INFO, logger="src.tools.decorators"):
+        crawl(url="https://example.com", config={"configurable": {"secret": 1}})
+
+    called, returned = [record.getMessage() for record in caplog.records]
+    assert called == "Tool crawl called with parameters: {'url': 'https://example.com'}"
+    assert len(returned) < 1000
+    assert caplog.records[1].tool == "crawl"
+
+
+def test_log_io_skips_unsampled_calls(caplog):
+    @log_io
+    def search(query):
+        return query
+
+    with (
+        patch.object(decorators, "should_sample", return_value=False),
+        caplog.at_level(logging.INFO, logger="src.tools.decorators"),
+    ):
+        assert search("q") == "q"
+    assert caplog.records == []
+
+
+def test_queue_logging_writes_on_a_background_thread():
+    logger = logging.getLogger("test_log_utils.queue")
+    logger.propagate = False
+    records = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            records.append((record.getMessage(), threading.current_thread().name))
+
+    logger.addHandler(ListHandler())
+    try:
+        log_utils.install_queue_logging(logger)
+        logger.warning("hello %s", "world")
+    finally:
+        log_utils.stop_queue_logging()
+        logger.handlers.clear()
+    assert records[0][0] == "hello world"
+    assert records[0][1] != threading.current_thread().name
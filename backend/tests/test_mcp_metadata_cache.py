@@ -0,0 +1,61 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.mcp_utils import load_mcp_tools_cached, mcp_metadata_key
+from src.utils.async_cache import AsyncTTLCache
+
+
+def test_key_hashes_env():
+    key = mcp_metadata_key("stdio", "uvx", ["server"], None, {"TOKEN": "secret"})
+    assert "secret" not in repr(key)
+    assert key != mcp_metadata_key("stdio", "uvx", ["server"], None, {"TOKEN": "x"})
+    assert key == mcp_metadata_key(
+        "stdio", "uvx", ["server"], None, {"TOKEN": "secret"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_session():
+    async def slow_load(*args):
+        await asyncio.sleep(0.01)
+        return ["tool"]
+
+    cache = AsyncTTLCache(ttl_seconds=60)
+    with (
+        patch("server.mcp_utils.mcp_metadata_cache", cache),
+        patch(
+            "server.mcp_utils.load_mcp_tools", AsyncMock(side_effect=slow_load)
+        ) as load,
+    ):
+        results = await asyncio.gather(
+            *(load_mcp_tools_cached("stdio", "uvx", ["server"]) for _ in range(5))
+        )
+        assert results == [["tool"]] * 5
+        assert load.call_count == 1
+
+        await load_mcp_tools_cached("stdio", "uvx", ["server"], refresh=True)
+        assert load.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_revalidating():
+    cache = AsyncTTLCache(ttl_seconds=0, stale_seconds=60)
+    load = AsyncMock(side_effect=[["old"], ["new"], ["newer"]])
+    with (
+        patch("server.mcp_utils.mcp_metadata_cache", cache),
+        patch("server.mcp_utils.load_mcp_tools", load),
+    ):
+        assert await load_mcp_tools_cached("sse", url="http://mcp") == ["old"]
+        await asyncio.sleep(0.001)
+        assert await load_mcp_tools_cached("sse", url="http://mcp") == ["old"]
+        await asyncio.sleep(0.01)
+        assert await load_mcp_tools_cached("sse", url="http://mcp") == ["new"]
@@ -0,0 +1,131 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+import textwrap
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.tools.mcp_pool import MCPSessionPool, mcp_config_key
+
+SERVER_SOURCE = textwrap.dedent(
+    """
+    import os
+    from mcp.server.fastmcp import FastMCP
+
+    mcp = FastMCP("test")
+
+    @mcp.tool()
+    def server_pid() -> int:
+        \"\"\"Return the process ID of the server.\"\"\"
+        return os.getpid()
+
+    mcp.run()
+    """
+)
+
+
+@pytest.fixture
+def server_config(tmp_path):
+    script = tmp_path / "server.py"
+    script.write_text(SERVER_SOURCE)
+    return {"transport": "stdio", "command": sys.executable, "args": [str(script)]}
+
+
+async def call_server_pid(pool, config):
+    async with pool.session({"test": config}) as tools:
+        assert [tool.name for tool in tools] == ["server_pid"]
+        return await tools[0].ainvoke({})
+
+
+def test_config_key_ignores_key_order():
+    assert mcp_config_key({"a": 1, "b": [2]}) == mcp_config_key({"b": [2], "a": 1})
+    assert mcp_config_key({"a": 1}) != mcp_config_key({"a": 2})
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_reused_across_steps(server_config):
+    pool = MCPSessionPool()
+    try:
+        first, second = await asyncio.gather(
+            call_server_pid(pool, server_config),
+            call_server_pid(pool, server_config),
+        )
+        third = await call_server_pid(pool, server_config)
+        assert first == second == third
+        assert len(pool) == 1
+    finally:
+        await pool.close_all()
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_are_evicted(server_config):
+    pool = MCPSessionPool(idle_timeout=0)
+    try:
+        first = await call_server_pid(pool, server_config)
+        assert len(pool) == 0
+        assert await call_server_pid(pool, server_config) != first
+    finally:
+        await pool.close_all()
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_are_reaped_without_further_use(server_config):
+    pool = MCPSessionPool(idle_timeout=2)
+    try:
+        await call_server_pid(pool, server_config)
+        assert len(pool) == 1
+        await asyncio.sleep(4)
+        assert len(pool) == 0
+    finally:
+        await pool.close_all()
+    assert pool._reaper is None
+
+
+@pytest.mark.asyncio
+async def test_sessions_of_another_loop_are_closed(server_config):
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    pool = MCPSessionPool()
+    try:
+        asyncio.run_coroutine_threadsafe(
+            call_server_pid(pool, server_config), other_loop
+        ).result(timeout=30)
+        (dropped,) = pool._sessions.values()
+
+        await call_server_pid(pool, server_config)
+        assert dropped not in pool._sessions.values()
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(
+                asyncio.wait_for(dropped._task, timeout=10), other_loop
+            )
+        )
+        assert dropped._task.done()
+    finally:
+        await pool.close_all()
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_sessions_are_not_pooled(tmp_path):
+    pool = MCPSessionPool(connect_timeout=10)
+    config = {
+        "transport": "stdio",
+        "command": str(tmp_path / "missing-server"),
+        "args": [],
+    }
+    try:
+        with pytest.raises(Exception):
+            async with pool.session({"broken": config}):
+                pass
+        assert len(pool) == 0
+    finally:
+        await pool.close_all()
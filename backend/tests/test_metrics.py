@@ -0,0 +1,163 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import inspect
+import os
+import sys
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langgraph.errors import GraphInterrupt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.graph.instrumentation import (
+    MetricsCallbackHandler,
+    instrument_node,
+    llm_duration,
+    llm_time_to_first_token,
+    llm_tokens,
+    node_duration,
+    tool_duration,
+)
+from src.utils.metrics import CacheStats, Counter, Gauge, Histogram, MetricsRegistry
+
+
+class TestMetricsRegistry:
+    def test_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        requests = Counter("requests_total", "Requests", ["route"], registry=registry)
+        latency = Histogram(
+            "latency_seconds", "Latency", ["route"], registry=registry, buckets=(1, 5)
+        )
+        requests.inc(route="/a")
+        requests.inc(2, route="/a")
+        latency.observe(0.5, route="/a")
+        latency.observe(3, route="/a")
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/a"} 3.0' in text
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 1.0' in text
+        assert 'latency_seconds_bucket{route="/a",le="5.0"} 2.0' in text
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2.0' in text
+        assert 'latency_seconds_sum{route="/a"} 3.5' in text
+        assert 'latency_seconds_count{route="/a"} 2.0' in text
+
+    def test_rejects_wrong_labels(self):
+        counter = Counter("things_total", "Things", ["kind"])
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
+
+    def test_reports_cache_hits_and_misses(self):
+        registry = MetricsRegistry()
+        stats = CacheStats()
+        stats.hits, stats.misses = 3, 1
+        registry.register_cache("prompts", stats)
+
+        text = registry.render()
+        assert 'deerflow_cache_hits_total{cache="prompts"} 3.0' in text
+        assert 'deerflow_cache_misses_total{cache="prompts"} 1.0' in text
+
+
+class TestInstrumentation:
+    def test_times_sync_nodes_and_keeps_their_signature(self):
+        def node(state, config):
+            return {"ok": True}
+
+        before = node_duration.get_count(node="test_sync", status="ok")
+        wrapped = instrument_node("test_sync", node)
+        assert wrapped({}, {}) == {"ok": True}
+        assert list(inspect.signature(wrapped).parameters) == ["state", "config"]
+        assert node_duration.get_count(node="test_sync", status="ok") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_interrupts_are_not_errors(self):
+        async def node(state):
+            raise GraphInterrupt()
+
+        with pytest.raises(GraphInterrupt):
+            await instrument_node("test_async", node)({})
+        assert node_duration.get_count(node="test_async", status="interrupted") == 1
+        assert node_duration.get_count(node="test_async", status="error") == 0
+
+    def test_records_llm_latency_first_token_and_tokens(self):
+        handler = MetricsCallbackHandler()
+        run_id = uuid4()
+        labels = {"agent": "researcher", "model": "test-model"}
+        handler.on_chat_model_start(
+            {},
+            [[]],
+            run_id=run_id,
+            metadata={"langgraph_checkpoint_ns": "researcher:1|agent:2"},
+            invocation_params={"model_name": "test-model"},
+        )
+        handler.on_llm_new_token("a", run_id=run_id)
+        handler.on_llm_new_token("b", run_id=run_id)
+        message = AIMessage(
+            content="ab",
+            usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12},
+        )
+        handler.on_llm_end(
+            LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id
+        )
+
+        assert llm_time_to_first_token.get_count(**labels) == 1
+        assert llm_duration.get_count(status="ok", **labels) == 1
+        assert llm_tokens.get(type="input", **labels) == 10
+        assert llm_tokens.get(type="output", **labels) == 2
+
+    def test_records_tool_durations(self):
+        handler = MetricsCallbackHandler()
+        run_id = uuid4()
+        handler.on_tool_start(
+            {"name": "test_tool"},
+            "query",
+            run_id=run_id,
+            metadata={"langgraph_node": "coder"},
+        )
+        handler.on_tool_error(RuntimeError(), run_id=run_id)
+        assert (
+            tool_duration.get_count(tool="test_tool", agent="coder", status="error")
+            == 1
+        )
+
+
+def test_metrics_endpoint():
+    from server.routes.metrics import router
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE deerflow_node_duration_seconds histogram" in response.text
+    assert 'deerflow_admission_requests{state="running"}' in response.text
+
+
+def test_values_of_workers_are_summed(tmp_path):
+    workers = []
+    for requests, busy in ((2, 1), (3, 4)):
+        worker = MetricsRegistry()
+        counter = Counter("requests_total", "Requests", ["route"], registry=worker)
+        counter.inc(requests, route="/chat")
+        Gauge("busy", "Busy workers", registry=worker).set(busy)
+        histogram = Histogram("latency", "Latency", registry=worker, buckets=(1,))
+        histogram.observe(0.5)
+        workers.append(worker)
+
+    workers[1].write_worker_file(str(tmp_path), workers[1].worker_id)
+    text = workers[0].render_workers(str(tmp_path), workers[0].worker_id, 60)
+    assert 'requests_total{route="/chat"} 5.0' in text
+    assert "\nbusy 5.0" in text
+    assert 'latency_bucket{le="1.0"} 2' in text
+    assert "latency_count 2" in text
+
+    # Gauges of workers that stopped writing are left out, counters are kept
+    text = workers[0].render_workers(str(tmp_path), workers[0].worker_id, -1)
+    assert 'requests_total{route="/chat"} 5.0' in text
+    assert "\nbusy " not in text
@@ -0,0 +1,225 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, StateGraph
+from langgraph.types import Command
+
+from src.graph import nodes
+from src.graph.types import State
+from src.sandbox import PythonSandboxPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PythonSandboxPool(
+        size=2,
+        timeout=5,
+        cpu_time_limit=1,
+        memory_limit_mb=512,
+        max_namespaces=2,
+        warm_imports=(),
+    )
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def test_namespaces_are_per_thread(pool):
+    assert pool.run("x = 41", thread_id="a").error is None
+    assert pool.run("print(x + 1)", thread_id="a").output == "42\n"
+    result = pool.run("print(x)", thread_id="b")
+    assert "NameError" in result.error
+
+
+def test_threads_are_spread_over_workers(pool):
+    first = pool.run("import os; print(os.getpid())", thread_id="spread-1")
+    second = pool.run("import os; print(os.getpid())", thread_id="spread-2")
+    assert first.output != second.output
+
+
+def test_errors_are_reported(pool):
+    result = pool.run("1 / 0", thread_id="errors")
+    assert "ZeroDivisionError" in result.error
+
+
+def test_cpu_time_limit_keeps_worker(pool):
+    pool.run("import os; pid = os.getpid()", thread_id="cpu")
+    result = pool.run("while True:\n    pass", thread_id="cpu")
+    assert "CPUTimeLimitExceeded" in result.error
+    # The worker survived, so the thread's namespace is still there
+    assert pool.run("print(pid == os.getpid())", thread_id="cpu").output == "True\n"
+
+
+def test_timeout_interrupts_code_and_keeps_worker(pool):
+    pool.run("import os; x = os.getpid()", thread_id="sleepy")
+    result = pool.run("import time; time.sleep(10)", thread_id="sleepy", timeout=0.5)
+    assert "TimeoutError" in result.error
+    assert pool.timeouts >= 1
+    assert pool.run("print(x == os.getpid())", thread_id="sleepy").output == "True\n"
+
+
+def test_unresponsive_code_replaces_worker(pool):
+    pool.run("import os; x = os.getpid()", thread_id="stuck")
+    code = "import signal, time\nsignal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGUSR1})\ntime.sleep(10)"
+    worker = pool._worker_for("stuck")
+    pool._assignments["stuck-neighbour"] = worker
+    pool.run("y = 1", thread_id="stuck-neighbour")
+    result = pool.run(code, thread_id="stuck", timeout=0.5)
+    assert "TimeoutError" in result.error
+    # The replacement worker starts with fresh namespaces, and says so
+    result = pool.run("x", thread_id="stuck")
+    assert "NameError" in result.error
+    assert result.state_reset
+    assert pool.run("y", thread_id="stuck-neighbour").state_reset
+    assert not pool.run("y = 2", thread_id="stuck-neighbour").state_reset
+
+
+def test_memory_limit_spares_other_threads(tmp_path):
+    pool = PythonSandboxPool(
+        size=1, memory_limit_mb=512, warm_imports=(), spill_dir=str(tmp_path)
+    )
+    # The interrupt is held back until the memory is in the namespace
+    code = (
+        "import signal, time\n"
+        "signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGUSR1})\n"
+        "blob = bytearray(768 * 1024 * 1024)\n"
+        "signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGUSR1})\n"
+        "time.sleep(5)"
+    )
+    try:
+        pool.run("import os; x = os.getpid()", thread_id="neighbour")
+        result = pool.run(code, thread_id="hungry")
+        assert "MemoryError" in result.error
+        # Its namespace had to go, the neighbour's is still there
+        result = pool.run("print('alive')", thread_id="hungry")
+        assert result.output == "alive\n"
+        assert result.state_reset
+        result = pool.run("print(x == os.getpid())", thread_id="neighbour")
+        assert result.output == "True\n"
+        assert not result.state_reset
+    finally:
+        pool.close()
+
+
+def test_crashed_worker_is_replaced(pool):
+    result = pool.run("import os; os._exit(3)", thread_id="crash")
+    assert "exit code 3" in result.error
+    assert pool.run("print('alive')", thread_id="crash").output == "alive\n"
+
+
+def test_least_recently_used_namespaces_are_dropped(pool):
+    worker = pool._worker_for("lru-1")
+    pool._assignments["lru-2"] = worker
+    pool._assignments["lru-3"] = worker
+    pool.run("x = 1", thread_id="lru-1")
+    pool.run("x = 2", thread_id="lru-2")
+    pool.run("x = 3", thread_id="lru-3")
+    assert "NameError" in pool.run("x", thread_id="lru-1").error
+    assert pool.run("print(x)", thread_id="lru-3").output == "3\n"
+
+
+def test_reset_drops_namespace(pool):
+    pool.run("x = 1", thread_id="reset")
+    pool.reset("reset")
+    assert "NameError" in pool.run("x", thread_id="reset").error
+
+
+def test_submit_runs_threads_in_parallel():
+    pool = PythonSandboxPool(size=2, warm_imports=())
+
+    async def run_both():
+        return await asyncio.gather(
+            pool.submit("import time; time.sleep(0.5)", thread_id="parallel-1"),
+            pool.submit("import time; time.sleep(0.5)", thread_id="parallel-2"),
+        )
+
+    pool.start()
+    try:
+        for worker in pool._workers:
+            worker.wait_ready(10)
+        started = time.monotonic()
+        results = asyncio.run(run_both())
+        elapsed = time.monotonic() - started
+    finally:
+        pool.close()
+    assert all(result.error is None for result in results)
+    assert elapsed < 0.9
+
+
+def test_python_repl_tool_reports_lost_state(monkeypatch, pool):
+    from src.tools import python_repl
+
+    monkeypatch.setattr(python_repl, "python_sandbox_pool", pool)
+    config = {"configurable": {"thread_id": "tool-reset"}}
+    python_repl.python_repl_tool.invoke({"code": "z = 1"}, config=config)
+    pool._worker_for("tool-reset").restart("test")
+    result = python_repl.python_repl_tool.invoke({"code": "print(z)"}, config=config)
+    assert result.startswith(python_repl.STATE_RESET_NOTICE)
+    assert "NameError" in result
+
+
+def test_python_repl_tool_uses_thread_namespace(monkeypatch, pool):
+    from src.tools import python_repl
+
+    monkeypatch.setattr(python_repl, "python_sandbox_pool", pool)
+    config = {"configurable": {"thread_id": "tool"}}
+    python_repl.python_repl_tool.invoke({"code": "y = 7"}, config=config)
+    result = python_repl.python_repl_tool.invoke(
+        {"code": "print(y * 6)"}, config=config
+    )
+    assert "Stdout: 42" in result
+    result = python_repl.python_repl_tool.invoke({"code": "raise ValueError('bad')"})
+    assert result.startswith("Error executing code")
+
+
+def test_suspended_namespace_survives_worker_replacement(tmp_path):
+    pool = PythonSandboxPool(size=1, warm_imports=(), spill_dir=str(tmp_path))
+    try:
+        pool.run("import pandas as pd\ndf = pd.DataFrame({'a': [1, 2]})", "resume")
+        pool.suspend("resume")
+        # Even a new worker picks the namespace up from disk
+        pool._workers[0].restart("test")
+        result = pool.run("print(int(df.a.sum()))", thread_id="resume")
+        assert result.output == "3\n"
+        assert not result.state_reset
+    finally:
+        pool.close()
+
+
+def test_namespace_is_suspended_only_when_the_plan_review_starts():
+    builder = StateGraph(State)
+    builder.add_node("human_feedback", nodes.human_feedback_node)
+    for destination in ("planner", "research_team", "reporter"):
+        builder.add_node(destination, lambda state: {})
+    builder.add_edge(START, "human_feedback")
+    graph = builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "review"}}
+    with patch.object(nodes, "python_sandbox_pool", MagicMock()) as sandbox:
+        graph.invoke({"current_plan": "not json"}, config)
+        sandbox.suspend.assert_called_once_with("review")
+
+        graph.invoke(Command(resume="[ACCEPTED]"), config)
+        sandbox.suspend.assert_called_once()
+
+
+def test_idle_namespaces_spill_under_memory_pressure(tmp_path):
+    pool = PythonSandboxPool(
+        size=1, warm_imports=(), spill_dir=str(tmp_path), spill_threshold_mb=1
+    )
+    try:
+        pool.run("x = 'idle'", thread_id="idle")
+        pool.run("y = 'busy'", thread_id="busy")
+        # Spilling happens after the result is sent; wait for it
+        pool.run("", thread_id="busy")
+        assert len(list(tmp_path.glob("*.pkl"))) == 1
+        assert pool.run("print(x)", thread_id="idle").output == "idle\n"
+        pool.reset("idle")
+        assert "NameError" in pool.run("x", thread_id="idle").error
+    finally:
+        pool.close()
@@ -0,0 +1,152 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.chat_request import ChatRequest
+from server.routes import chat
+from src.config import reloader
+from src.config.reloader import ConfigReloader
+from src.llms import llm
+from src.tools import search
+
+CONF = """
+BASIC_MODEL:
+  model: "basic-1"
+  api_key: "key"
+  available_models: ["basic-2"]
+"""
+
+
+@pytest.fixture
+def config(tmp_path):
+    """A configuration with `SEARCH_API=duckduckgo` and a Tavily key."""
+    conf_file = tmp_path / "conf.yaml"
+    conf_file.write_text(CONF)
+    env = {"SEARCH_API": "duckduckgo", "TAVILY_API_KEY": "key"}
+    with patch.dict(os.environ, env):
+        for key in ("BRAVE_SEARCH_API_KEY", "RAG_PROVIDER", "RAGFLOW_API_URL"):
+            os.environ.pop(key, None)
+        config = ConfigReloader(str(conf_file), str(tmp_path / ".env"))
+        with (
+            patch.object(reloader, "config_reloader", config),
+            patch.dict(search._web_search_tools, clear=True),
+            patch.dict(llm._llm_cache, clear=True),
+        ):
+            yield config
+
+
+@pytest.fixture
+def created_tools():
+    created = []
+
+    def create(engine, max_search_results):
+        created.append((engine, max_search_results))
+        return MagicMock(engine=engine)
+
+    with patch.object(search, "_create_web_search_tool", create):
+        yield created
+
+
+def test_search_tools_are_pooled_per_engine(config, created_tools):
+    default = search.get_web_search_tool(3)
+    assert default.engine == "duckduckgo"
+    assert search.get_web_search_tool(3, "duckduckgo") is default
+
+    arxiv = search.get_web_search_tool(3, "arxiv")
+    assert arxiv.engine == "arxiv"
+    assert search.get_web_search_tool(3, "arxiv") is arxiv
+    assert created_tools == [("duckduckgo", 3), ("arxiv", 3)]
+
+    with pytest.raises(ValueError, match="Unsupported search engine"):
+        search.get_web_search_tool(3, "altavista")
+
+
+def test_runs_on_different_engines_share_the_pool(config, created_tools):
+    search.prebuild_web_search_tools("tavily, arxiv")
+    assert created_tools == [("tavily", 3), ("arxiv", 3)]
+
+    engines = ["tavily", "arxiv"] * 20
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tools = list(
+            executor.map(lambda engine: search.get_web_search_tool(3, engine), engines)
+        )
+    assert [tool.engine for tool in tools] == engines
+    assert len(created_tools) == 2
+
+
+def test_search_tools_per_result_count_are_bounded(config, created_tools):
+    first = search.get_web_search_tool(1)
+    with patch.object(search, "_WEB_SEARCH_TOOL_CACHE_SIZE", 3):
+        for count in range(2, 6):
+            search.get_web_search_tool(count)
+            # Recently used, so never the one dropped
+            assert search.get_web_search_tool(1) is first
+    assert len(search._web_search_tools) == 3
+
+    with pytest.raises(ValueError):
+        ChatRequest(max_search_results=10_000)
+
+
+def test_models_are_selected_from_the_available_ones(config):
+    assert llm.get_configured_llm_models()["basic"] == ["basic-1", "basic-2"]
+
+    default = llm.get_llm_by_type("basic")
+    assert default.model_name == "basic-1"
+    assert llm.get_llm_by_type("basic", "basic-1") is default
+    selected = llm.get_llm_by_type("basic", "basic-2")
+    assert selected.model_name == "basic-2"
+    assert llm.get_llm_by_type("basic", "basic-2") is selected
+
+    with pytest.raises(ValueError, match="not available"):
+        llm.get_llm_by_type("basic", "gpt-unknown")
+
+
+@pytest.mark.asyncio
+async def test_request_selection_takes_precedence_over_preferences(config):
+    service = MagicMock()
+    service.is_available.return_value = True
+    service.get_user_config = AsyncMock(
+        return_value={"search_engine": "tavily", "rag_provider": "ragflow"}
+    )
+    with patch.object(chat, "appwrite_service", service):
+        selection = await chat._resolve_run_selection(ChatRequest(), "u1")
+        # RAGFlow has no credentials, so the preference is skipped
+        assert selection == {
+            "search_engine": "tavily",
+            "rag_provider": None,
+            "models": None,
+        }
+
+        request = ChatRequest(search_engine="arxiv", models={"basic": "basic-2"})
+        selection = await chat._resolve_run_selection(request, "u1")
+        assert selection["search_engine"] == "arxiv"
+        assert selection["models"] == {"basic": "basic-2"}
+
+        service.get_user_config.return_value = {}
+        selection = await chat._resolve_run_selection(ChatRequest(), "u2")
+        assert selection["search_engine"] == "duckduckgo"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "request_fields",
+    [
+        {"search_engine": "altavista"},
+        {"search_engine": "brave_search"},
+        {"rag_provider": "ragflow"},
+        {"models": {"basic": "gpt-unknown"}},
+    ],
+)
+async def test_invalid_selection_is_rejected(config, request_fields):
+    with pytest.raises(HTTPException) as exc_info:
+        await chat._resolve_run_selection(ChatRequest(**request_fields), "u1")
+    assert exc_info.value.status_code == 400
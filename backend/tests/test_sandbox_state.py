@@ -0,0 +1,109 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+import pandas as pd
+
+from src.sandbox.state import (
+    NamespaceStore,
+    remove_stale_snapshots,
+    snapshot_path,
+)
+
+
+def test_spilled_namespace_is_restored(tmp_path):
+    store = NamespaceStore(str(tmp_path))
+    namespace = store.get("t1")
+    exec(
+        "import pandas as pd\ndf = pd.DataFrame({'a': [1, 2, 3]})\nn = 5",
+        namespace,
+    )
+
+    assert store.spill("t1")
+    assert "t1" not in store
+    assert os.path.exists(snapshot_path(str(tmp_path), "t1"))
+
+    restored = store.get("t1")
+    assert restored["n"] == 5
+    assert restored["pd"] is pd
+    pd.testing.assert_frame_equal(restored["df"], pd.DataFrame({"a": [1, 2, 3]}))
+    # The snapshot is consumed by the restore
+    assert not os.path.exists(snapshot_path(str(tmp_path), "t1"))
+
+
+def test_unpicklable_values_are_left_out(tmp_path):
+    store = NamespaceStore(str(tmp_path))
+    namespace = store.get("t1")
+    exec("handle = open('/dev/null')\nx = 1", namespace)
+    store.spill("t1")
+    restored = store.get("t1")
+    assert restored["x"] == 1
+    assert "handle" not in restored
+
+
+def test_least_recently_used_namespaces_are_spilled(tmp_path):
+    store = NamespaceStore(str(tmp_path), max_namespaces=2)
+    for thread_id in ("t1", "t2", "t3"):
+        store.get(thread_id)["value"] = thread_id
+    store.get("t1")
+
+    assert store.relieve_pressure(keep="t3") == ["t2"]
+    assert "t2" not in store
+    assert store.get("t2")["value"] == "t2"
+
+
+def test_memory_threshold_spills_all_but_current(tmp_path):
+    store = NamespaceStore(str(tmp_path), spill_threshold_bytes=1)
+    for thread_id in ("t1", "t2", "t3"):
+        store.get(thread_id)["value"] = thread_id
+
+    assert store.relieve_pressure(keep="t2") == ["t1", "t3"]
+    assert "t2" in store
+
+
+def test_spill_all_keeps_only_the_given_thread(tmp_path):
+    store = NamespaceStore(str(tmp_path))
+    for thread_id in ("t1", "t2", "t3"):
+        store.get(thread_id)["value"] = thread_id
+
+    assert store.spill_all(keep="t2") == ["t1", "t3"]
+    assert "t2" in store
+    assert store.get("t3")["value"] == "t3"
+
+
+def test_without_spill_dir_namespaces_are_dropped():
+    store = NamespaceStore(None)
+    store.get("t1")["x"] = 1
+    store.spill("t1")
+    assert "x" not in store.get("t1")
+
+
+def test_drop_removes_snapshot(tmp_path):
+    store = NamespaceStore(str(tmp_path))
+    store.get("t1")["x"] = 1
+    store.spill("t1")
+    store.drop("t1")
+    assert "x" not in store.get("t1")
+
+
+def test_corrupt_snapshot_starts_fresh(tmp_path):
+    store = NamespaceStore(str(tmp_path))
+    with open(snapshot_path(str(tmp_path), "t1"), "wb") as f:
+        f.write(b"not a pickle")
+    assert "x" not in store.get("t1")
+
+
+def test_remove_stale_snapshots(tmp_path):
+    store = NamespaceStore(str(tmp_path))
+    for thread_id in ("old", "new"):
+        store.get(thread_id)["x"] = 1
+        store.spill(thread_id)
+    old_path = snapshot_path(str(tmp_path), "old")
+    an_hour_ago = time.time() - 3600
+    os.utime(old_path, (an_hour_ago, an_hour_ago))
+
+    assert remove_stale_snapshots(str(tmp_path), max_age=60) == 1
+    assert not os.path.exists(old_path)
+    assert os.path.exists(snapshot_path(str(tmp_path), "new"))
@@ -0,0 +1,186 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server import workflow_run
+from server.lifecycle import Lifecycle
+from server.workflow_run import (
+    WorkflowRun,
+    active_runs,
+    is_draining,
+    reject_if_draining,
+    start_draining,
+)
+from src.graph import checkpoint
+from src.graph.checkpoint import (
+    CheckpointerError,
+    create_checkpointer,
+    load_snapshot,
+    save_snapshot,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_draining():
+    yield
+    workflow_run._drain_task = None
+    active_runs.clear()
+
+
+async def _events(steps, delay):
+    for i in range(steps):
+        await asyncio.sleep(delay)
+        yield f"event: step\ndata: {i}\n\n"
+
+
+@pytest.mark.asyncio
+async def test_run_without_any_client_is_cancelled():
+    with (
+        patch.object(workflow_run, "RECONNECT_GRACE_PERIOD", 0),
+        patch.object(workflow_run, "DISCONNECT_POLL_INTERVAL", 0.05),
+    ):
+        run = WorkflowRun("orphan", _events(100, 0.01))
+        attached = WorkflowRun("attached", _events(10, 0.01))
+        attached.attach()
+    with pytest.raises(asyncio.CancelledError):
+        await run.task
+    assert run.cancel_reason == "client disconnected"
+    await attached.task
+    assert attached.cancel_reason is None
+
+
+@pytest.mark.asyncio
+async def test_drain_lets_short_runs_finish():
+    run = WorkflowRun("short", _events(2, 0.01))
+    await start_draining(timeout=5)
+    assert run.task.done() and not run.task.cancelled()
+    assert len(run.buffer.events_after(0)) == 2
+    with pytest.raises(HTTPException) as e:
+        reject_if_draining()
+    assert e.value.status_code == 503
+    assert e.value.headers["Retry-After"]
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_long_runs_with_a_resumable_event():
+    run = WorkflowRun("long", _events(100, 1))
+    assert not is_draining()
+    await start_draining(timeout=0.05)
+    assert run.task.cancelled()
+    assert run.token.cancelled
+    assert run.buffer.closed
+    _, frame = run.buffer.events_after(0)[-1]
+    assert "event: error" in frame and '"resumable":true' in frame
+    assert "long" not in active_runs
+
+
+def test_memory_checkpointer_is_the_default():
+    assert checkpoint.is_shared("sqlite")
+    assert not checkpoint.is_shared("memory")
+    assert isinstance(create_checkpointer("memory"), MemorySaver)
+
+
+def test_checkpointer_errors_name_what_is_missing():
+    with pytest.raises(CheckpointerError, match="memory, sqlite or postgres"):
+        create_checkpointer("redis")
+    with (
+        patch.dict(sys.modules, {"aiosqlite": None}),
+        pytest.raises(CheckpointerError, match="aiosqlite"),
+    ):
+        create_checkpointer("sqlite")
+    with (
+        patch.object(checkpoint, "CHECKPOINTER_URL", ""),
+        patch.dict(sys.modules, {"psycopg_pool": None}),
+        pytest.raises(CheckpointerError, match="langgraph-checkpoint-postgres"),
+    ):
+        create_checkpointer("postgres")
+
+
+class _State(TypedDict):
+    count: int
+
+
+def _counter_graph(saver):
+    builder = StateGraph(_State)
+    builder.add_node("step", lambda state: {"count": state["count"] + 1})
+    builder.add_edge(START, "step")
+    builder.add_edge("step", END)
+    return builder.compile(checkpointer=saver)
+
+
+def test_memory_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "memory.pkl")
+    config = {"configurable": {"thread_id": "t1"}}
+    saver = MemorySaver()
+    _counter_graph(saver).invoke({"count": 1}, config)
+    assert save_snapshot(saver, path) == 1
+
+    restored = MemorySaver()
+    assert load_snapshot(restored, path) == 1
+    graph = _counter_graph(restored)
+    assert graph.get_state(config).values == {"count": 2}
+    assert len(list(graph.get_state_history(config))) == len(
+        list(_counter_graph(saver).get_state_history(config))
+    )
+
+
+def test_memory_snapshot_leaves_out_old_threads(tmp_path):
+    path = str(tmp_path / "memory.pkl")
+    saver = MemorySaver()
+    for thread_id in ("t1", "t2", "t3"):
+        config = {"configurable": {"thread_id": thread_id}}
+        _counter_graph(saver).invoke({"count": 1}, config)
+
+    assert save_snapshot(saver, path, retention_seconds=3600, max_threads=2) == 2
+    restored = MemorySaver()
+    load_snapshot(restored, path)
+    assert set(restored.storage) == {"t2", "t3"}
+    assert {key[0] for key in restored.blobs} == {"t2", "t3"}
+
+    assert save_snapshot(saver, path, retention_seconds=-1, max_threads=2) == 0
+
+
+def test_memory_state_is_not_durable_with_several_workers():
+    with patch.object(checkpoint, "CHECKPOINTER_SNAPSHOT_FILE", "memory.pkl"):
+        assert checkpoint.is_durable("memory")
+        with patch.object(checkpoint, "SERVER_WORKERS", 4):
+            assert not checkpoint.is_durable("memory")
+            assert checkpoint.is_durable("sqlite")
+
+
+@pytest.mark.asyncio
+async def test_shutdown_steps_run_in_order_despite_failures():
+    calls = []
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    lifecycle = Lifecycle(shutdown_timeout=0.2)
+    lifecycle.on_drain(lambda: calls.append("drain"))
+    lifecycle.on_shutdown("fail", fail)
+    lifecycle.on_shutdown("slow", slow)
+    lifecycle.on_shutdown("last", lambda: calls.append("last"))
+    await lifecycle.shutdown()
+    assert calls == ["drain"]
+    assert is_draining()
+
+    lifecycle = Lifecycle(shutdown_timeout=5)
+    lifecycle.on_shutdown("fail", fail)
+    lifecycle.on_shutdown("last", lambda: calls.append("last"))
+    await lifecycle.shutdown()
+    assert calls == ["drain", "last"]
@@ -0,0 +1,57 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.lazy import Lazy
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def test_lazy_builds_once_on_first_use():
+    builds = []
+
+    def build():
+        time.sleep(0.05)
+        builds.append(1)
+        return {"ready": True}
+
+    value = Lazy(build)
+    assert not value.created and builds == []
+
+    threads = [threading.Thread(target=value.get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == [1]
+    assert value.get() == {"ready": True}
+    # Attribute access is forwarded to the built value
+    assert value.keys() == {"ready": True}.keys()
+
+
+def test_server_import_defers_optional_backends_and_graphs():
+    code = (
+        "import sys, server.app\n"
+        "from server.routes import chat\n"
+        "heavy = ['appwrite.client', 'langchain_openai', 'langchain_deepseek',"
+        " 'langchain_mcp_adapters', 'mcp', 'bs4', 'markdownify']\n"
+        "print([name for name in heavy if name in sys.modules])\n"
+        "print(chat.graph.created)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded, graph_built = result.stdout.strip().splitlines()[-2:]
+    assert loaded == "[]"
+    assert graph_built == "False"
@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.stream_utils import (
+    MessageChunkCoalescer,
+    coalesce_message_chunks,
+    dumps_event_data,
+)
+
+
+def _chunk(content, message_id="m1", **extra):
+    return {"id": message_id, "role": "assistant", "content": content, **extra}
+
+
+class TestMessageChunkCoalescer:
+    def test_merges_chunks_of_the_same_message(self):
+        coalescer = MessageChunkCoalescer(window_seconds=60, max_chars=100)
+        assert coalescer.add("message_chunk", _chunk("Hel")) == []
+        assert coalescer.add("message_chunk", _chunk("lo")) == []
+        assert coalescer.flush() == [("message_chunk", _chunk("Hello"))]
+
+    def test_flushes_on_finish_reason(self):
+        coalescer = MessageChunkCoalescer(window_seconds=60, max_chars=100)
+        coalescer.add("message_chunk", _chunk("Hi"))
+        ready = coalescer.add("message_chunk", _chunk("!", finish_reason="stop"))
+        assert ready == [("message_chunk", _chunk("Hi!", finish_reason="stop"))]
+
+    def test_flushes_on_size_and_other_messages(self):
+        coalescer = MessageChunkCoalescer(window_seconds=60, max_chars=4)
+        assert coalescer.add("message_chunk", _chunk("abcd")) == [
+            ("message_chunk", _chunk("abcd"))
+        ]
+        coalescer.add("message_chunk", _chunk("a"))
+        ready = coalescer.add("message_chunk", _chunk("b", message_id="m2"))
+        assert ready == [("message_chunk", _chunk("a"))]
+        ready = coalescer.add("tool_calls", {"id": "m3"})
+        assert ready == [
+            ("message_chunk", _chunk("b", message_id="m2")),
+            ("tool_calls", {"id": "m3"}),
+        ]
+
+
+class TestCoalesceMessageChunks:
+    @pytest.mark.asyncio
+    async def test_flushes_pending_chunk_when_upstream_is_idle(self):
+        received = []
+
+        async def events():
+            yield "message_chunk", _chunk("a")
+            yield "message_chunk", _chunk("b")
+            await asyncio.sleep(0.2)
+            yield "message_chunk", _chunk("c")
+
+        async for event in coalesce_message_chunks(events(), 0.05, 100):
+            received.append(event)
+        assert received == [
+            ("message_chunk", _chunk("ab")),
+            ("message_chunk", _chunk("c")),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_zero_window_disables_coalescing(self):
+        async def events():
+            yield "message_chunk", _chunk("a")
+            yield "message_chunk", _chunk("b")
+
+        received = [event async for event in coalesce_message_chunks(events(), 0, 100)]
+        assert len(received) == 2
+
+
+def test_dumps_event_data_keeps_unicode():
+    assert dumps_event_data({"content": "你好"}) == '{"content":"你好"}'
@@ -0,0 +1,45 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config.configuration import Configuration
+from src.prompts import template
+from src.prompts.template import apply_prompt_template, render_prompt
+
+
+def system_prompt(prompt_name, state, configurable=None):
+    return apply_prompt_template(prompt_name, state, configurable)[0]["content"]
+
+
+def test_time_is_a_suffix_after_a_stable_prefix():
+    state = {"messages": [], "locale": "en-US"}
+    with patch.object(template, "current_time", return_value="Mon Jan 01 2024"):
+        first = system_prompt("planner", state, Configuration(max_step_num=3))
+    with patch.object(template, "current_time", return_value="Tue Jan 02 2024"):
+        second = system_prompt("planner", state, Configuration(max_step_num=3))
+
+    assert first.endswith("---\nCURRENT_TIME: Mon Jan 01 2024\n---")
+    prefix = first[: first.rindex("---\nCURRENT_TIME")]
+    assert second.startswith(prefix)
+    assert "maximum of 3 steps" in prefix
+
+
+def test_static_part_is_rendered_per_variable_combination():
+    template._static_cache.clear()
+    state = {"messages": [], "locale": "zh-CN", "report_style": "news"}
+    render_prompt("reporter", state)
+    render_prompt("reporter", {**state, "messages": ["ignored"]})
+    assert len(template._static_cache) == 1
+
+    render_prompt("reporter", {**state, "report_style": "academic"})
+    assert len(template._static_cache) == 2
+
+
+def test_current_time_is_rounded():
+    with patch.object(template, "PROMPT_TIME_GRANULARITY", 3600):
+        assert template.current_time().strip().split(" ")[-1].endswith(":00:00")
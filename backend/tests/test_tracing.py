@@ -0,0 +1,166 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+import httpx
+import pytest
+from langgraph.errors import GraphInterrupt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.trace_breakdown import breakdown, load_spans
+from src.graph import instrumentation
+from src.utils import tracing
+from src.utils.tracing import (
+    STATUS_ERROR,
+    FileSpanExporter,
+    Tracer,
+    instrument_http,
+    tool_span,
+)
+
+
+class _ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, request):
+        for resource_spans in request["resourceSpans"]:
+            for scope_spans in resource_spans["scopeSpans"]:
+                self.spans.extend(scope_spans["spans"])
+
+
+@pytest.fixture
+def exporter():
+    exporter = _ListExporter()
+    tracer = Tracer(exporter=exporter, export_interval=0.01)
+    with (
+        patch.object(tracing, "tracer", tracer),
+        patch.object(instrumentation, "tracer", tracer),
+    ):
+        yield exporter
+    tracer.flush()
+
+
+def _by_name(spans):
+    return {span["name"]: span for span in spans}
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.start_as_current_span("run") as span:
+        assert not span.is_recording
+        assert tracing.get_current_span() is None
+
+
+def test_spans_nest_across_tasks_and_threads(exporter):
+    async def node():
+        await asyncio.sleep(0)
+        with tool_span("web_search"):
+            # Nested calls of the same tool share its span
+            with tool_span("web_search"):
+                pass
+        await asyncio.to_thread(sync_tool)
+
+    def sync_tool():
+        with tool_span("crawl_tool"):
+            pass
+
+    async def run():
+        with tracing.tracer.start_as_current_span("chat.stream", root=True):
+            await asyncio.create_task(
+                instrumentation.instrument_node("researcher", node)()
+            )
+
+    asyncio.run(run())
+    tracing.tracer.flush()
+
+    spans = _by_name(exporter.spans)
+    assert len(exporter.spans) == 4
+    root = spans["chat.stream"]
+    assert "parentSpanId" not in root
+    assert spans["node researcher"]["parentSpanId"] == root["spanId"]
+    node_id = spans["node researcher"]["spanId"]
+    assert spans["tool web_search"]["parentSpanId"] == node_id
+    assert spans["tool crawl_tool"]["parentSpanId"] == node_id
+    assert {span["traceId"] for span in exporter.spans} == {root["traceId"]}
+
+
+def test_interrupted_nodes_are_not_errors(exporter):
+    def node(state):
+        raise GraphInterrupt()
+
+    with tracing.tracer.start_as_current_span("chat.stream", root=True):
+        with pytest.raises(GraphInterrupt):
+            instrumentation.instrument_node("human_feedback", node)({})
+        with pytest.raises(ValueError):
+            instrumentation.instrument_node("planner", lambda state: int("x"))({})
+    tracing.tracer.flush()
+
+    spans = _by_name(exporter.spans)
+    assert spans["node human_feedback"]["status"]["code"] != STATUS_ERROR
+    assert spans["node planner"]["status"]["code"] == STATUS_ERROR
+    assert spans["node planner"]["events"][0]["name"] == "exception"
+
+
+def test_http_requests_become_client_spans(exporter):
+    instrument_http()
+    transport = httpx.MockTransport(lambda request: httpx.Response(503))
+    with httpx.Client(transport=transport) as client:
+        # Outside of a traced operation nothing is recorded
+        client.get("https://api.example.com/search?api_key=secret")
+        with tracing.tracer.start_as_current_span("tool web_search"):
+            client.get("https://api.example.com/search?api_key=secret")
+    tracing.tracer.flush()
+
+    assert len(exporter.spans) == 2
+    http = _by_name(exporter.spans)["HTTP GET api.example.com"]
+    attributes = {a["key"]: a["value"] for a in http["attributes"]}
+    assert attributes["url.full"] == {"stringValue": "https://api.example.com/search"}
+    assert attributes["http.response.status_code"] == {"intValue": "503"}
+    assert http["status"]["code"] == STATUS_ERROR
+
+
+def test_file_export_and_breakdown(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(exporter=FileSpanExporter(str(path)), export_interval=0.01)
+    with tracer.start_as_current_span(
+        "chat.stream", attributes={"thread_id": "t1"}, root=True
+    ):
+        with tracer.start_as_current_span("node planner"):
+            pass
+    tracer.flush()
+
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[0])["resourceSpans"][0]["resource"]["attributes"]
+    runs = breakdown(load_spans(lines))
+    assert len(runs) == 1
+    assert runs[0]["thread_id"] == "t1"
+    assert list(runs[0]["categories"]) == ["node planner"]
+
+
+def test_spans_are_dropped_while_the_exporter_is_behind():
+    release = threading.Event()
+
+    class _StuckExporter(_ListExporter):
+        def export(self, request):
+            release.wait()
+            super().export(request)
+
+    exporter = _StuckExporter()
+    tracer = Tracer(exporter=exporter, export_interval=0.01, max_queue_size=2)
+    for i in range(50):
+        with tracer.start_as_current_span(f"span-{i}"):
+            pass
+    assert tracer.dropped_spans > 0
+    assert tracer._queue.qsize() <= 2
+
+    release.set()
+    tracer.flush()
+    assert len(exporter.spans) == 50 - tracer.dropped_spans